@@ -24,71 +24,84 @@ import json
 import sys
 import pathlib
 import datetime
-from modules.sumologic import SumoLogic
+import re
+import math
+from modules.sumologic import SumoLogic, SearchJobError
+from modules.endpoints import endpoint_lookup
+from modules.metrics import MetricsCollector
+from modules.poller import JobPoller
+from modules.search_planner import SearchPlanner, DEFAULT_MAX_RESULTS, overflowed
+from modules.polling import SEARCH_JOB_DONE
+from modules.sinks import SinkFactory, RoutingSink, COMPRESSIONS, FORMATS
+from modules.manifest import Manifest
+from modules.workqueue import run_bounded
 from logzero import logger
 from typing import Union
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import logzero
 import argparse
 
+# The max workers is set to 10 because the Sumo API rate limits with more than 10 concurrent connections
+MAX_WORKERS = 10
+# which chunks finished, so that an interrupted run can be resumed with -resume
+DEFAULT_MANIFEST = 'bulk_download_data.manifest.sqlite'
 
-# lookup the API endpoint URL using the Sumo deployment name
-def endpoint_lookup(deployment):
-    # there are duplicates here because most deployments have 2 names
-    endpoints = {'prod': 'https://api.sumologic.com/api',
-                 'us1': 'https://api.sumologic.com/api',
-                 'us2': 'https://api.us2.sumologic.com/api',
-                 'eu': 'https://api.eu.sumologic.com/api',
-                 'dub': 'https://api.eu.sumologic.com/api',
-                 'ca': 'https://api.ca.sumologic.com/api',
-                 'mon': 'https://api.ca.sumologic.com/api',
-                 'de': 'https://api.de.sumologic.com/api',
-                 'fra': 'https://api.de.sumologic.com/api',
-                 'au': 'https://api.au.sumologic.com/api',
-                 'syd': 'https://api.au.sumologic.com/api',
-                 'jp': 'https://api.jp.sumologic.com/api',
-                 'tky': 'https://api.jp.sumologic.com/api',
-                 'in': 'https://api.in.sumologic.com/api',
-                 'mum': 'https://api.in.sumologic.com/api',
-                 'fed': 'https://api.fed.sumologic.com/api',
-                 }
-    return endpoints[str(deployment).lower()]
+
+def result_filename(source_category: str, start_time_ISO: str, end_time_ISO: str, extension: str = '.log') -> str:
+    # we're about to write this to a file. We need a filename that doesn't have slashes in it
+    sanitized_source_category = source_category.replace('/', '-')
+    return f'{sanitized_source_category}-{start_time_ISO}-{end_time_ISO}{extension}'
+
+
+def write_pages(filename: str, pages, sinks: SinkFactory, manifest: Manifest = None, chunk: tuple = None) -> int:
+    # the messages have a bunch of extra stuff in them. By default we're just interested in the raw logs data
+    # so that is written line by line, one page of results at a time so memory use stays flat. The sink
+    # takes care of compression (on its own thread) and only creates the file if there are results. It
+    # writes to a .part file that only gets its real name once everything is in it.
+    with sinks.open(filename) as sink:
+        for page in pages:
+            sink.write_page(page)
+    if manifest is not None:
+        manifest.complete(*chunk, sink.path if sink.count else None, sink.count, sink.sha256)
+    return sink.count
 
 
 def download_and_write(start_time: datetime.datetime,
                        end_time: datetime.datetime,
                        source_category: str,
-                       access_id: str,
-                       access_key: str,
-                       api_endpoint: str) -> Union[dict, bool]:
-    # create an instance of the Sumo Logic SDK
-    sumo = SumoLogic(access_id, access_key, endpoint=api_endpoint)
+                       sumo: SumoLogic,
+                       page_concurrency: int = 1,
+                       incremental: bool = False,
+                       sinks: SinkFactory = None,
+                       manifest: Manifest = None) -> Union[dict, bool]:
+    # the Sumo Logic SDK instance is shared by all the worker threads
     start_time_ISO = start_time.isoformat()
     end_time_ISO = end_time.isoformat()
+    sinks = sinks or SinkFactory()
+    chunk = (source_category, start_time_ISO, end_time_ISO)
+    query = f'_sourceCategory={str(source_category)}'
 
     try:
+        if manifest is not None:
+            manifest.start(*chunk)
         # execute the query
-        query = f'_sourceCategory={str(source_category)}'
-        messages = sumo.search_job_messages_sync(query,
-                                             fromTime=start_time_ISO,
-                                             toTime=end_time_ISO,
-                                             timeZone='UTC')
-        # we're about to write this to a file. We need a filename that doesn't have slashes in it
-        sanitized_source_category = source_category.replace('/', '-')
-        filename = f'{sanitized_source_category}-{start_time_ISO}-{end_time_ISO}.log'
-        # the logs variable has a bunch of extra stuff in it. We're just interested in the raw logs data so
-        # write that to a text file line by line
-        if len(messages) > 0:
-            with open(filename, 'w') as f:
-                for message in messages:
-                    f.write(message['map']['_raw'])
-                    f.write('\n')
+        pages = sumo.iter_search_messages(query,
+                                          fromTime=start_time_ISO,
+                                          toTime=end_time_ISO,
+                                          timeZone='UTC',
+                                          pages=True,
+                                          concurrency=page_concurrency,
+                                          incremental=incremental)
+        num_results = write_pages(result_filename(source_category, start_time_ISO, end_time_ISO, sinks.extension),
+                                  pages,
+                                  sinks,
+                                  manifest,
+                                  chunk)
         # since we're multi-threaded we need to return status explicitly
         return {'query': query,
                 'start': str(start_time_ISO),
                 'end': str(end_time_ISO),
-                'endpoint': api_endpoint,
-                'num_results': len(messages),
+                'endpoint': sumo.endpoint,
+                'num_results': num_results,
                 'status': 'SUCCESS',
                 'line_number': None,
                 'exception': None}
@@ -96,16 +109,204 @@ def download_and_write(start_time: datetime.datetime,
     except Exception as e:
         _, _, tb = sys.exc_info()
         lineno = tb.tb_lineno
+        if manifest is not None:
+            manifest.fail(*chunk, e)
         return {'query': query,
                 'start': str(start_time_ISO),
                 'end': str(end_time_ISO),
-                'endpoint': api_endpoint,
+                'endpoint': sumo.endpoint,
                 'num_messages': None,
                 'status': 'FAIL',
                 'line_number': lineno,
                 'exception': str(e)}
 
 
+def adaptive_download_and_write(start_time: datetime.datetime,
+                                end_time: datetime.datetime,
+                                source_category: str,
+                                sumo: SumoLogic,
+                                planner: SearchPlanner,
+                                page_concurrency: int = 1,
+                                sinks: SinkFactory = None,
+                                manifest: Manifest = None) -> dict:
+    # covers the whole time range for one category, with windows sized by the planner
+    query = f'_sourceCategory={str(source_category)}'
+    sinks = sinks or SinkFactory()
+    num_results = 0
+    windows = 0
+    chunk = None
+    try:
+        for window_start, window_end, search_job, status in planner.iter_windows(query, start_time, end_time,
+                                                                                 key=source_category):
+            chunk = (source_category, window_start.isoformat(), window_end.isoformat())
+            if manifest is not None:
+                manifest.start(*chunk)
+            pages = sumo.iter_search_job_message_pages(search_job, status['messageCount'],
+                                                       concurrency=page_concurrency)
+            filename = result_filename(source_category, window_start.isoformat(), window_end.isoformat(),
+                                       sinks.extension)
+            num_results = num_results + write_pages(filename, pages, sinks, manifest, chunk)
+            chunk = None
+            windows = windows + 1
+        return {'query': query,
+                'start': str(start_time.isoformat()),
+                'end': str(end_time.isoformat()),
+                'endpoint': sumo.endpoint,
+                'num_results': num_results,
+                'windows': windows,
+                'status': 'SUCCESS',
+                'line_number': None,
+                'exception': None}
+    except Exception as e:
+        _, _, tb = sys.exc_info()
+        lineno = tb.tb_lineno
+        if manifest is not None and chunk is not None:
+            manifest.fail(*chunk, e)
+        return {'query': query,
+                'start': str(start_time.isoformat()),
+                'end': str(end_time.isoformat()),
+                'endpoint': sumo.endpoint,
+                'num_results': num_results,
+                'windows': windows,
+                'status': 'FAIL',
+                'line_number': lineno,
+                'exception': str(e)}
+
+
+def category_router(categories: list):
+    # returns route(message) -> the categories a message's _sourcecategory belongs to, as a list that is
+    # empty if none match. Like _sourceCategory= in a query, matching is case insensitive and * is the only
+    # wildcard. A message is routed to every category that matches it (prod/web and prod/* both get a
+    # prod/web message), just as it would be found by a search for each of them.
+    patterns = [(re.compile('.*'.join(re.escape(part) for part in category.split('*')), re.IGNORECASE), category)
+                for category in categories]
+    routes = {}
+
+    def route(message):
+        value = message['map'].get('_sourcecategory', '')
+        if value not in routes:
+            routes[value] = [category for pattern, category in patterns if pattern.fullmatch(value)]
+        return routes[value]
+    return route
+
+
+def fan_out_query(categories: list) -> str:
+    return ' OR '.join(f'_sourceCategory={str(category)}' for category in categories)
+
+
+def write_fan_out_window(start_time_ISO: str,
+                         end_time_ISO: str,
+                         categories: list,
+                         sumo: SumoLogic,
+                         page_concurrency: int,
+                         sinks: SinkFactory,
+                         manifest: Manifest,
+                         finished: list) -> tuple:
+    # one search job for the categories. If it has more results than a search job can hold, the group is
+    # split in half and each half searched again, so a busy category never loses results to the others.
+    # Categories are appended to finished as their files are complete. Returns (results, files written).
+    with sumo.managed_search_job(fan_out_query(categories), fromTime=start_time_ISO, toTime=end_time_ISO,
+                                 timeZone='UTC') as search_job:
+        # stop waiting as soon as the count crosses the limit, the group is going to be split anyway
+        status = sumo.wait_for_search_job(search_job, until=overflowed)
+        split = overflowed(status)
+        if split and len(categories) == 1:
+            raise RuntimeError(f'{categories[0]} has more than {DEFAULT_MAX_RESULTS} results from {start_time_ISO} '
+                               f'to {end_time_ISO}, use a smaller -increment or -adaptive')
+        if not split:
+            if status['state'] != SEARCH_JOB_DONE:
+                raise SearchJobError(search_job, status)
+            pages = sumo.iter_search_job_message_pages(search_job, status['messageCount'], concurrency=page_concurrency)
+            routing = RoutingSink(category_router(categories),
+                                  lambda category: sinks.open_file(result_filename(category, start_time_ISO,
+                                                                                   end_time_ISO, sinks.extension)))
+            # routing and writing all the category files happens on one writer thread
+            with sinks.wrap(routing) as sink:
+                for page in pages:
+                    sink.write_page(page)
+            for category in categories:
+                category_sink = routing.sinks.get(category)
+                if manifest is not None:
+                    if category_sink is None:
+                        manifest.complete(category, start_time_ISO, end_time_ISO, None, 0, None)
+                    else:
+                        manifest.complete(category, start_time_ISO, end_time_ISO, category_sink.path,
+                                          category_sink.count, category_sink.sha256)
+                finished.append(category)
+            if routing.dropped:
+                logger.warning(f'{routing.dropped} messages from {start_time_ISO} to {end_time_ISO} matched none of the categories')
+            return routing.count, len(routing.sinks)
+    half = len(categories) // 2
+    logger.info(f'Too many results for {len(categories)} categories from {start_time_ISO} to {end_time_ISO}, '
+                f'splitting into {half} and {len(categories) - half}')
+    num_results = 0
+    files = 0
+    error = None
+    for part in (categories[:half], categories[half:]):
+        # a half that fails doesn't stop the other one, its categories are just left unfinished
+        try:
+            part_results, part_files = write_fan_out_window(start_time_ISO, end_time_ISO, part, sumo,
+                                                            page_concurrency, sinks, manifest, finished)
+            num_results = num_results + part_results
+            files = files + part_files
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return num_results, files
+
+
+def fan_out_download_and_write(start_time: datetime.datetime,
+                               end_time: datetime.datetime,
+                               categories: list,
+                               sumo: SumoLogic,
+                               page_concurrency: int = 1,
+                               sinks: SinkFactory = None,
+                               manifest: Manifest = None) -> dict:
+    # one search job for several categories. Every message is written to the file of each category it
+    # belongs to, so the output (and the manifest) is the same as one job per category would give.
+    start_time_ISO = start_time.isoformat()
+    end_time_ISO = end_time.isoformat()
+    sinks = sinks or SinkFactory()
+    query = fan_out_query(categories)
+    finished = []
+
+    try:
+        if manifest is not None:
+            for category in categories:
+                manifest.start(category, start_time_ISO, end_time_ISO)
+        num_results, files = write_fan_out_window(start_time_ISO, end_time_ISO, categories, sumo, page_concurrency,
+                                                  sinks, manifest, finished)
+        return {'query': query,
+                'start': str(start_time_ISO),
+                'end': str(end_time_ISO),
+                'endpoint': sumo.endpoint,
+                'num_results': num_results,
+                'categories': len(categories),
+                'categories_with_results': files,
+                'status': 'SUCCESS',
+                'line_number': None,
+                'exception': None}
+    except Exception as e:
+        _, _, tb = sys.exc_info()
+        lineno = tb.tb_lineno
+        if manifest is not None:
+            # the halves of a split group that did finish stay done
+            for category in categories:
+                if category not in finished:
+                    manifest.fail(category, start_time_ISO, end_time_ISO, e)
+        return {'query': query,
+                'start': str(start_time_ISO),
+                'end': str(end_time_ISO),
+                'endpoint': sumo.endpoint,
+                'num_results': None,
+                'categories': len(categories),
+                'categories_done': len(finished),
+                'status': 'FAIL',
+                'line_number': lineno,
+                'exception': str(e)}
+
+
 def read_text_file(file_path_string: str) -> list:
     file_path = pathlib.Path(file_path_string)
     with open(file_path, 'r') as f:
@@ -123,36 +324,148 @@ def process_arguments():
     parser.add_argument('-endDate', required=True, help='The end date YYYY-MM-DD')
     parser.add_argument('-increment', required=True, help='The time increment, in hours')
     parser.add_argument('-categoryFile', required=True, help='File that contains a list of source categories, one per line.')
+    parser.add_argument('-pageConcurrency', required=False, type=int, default=1, help='Result pages to download at once for each search job. Default 1')
+    parser.add_argument('-incremental', action='store_true', help='Download result pages while each search job is still running instead of waiting for it to finish')
+    parser.add_argument('-adaptive', action='store_true', help='Size the search windows automatically: -increment is only the starting size, busy windows are split so no results are lost and quiet ones are merged')
+    parser.add_argument('-compression', required=False, choices=COMPRESSIONS, default='none', help='Compress the result files. zstd needs the zstandard package. Default none')
+    parser.add_argument('-compressionLevel', required=False, type=int, help='gzip (1-9) or zstd (1-22) compression level. Defaults to 6 for gzip and 3 for zstd')
+    parser.add_argument('-outputFormat', required=False, choices=FORMATS, default='raw', help='raw writes the _raw log lines, ndjson writes every message with all its fields as a JSON line. Default raw')
+    parser.add_argument('-manifest', required=False, default=DEFAULT_MANIFEST, help=f'SQLite file that records which chunks have been downloaded. Default {DEFAULT_MANIFEST}')
+    parser.add_argument('-resume', action='store_true', help='Skip the chunks the manifest records as done and whose files are still there with the size they were written with, and download only the rest')
+    parser.add_argument('-verify', action='store_true', help='With -resume, also read every finished file back and check it against its sha256. Slow for large downloads')
+    parser.add_argument('-fanOut', required=False, type=int, default=0, help='Search up to this many categories with one combined query per window and split the results into the usual per-category files. Fewer, larger search jobs, a window with more results than one search job can hold is split between smaller groups. Not used with -adaptive or -incremental. Default 0 (one search job per category)')
+    parser.add_argument('-newestFirst', action='store_true', help='Download the most recent windows first instead of the oldest. Not used with -adaptive, whose windows are found from the start time onwards')
+    parser.add_argument('-metricsFile', required=False, help='Write API metrics to this file when the run ends. Prometheus textfile format, or JSON if the name ends in .json')
     args = parser.parse_args()
+    if args.fanOut > 1 and args.incremental:
+        # a fan-out job has to finish before it is known whether it has to be split
+        parser.error('-fanOut can not be combined with -incremental')
+    if args.newestFirst and args.adaptive:
+        # adaptive windows are only known once the one before them has been searched
+        parser.error('-newestFirst can not be combined with -adaptive')
     return args
 
 
-def parallel_runner(category_list, start_time, end_time, time_delta, api_key, api_secret, endpoint):
+def log_results(results, sumo):
+    # results are logged as they come in. Worker threads never see Ctrl-C, so on an interrupt the search jobs
+    # they have running are deleted here; otherwise they would keep counting against the org's search job
+    # limit until they time out.
+    completed = 0
+    failed = 0
+    try:
+        for result in results:
+            completed = completed + 1
+            if result['status'] != 'SUCCESS':
+                failed = failed + 1
+            logger.info(json.dumps(result))
+    except KeyboardInterrupt:
+        logger.warning(f'Interrupted after {completed} tasks, deleting running search jobs. {sumo.search_jobs.stats()}')
+        # stops the work queue, so nothing new is started
+        results.close()
+        sumo.search_jobs.shutdown()
+        raise
+    logger.info(f'Finished {completed} tasks, {failed} failed. Search jobs: {sumo.search_jobs.stats()}')
+
+
+def iter_chunks(category_list, start_time, end_time, time_delta, newest_first=False):
+    # every (category, window start, window end), generated as they are needed. The windows are the same
+    # either way round, so a manifest from one order can be used to resume in the other.
+    windows = math.ceil((end_time - start_time) / time_delta)
+    indexes = reversed(range(windows)) if newest_first else range(windows)
+    for index in indexes:
+        window_start = start_time + index * time_delta
+        for category in category_list:
+            yield category, window_start, window_start + time_delta
+
+
+def parallel_runner(category_list, start_time, end_time, time_delta, sumo, page_concurrency=1, incremental=False,
+                    sinks=None, manifest=None, resume=False, newest_first=False, fan_out=0):
+
+    if fan_out > 1:
+        fan_out_runner(category_list, start_time, end_time, time_delta, sumo, page_concurrency, sinks, manifest,
+                       resume, newest_first, fan_out)
+        return
+
+    def tasks():
+        for category, window_start, window_end in iter_chunks(category_list, start_time, end_time, time_delta,
+                                                              newest_first):
+            if resume and manifest.is_done(category, window_start.isoformat(), window_end.isoformat(), verify=True):
+                logger.info(f'Skipping {category} starting at {window_start}, already downloaded')
+                continue
+            logger.info(f'Submitting search job for {category} starting at {window_start} ending at {window_end}')
+            yield (window_start,
+                   window_end,
+                   category,
+                   sumo,
+                   page_concurrency,
+                   incremental,
+                   sinks,
+                   manifest)
+
+    # only a couple of tasks per worker are queued at a time, the rest are generated as workers free up
+    log_results(run_bounded(download_and_write, tasks(), MAX_WORKERS), sumo)
+
+
+def fan_out_runner(category_list, start_time, end_time, time_delta, sumo, page_concurrency=1, sinks=None,
+                   manifest=None, resume=False, newest_first=False, fan_out=50):
+    # one search job per window for every fan_out categories, instead of one per category
+    groups = [category_list[i:i + fan_out] for i in range(0, len(category_list), fan_out)]
+
+    def tasks():
+        for group, window_start, window_end in iter_chunks(groups, start_time, end_time, time_delta, newest_first):
+            categories = group
+            if resume:
+                categories = [category for category in group
+                              if not manifest.is_done(category, window_start.isoformat(), window_end.isoformat(),
+                                                      verify=True)]
+                if not categories:
+                    logger.info(f'Skipping {len(group)} categories starting at {window_start}, already downloaded')
+                    continue
+            logger.info(f'Submitting search job for {len(categories)} categories starting at {window_start} ending at {window_end}')
+            yield (window_start,
+                   window_end,
+                   categories,
+                   sumo,
+                   page_concurrency,
+                   sinks,
+                   manifest)
+
+    log_results(run_bounded(fan_out_download_and_write, tasks(), MAX_WORKERS), sumo)
+
+
+def adaptive_runner(category_list, start_time, end_time, time_delta, sumo, page_concurrency=1, sinks=None,
+                    manifest=None, resume=False):
+    # one task per category instead of per window: the planner starts with -increment sized windows, splits
+    # any that would overflow a search job and grows them through quiet stretches
+    planner = SearchPlanner(sumo, initial_window=time_delta, max_window=max(time_delta, datetime.timedelta(days=1)))
+
+    def tasks():
+        for category in category_list:
+            category_start_time = start_time
+            if resume:
+                # the windows aren't known in advance, carry on from the end of the last one in a row that finished
+                done_until = manifest.done_until(category, start_time.isoformat(), verify=True)
+                category_start_time = datetime.datetime.fromisoformat(done_until)
+                if category_start_time >= end_time:
+                    logger.info(f'Skipping {category}, already downloaded')
+                    continue
+            logger.info(f'Submitting adaptive search for {category} starting at {category_start_time} ending at {end_time}')
+            yield (category_start_time,
+                   end_time,
+                   category,
+                   sumo,
+                   planner,
+                   page_concurrency,
+                   sinks,
+                   manifest)
+
+    log_results(run_bounded(adaptive_download_and_write, tasks(), MAX_WORKERS), sumo)
 
-    threads = []
-    # The max workers is set to 10 because the Sumo API rate limits with more than 10 concurrent connections
-    current_start_time = start_time
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        while end_time > current_start_time:
-            for category in category_list:
-                logger.info(f'Submitting search job for {category} starting at {current_start_time} ending at {current_start_time + time_delta}')
-                threads.append(executor.submit(
-                    download_and_write,
-                    current_start_time,
-                    current_start_time + time_delta,
-                    category,
-                    api_key,
-                    api_secret,
-                    endpoint
-                    ))
-            current_start_time = current_start_time + time_delta
-    for thread in as_completed(threads):
-        logger.info(json.dumps(thread.result()))
 
 # This function isn't called but I left it in for troubleshooting and educational purposes
-def serial_runner(category_list, start_time, end_time, time_delta, api_key, api_secret, endpoint):
+def serial_runner(category_list, start_time, end_time, time_delta, sumo, page_concurrency=1, incremental=False,
+                  sinks=None, manifest=None):
 
-    # The max workers is set to 10 because the Sumo API rate limits with more than 10 concurrent connections
     current_start_time = start_time
     while end_time > current_start_time:
         for category in category_list:
@@ -161,9 +474,11 @@ def serial_runner(category_list, start_time, end_time, time_delta, api_key, api_
                 current_start_time,
                 current_start_time + time_delta,
                 category,
-                api_key,
-                api_secret,
-                endpoint
+                sumo,
+                page_concurrency,
+                incremental,
+                sinks,
+                manifest
                 )
             logger.info(result)
         current_start_time = current_start_time + time_delta
@@ -177,20 +492,57 @@ def main():
     start_time = datetime.datetime.strptime(arguments.startDate, '%Y-%m-%d').replace(hour=0, minute=0, second=0, microsecond=0)
     end_time = datetime.datetime.strptime(arguments.endDate, '%Y-%m-%d').replace(hour=0, minute=0, second=0, microsecond=0)
     time_delta = datetime.timedelta(hours=int(arguments.increment))
-    parallel_runner(source_categories,
-                    start_time,
-                    end_time,
-                    time_delta,
-                    str(arguments.key),
-                    str(arguments.secret),
-                    endpoint_lookup(str(arguments.deployment)))
+    metrics = MetricsCollector(labels={'script': 'bulk_download_data'}) if arguments.metricsFile else None
+    # one thread-safe SDK instance serves every worker, with a connection pool sized to match
+    sumo = SumoLogic(str(arguments.key),
+                     str(arguments.secret),
+                     endpoint=endpoint_lookup(str(arguments.deployment)),
+                     metrics=metrics,
+                     pool_maxsize=MAX_WORKERS * arguments.pageConcurrency,
+                     # the workers' search jobs are all polled from one thread instead of one loop each
+                     job_poller=JobPoller())
+    # compression and writing happen on a thread per file, overlapping with the downloads
+    sinks = SinkFactory(compression=arguments.compression,
+                        format=arguments.outputFormat,
+                        level=arguments.compressionLevel)
+    manifest = Manifest(arguments.manifest, checksum=arguments.verify)
+    if arguments.adaptive:
+        adaptive_runner(source_categories,
+                        start_time,
+                        end_time,
+                        time_delta,
+                        sumo,
+                        arguments.pageConcurrency,
+                        sinks,
+                        manifest,
+                        arguments.resume)
+    else:
+        parallel_runner(source_categories,
+                        start_time,
+                        end_time,
+                        time_delta,
+                        sumo,
+                        arguments.pageConcurrency,
+                        arguments.incremental,
+                        sinks,
+                        manifest,
+                        arguments.resume,
+                        arguments.newestFirst,
+                        arguments.fanOut)
     # serial_runner(source_categories,
     #                 start_time,
     #                 end_time,
     #                 time_delta,
-    #                 str(arguments.key),
-    #                 str(arguments.secret),
-    #                 endpoint_lookup(str(arguments.deployment)))
+    #                 sumo,
+    #                 arguments.pageConcurrency,
+    #                 arguments.incremental,
+    #                 sinks,
+    #                 manifest)
+    logger.info(f'Manifest {arguments.manifest}: {manifest.stats()}')
+    manifest.close()
+    if metrics:
+        metrics.write(arguments.metricsFile)
+        logger.info(f'Wrote API metrics to {arguments.metricsFile}')
 
 
 if __name__ == "__main__":
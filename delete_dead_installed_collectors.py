@@ -33,7 +33,7 @@ min_collector_dead_time_milliseconds = min_collector_dead_time_hours * 60 * 60 *
 current_time_milliseconds = int(time() * 1000)
 
 sumo_org = SumoLogic(key, secret, endpoint=endpoint)
-collectors = sumo_org.get_collectors_sync()
+collectors = sumo_org.get_collectors_sync(concurrency=4)
 for collector in collectors:
     timedelta = int(current_time_milliseconds) - int(collector['lastSeenAlive'])
 
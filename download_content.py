@@ -25,33 +25,11 @@
 
 import json
 from modules.sumologic import SumoLogic
+from modules.endpoints import endpoint_lookup
 import argparse
 
 
 
-# lookup the API endpoint URL using the Sumo deployment name
-def endpoint_lookup(deployment):
-    # there are duplicates here because most deployments have 2 names
-    endpoints = {'prod': 'https://api.sumologic.com/api',
-                 'us1': 'https://api.sumologic.com/api',
-                 'us2': 'https://api.us2.sumologic.com/api',
-                 'eu': 'https://api.eu.sumologic.com/api',
-                 'dub': 'https://api.eu.sumologic.com/api',
-                 'ca': 'https://api.ca.sumologic.com/api',
-                 'mon': 'https://api.ca.sumologic.com/api',
-                 'de': 'https://api.de.sumologic.com/api',
-                 'fra': 'https://api.de.sumologic.com/api',
-                 'au': 'https://api.au.sumologic.com/api',
-                 'syd': 'https://api.au.sumologic.com/api',
-                 'jp': 'https://api.jp.sumologic.com/api',
-                 'tky': 'https://api.jp.sumologic.com/api',
-                 'in': 'https://api.in.sumologic.com/api',
-                 'mum': 'https://api.in.sumologic.com/api',
-                 'fed': 'https://api.fed.sumologic.com/api',
-                 }
-    return endpoints[str(deployment).lower()]
-
-
 def process_arguments():
     parser = argparse.ArgumentParser(description='Download the contents of a Sumo Logic folder.')
     parser.add_argument('-key', required=True, help='The API key for the org')
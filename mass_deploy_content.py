@@ -25,6 +25,9 @@ import csv
 import sys
 import pathlib
 from modules.sumologic import SumoLogic
+from modules.endpoints import endpoint_lookup as endpoint
+from modules.metrics import MetricsCollector
+from modules.poller import get_job_poller
 from logzero import logger
 from typing import Union
 from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, as_completed
@@ -33,34 +36,14 @@ import argparse
 from urllib.parse import quote
 
 
-def endpoint(deployment):
-    # there are duplicates here because most deployments have 2 names
-    endpoints = {'prod': 'https://api.sumologic.com/api',
-                 'us1': 'https://api.sumologic.com/api',
-                 'us2': 'https://api.us2.sumologic.com/api',
-                 'eu': 'https://api.eu.sumologic.com/api',
-                 'dub': 'https://api.eu.sumologic.com/api',
-                 'ca': 'https://api.ca.sumologic.com/api',
-                 'mon': 'https://api.ca.sumologic.com/api',
-                 'de': 'https://api.de.sumologic.com/api',
-                 'fra': 'https://api.de.sumologic.com/api',
-                 'au': 'https://api.au.sumologic.com/api',
-                 'syd': 'https://api.au.sumologic.com/api',
-                 'jp': 'https://api.jp.sumologic.com/api',
-                 'tky': 'https://api.jp.sumologic.com/api',
-                 'in': 'https://api.in.sumologic.com/api',
-                 'mum': 'https://api.in.sumologic.com/api',
-                 'fed': 'https://api.fed.sumologic.com/api',
-                 }
-    return endpoints[str(deployment).lower()]
-
-
 def export_content(key: str,
                    secret: str,
                    endpoint: str,
-                   path_to_content: str) -> Union[dict, bool]:
+                   path_to_content: str,
+                   metrics: MetricsCollector = None) -> Union[dict, bool]:
     try:
-        sumo = SumoLogic(key, secret, endpoint=endpoint)
+        # every worker's export job is polled from the one shared poller thread
+        sumo = SumoLogic(key, secret, endpoint=endpoint, metrics=metrics, job_poller=get_job_poller())
         content_item = sumo.get_content_by_path(path_to_content)
         content_item_name = content_item['name']
         content_item_id = content_item['id']
@@ -80,9 +63,10 @@ def import_and_share_content(org_name: str,
                              secret: str,
                              api_endpoint: str,
                              destination_folder: str,
-                             content: dict) -> Union[dict, bool]:
+                             content: dict,
+                             metrics: MetricsCollector = None) -> Union[dict, bool]:
     try:
-        sumo = SumoLogic(key, secret, endpoint=api_endpoint)
+        sumo = SumoLogic(key, secret, endpoint=api_endpoint, metrics=metrics, job_poller=get_job_poller())
         destination_folder_item = sumo.get_content_by_path(destination_folder)
         destination_folder_name = destination_folder_item['name']
         destination_folder_id = destination_folder_item['id']
@@ -141,11 +125,12 @@ def process_arguments():
     parser.add_argument('-sourcePath', required=True, help='The source path in Sumo (e.g. /Library/Users/user@example.com/contentFolder)')
     parser.add_argument('-destPath', required=True, help='The destination path for the content (e.g. /Library/Admin Recommended')
     parser.add_argument('-orgFile', required=True, help='The csv file that contains a list of orgs with this header: orgName,orgID,deployment,key,secret')
+    parser.add_argument('-metricsFile', required=False, help='Write API metrics to this file when the run ends. Prometheus textfile format, or JSON if the name ends in .json')
     args = parser.parse_args()
     return args
 
 
-def parallel_runner(org_list, destination_folder, content):
+def parallel_runner(org_list, destination_folder, content, metrics=None):
 
     threads = []
     # The max workers is set to 10 because the Sumo API rate limits with more than 10 concurrent connections
@@ -160,14 +145,15 @@ def parallel_runner(org_list, destination_folder, content):
                 org['secret'],
                 endpoint(org['deployment']),
                 destination_folder,
-                content))
+                content,
+                metrics))
         #wait(threads, timeout=None, return_when=ALL_COMPLETED)
         for thread in as_completed(threads):
             logger.info(thread.result())
 
 
 # This was for testing. Left in for posterity.
-def serial_runner(org_list, destination_folder, content):
+def serial_runner(org_list, destination_folder, content, metrics=None):
 
     for org in org_list:
         logger.info('Deploying content to  {}'.format(org['orgName']))
@@ -177,7 +163,8 @@ def serial_runner(org_list, destination_folder, content):
                                           org['secret'],
                                           endpoint(org['deployment']),
                                           destination_folder,
-                                          content)
+                                          content,
+                                          metrics)
         logger.info(json.dumps(result, indent=4))
 
 
@@ -186,9 +173,13 @@ def main():
     logzero.logfile('mass_deploy_content.log')
     arguments = process_arguments()
     org_list = read_org_list_csv(arguments.orgFile)
-    content = export_content(arguments.key, arguments.secret, endpoint(arguments.deployment), arguments.sourcePath)
-    #serial_runner(org_list, arguments.destPath, content)
-    parallel_runner(org_list, arguments.destPath, content)
+    metrics = MetricsCollector(labels={'script': 'mass_deploy_content'}) if arguments.metricsFile else None
+    content = export_content(arguments.key, arguments.secret, endpoint(arguments.deployment), arguments.sourcePath, metrics)
+    #serial_runner(org_list, arguments.destPath, content, metrics)
+    parallel_runner(org_list, arguments.destPath, content, metrics)
+    if metrics:
+        metrics.write(arguments.metricsFile)
+        logger.info('Wrote API metrics to {}'.format(arguments.metricsFile))
 
 
 if __name__ == "__main__":
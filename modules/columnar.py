@@ -0,0 +1,229 @@
+import os
+from logzero import logger
+from .pagination import iter_offset_pages
+from .polling import SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED
+from .sumologic import SearchJobError
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+# column kinds, from the fieldType /records declares for each field
+FIELD_TYPES = {'int': 'int',
+               'long': 'int',
+               'double': 'float',
+               'boolean': 'bool',
+               'string': 'string'}
+# declared as long, but they are epoch milliseconds
+TIMESTAMP_FIELDS = ('_timeslice', '_messagetime', '_receipttime')
+# what a column becomes when a page doesn't parse as its current kind
+FALLBACK_KINDS = {'int': 'float', 'float': 'string', 'bool': 'string', 'timestamp': 'string'}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Columnar record export requires numpy (pip install numpy)")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Arrow and Parquet output require pyarrow (pip install pyarrow)")
+
+
+def _field_kind(field):
+    if field['name'] in TIMESTAMP_FIELDS or field.get('fieldType') == 'timestamp':
+        return 'timestamp'
+    return FIELD_TYPES.get(field.get('fieldType'), 'string')
+
+
+def _parse(raw, missing, kind):
+    # raw is a str array of the values from one page, raises ValueError (or OverflowError for an integer
+    # that doesn't fit in int64) if they aren't all of kind
+    if kind == 'string':
+        return np.where(missing, None, raw.astype(object))
+    # missing cells get a placeholder that parses as kind, they are masked as nulls later
+    text = np.where(missing, 'false' if kind == 'bool' else '0', raw)
+    if kind == 'bool':
+        lowered = np.char.lower(text)
+        if not np.isin(lowered, ('true', 'false')).all():
+            raise ValueError("not a boolean")
+        return lowered == 'true'
+    if kind == 'float':
+        return text.astype(np.float64)
+    values = text.astype(np.int64)
+    if kind == 'timestamp':
+        return values.astype('datetime64[ms]')
+    return values
+
+
+class RecordColumns(object):
+    """
+    Builds typed columns from search job records (aggregate results) a page at a time.
+
+    /records returns every value as a string in a dict per row, which is slow and large to turn into a
+    dataframe. Here each page is split into one array per field as it arrives and parsed in one vectorized
+    step per column, so only the typed arrays are kept. Column types come from the fieldType /records
+    declares: int and long become int64, double float64, boolean bool, and _timeslice, _messagetime and
+    _receipttime millisecond timestamps. Fields declared as string (e.g. the group by fields of a parse)
+    are parsed as int64 or float64 when infer is true and every value fits. A page that doesn't parse
+    moves its column to the next wider type (int, float, string) and the earlier pages are parsed again
+    from their original text, so a column that ends up as strings has exactly what /records returned. That
+    means the text is kept alongside the parsed values until a column is a string column.
+    Empty or missing values are nulls.
+    """
+
+    def __init__(self, fields=None, infer=True):
+        _require_numpy()
+        self.infer = infer
+        self.fields = None
+        self.kinds = {}
+        self._chunks = {}
+        self.count = 0
+        if fields is not None:
+            self._set_fields(fields)
+
+    def _set_fields(self, fields):
+        self.fields = [field['name'] for field in fields]
+        for field in fields:
+            kind = _field_kind(field)
+            if kind == 'string' and self.infer:
+                kind = 'int'
+            self.kinds[field['name']] = kind
+            self._chunks[field['name']] = []
+
+    def add_page(self, records, fields=None):
+        """Add a page of records, fields is the page's fields list and is only needed for the first one."""
+        if self.fields is None:
+            if fields is None:
+                raise ValueError("The fields of the records are not known yet")
+            self._set_fields(fields)
+        if not records:
+            return
+        maps = [record['map'] for record in records]
+        for name in self.fields:
+            raw = np.array([values.get(name) or '' for values in maps], dtype=str)
+            missing = raw == ''
+            self._add_chunk(name, raw, missing)
+        self.count += len(records)
+
+    def _add_chunk(self, name, raw, missing):
+        kind = self.kinds[name]
+        while True:
+            try:
+                values = _parse(raw, missing, kind)
+                break
+            except (ValueError, OverflowError):
+                kind = FALLBACK_KINDS[kind]
+        if kind != self.kinds[name]:
+            if self._chunks[name]:
+                logger.debug("Column {0} changed from {1} to {2}".format(name, self.kinds[name], kind))
+            self.kinds[name] = kind
+            # every kind parses whatever the kinds before it in FALLBACK_KINDS did
+            self._chunks[name] = [(_parse(chunk_raw, chunk_missing, kind), chunk_missing, chunk_raw)
+                                  for _, chunk_missing, chunk_raw in self._chunks[name]]
+        if kind == 'string':
+            # a string column can't change again, so the text isn't needed twice
+            self._chunks[name] = [(chunk, chunk_missing, None) for chunk, chunk_missing, _ in self._chunks[name]]
+            raw = None
+        self._chunks[name].append((values, missing, raw))
+
+    def _column(self, name):
+        chunks = self._chunks[name]
+        if not chunks:
+            return np.array([], dtype=object), np.array([], dtype=bool)
+        return (np.concatenate([values for values, _, _ in chunks]),
+                np.concatenate([missing for _, missing, _ in chunks]))
+
+    def to_numpy(self):
+        """
+        Return the records as a NumPy structured array. Missing values are NaN in float columns and NaT in
+        timestamp columns, and int and bool columns that have any become float64 and object respectively.
+        """
+        columns = []
+        for name in self.fields or []:
+            values, missing = self._column(name)
+            if missing.any():
+                kind = self.kinds[name]
+                if kind == 'int':
+                    values = values.astype(np.float64)
+                if kind in ('int', 'float'):
+                    values[missing] = np.nan
+                elif kind == 'timestamp':
+                    values[missing] = np.datetime64('NaT')
+                elif kind == 'bool':
+                    values = np.where(missing, None, values)
+            columns.append((name, values))
+        array = np.empty(self.count, dtype=[(name, values.dtype) for name, values in columns])
+        for name, values in columns:
+            array[name] = values
+        return array
+
+    def to_arrow(self):
+        """Return the records as a pyarrow Table, with one chunk per page and proper nulls."""
+        _require_pyarrow()
+        types = {'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(), 'timestamp': pa.timestamp('ms'),
+                 'string': pa.string()}
+        columns = []
+        for name in self.fields or []:
+            data_type = types[self.kinds[name]]
+            columns.append(pa.chunked_array([pa.array(values, type=data_type, mask=missing)
+                                             for values, missing, _ in self._chunks[name]], type=data_type))
+        return pa.table(columns, names=self.fields or [])
+
+    def write(self, path, format=None):
+        """
+        Write the records to path as Parquet (.parquet), Arrow IPC (.arrow or .feather) or a NumPy structured
+        array (.npy, string columns are pickled objects). format overrides the file extension.
+        """
+        format = format or os.path.splitext(str(path))[1].lstrip('.').lower()
+        if format == 'parquet':
+            pq.write_table(self.to_arrow(), str(path))
+        elif format in ('arrow', 'feather'):
+            feather.write_feather(self.to_arrow(), str(path))
+        elif format == 'npy':
+            np.save(str(path), self.to_numpy(), allow_pickle=True)
+        else:
+            raise ValueError("Unknown output format: {0}".format(format))
+
+
+def collect_search_job_records(sumo, search_job, total, limit=10000, concurrency=1, infer=True):
+    """
+    Download the records of a finished search job (total is its recordCount) into RecordColumns. With
+    concurrency > 1 that many pages are downloaded at once; they are still added in order.
+    """
+    columns = RecordColumns(infer=infer)
+
+    def fetch_page(offset):
+        return sumo.search_job_records(search_job, limit=limit, offset=offset)
+
+    for page in iter_offset_pages(fetch_page, limit, total=total, concurrency=concurrency):
+        columns.add_page(page['records'], page.get('fields'))
+    if columns.fields is None:
+        # a job without records still declares its fields
+        columns.add_page([], fetch_page(0).get('fields'))
+    return columns
+
+
+def export_search_records(sumo, query, fromTime, toTime, path, timeZone='UTC', byReceiptTime=False,
+                          format=None, limit=10000, concurrency=1, infer=True):
+    """
+    Run an aggregate query and write its records to path in a columnar format (see RecordColumns.write).
+    Returns the RecordColumns, so the data can be used in the same process without reading the file back.
+    """
+    with sumo.managed_search_job(query, fromTime=fromTime, toTime=toTime, timeZone=timeZone,
+                                 byReceiptTime=byReceiptTime) as search_job:
+        status = sumo.wait_for_search_job(search_job)
+        if status['state'] not in (SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED):
+            raise SearchJobError(search_job, status)
+        columns = collect_search_job_records(sumo, search_job, status['recordCount'], limit=limit,
+                                             concurrency=concurrency, infer=infer)
+    columns.write(path, format=format)
+    logger.info("Wrote {0} records to {1}".format(columns.count, path))
+    return columns
@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import requests
+from urllib.parse import urlparse
+from logzero import logger
+
+
+# there are duplicates here because most deployments have 2 names
+DEPLOYMENT_ENDPOINTS = {'prod': 'https://api.sumologic.com/api',
+                        'us1': 'https://api.sumologic.com/api',
+                        'us2': 'https://api.us2.sumologic.com/api',
+                        'eu': 'https://api.eu.sumologic.com/api',
+                        'dub': 'https://api.eu.sumologic.com/api',
+                        'ca': 'https://api.ca.sumologic.com/api',
+                        'mon': 'https://api.ca.sumologic.com/api',
+                        'de': 'https://api.de.sumologic.com/api',
+                        'fra': 'https://api.de.sumologic.com/api',
+                        'au': 'https://api.au.sumologic.com/api',
+                        'syd': 'https://api.au.sumologic.com/api',
+                        'jp': 'https://api.jp.sumologic.com/api',
+                        'tky': 'https://api.jp.sumologic.com/api',
+                        'in': 'https://api.in.sumologic.com/api',
+                        'mum': 'https://api.in.sumologic.com/api',
+                        'fed': 'https://api.fed.sumologic.com/api',
+                        }
+
+DEFAULT_ENDPOINT = 'https://api.sumologic.com/api'
+# discovered endpoints are cached for a week; an org's deployment practically never changes
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+
+# lookup the API endpoint URL using the Sumo deployment name
+def endpoint_lookup(deployment):
+    return DEPLOYMENT_ENDPOINTS[str(deployment).lower()]
+
+
+def default_cache_file():
+    if os.environ.get('SUMOLOGIC_ENDPOINT_CACHE'):
+        return os.environ['SUMOLOGIC_ENDPOINT_CACHE']
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'sumologic', 'endpoints.json')
+
+
+def probe_endpoint(access_id, access_key, verify=True):
+    """
+    Ask the default endpoint which deployment the access ID belongs to. The default endpoint redirects
+    to the right one, so the final URL of the response tells us the endpoint. This is a network round trip.
+    A failed probe (bad credentials, server error, a redirect somewhere unexpected) raises instead of
+    returning the default endpoint, so that it never ends up in the cache.
+    """
+    response = requests.get(DEFAULT_ENDPOINT + '/v1/collectors', auth=(access_id, access_key), verify=verify)
+    return endpoint_from_probe(response, DEFAULT_ENDPOINT)
+
+
+def endpoint_from_probe(response, default_endpoint):
+    """
+    The endpoint from the final response of a probe of default_endpoint (requests.Response or anything with
+    its status_code, url and raise_for_status). The credentials are dropped when the probe is redirected to
+    another host, so a 401 from the org's deployment still tells us the endpoint; only a failure at the
+    default endpoint itself raises.
+    """
+    url = str(response.url)
+    if response.status_code != 401 or urlparse(url).netloc == urlparse(default_endpoint).netloc:
+        response.raise_for_status()
+    return endpoint_from_probe_url(url)
+
+
+def endpoint_from_probe_url(url):
+    # the final URL of the probe is the org's endpoint + /v1/collectors
+    endpoint, separator, _ = str(url).partition('/v1/collectors')
+    if not separator:
+        raise ValueError("Endpoint probe ended up at unexpected URL {0}".format(url))
+    return endpoint
+
+
+class EndpointResolver(object):
+    """
+    Resolves the API endpoint for an access ID, remembering the answer in a JSON file so that only the
+    first run on a machine (and one run per ttl after that) pays for the probe request. The cache file
+    defaults to ~/.cache/sumologic/endpoints.json and can be moved with SUMOLOGIC_ENDPOINT_CACHE.
+    Pass cache_file=False for an in-memory cache only.
+    """
+
+    def __init__(self, cache_file=None, ttl=DEFAULT_TTL):
+        self.cache_file = default_cache_file() if cache_file is None else cache_file
+        self.ttl = ttl
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            if self.cache_file and os.path.exists(self.cache_file):
+                try:
+                    with open(self.cache_file, 'r') as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning("Ignoring unreadable endpoint cache {0}: {1}".format(self.cache_file, e))
+        return self._entries
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        temp_path = None
+        try:
+            directory = os.path.dirname(os.path.abspath(self.cache_file))
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.endpoints-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._entries, f, indent=4)
+            os.replace(temp_path, self.cache_file)
+            temp_path = None
+        except (OSError, TypeError, ValueError) as e:
+            # the cache is an optimisation, never a reason to fail
+            logger.warning("Could not write endpoint cache {0}: {1}".format(self.cache_file, e))
+        finally:
+            # only set if the temporary file wasn't renamed into place
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def get(self, access_id):
+        with self._lock:
+            entry = self._load().get(str(access_id))
+        if entry and time.time() - entry['resolved'] < self.ttl:
+            return entry['endpoint']
+        return None
+
+    def set(self, access_id, endpoint):
+        with self._lock:
+            self._load()[str(access_id)] = {'endpoint': endpoint, 'resolved': time.time()}
+            self._save()
+
+    def invalidate(self, access_id):
+        with self._lock:
+            if self._load().pop(str(access_id), None) is not None:
+                self._save()
+
+    def resolve(self, access_id, probe):
+        """Return the cached endpoint for access_id, calling probe() and caching its answer on a miss."""
+        endpoint = self.get(access_id)
+        if endpoint is None:
+            endpoint = probe()
+            self.set(access_id, endpoint)
+        else:
+            logger.debug("Using cached endpoint %s for %s", endpoint, access_id)
+        return endpoint
+
+
+_default_resolver = None
+_default_resolver_lock = threading.Lock()
+
+
+def get_endpoint_resolver():
+    global _default_resolver
+    with _default_resolver_lock:
+        if _default_resolver is None:
+            _default_resolver = EndpointResolver()
+        return _default_resolver
@@ -0,0 +1,80 @@
+import re
+import time
+from functools import lru_cache
+from logzero import logger
+
+
+class RequestEvent(object):
+    """
+    Describes one HTTP attempt made by a client. The same object is passed to on_request, on_response
+    and (when the attempt failed and will be retried) on_retry, filling in more fields as it goes.
+    """
+    __slots__ = ('method', 'path', 'path_template', 'status', 'bytes', 'latency', 'attempt', 'delay',
+                 'exception', 'start')
+
+    def __init__(self, method, path, attempt=1):
+        self.method = method
+        self.path = path
+        self.path_template = path_template(path)
+        self.status = None
+        self.bytes = 0
+        self.latency = None
+        self.attempt = attempt
+        self.delay = None
+        self.exception = None
+        self.start = time.perf_counter()
+
+    def __repr__(self):
+        return '<RequestEvent {0} {1} status={2} bytes={3} latency={4}>'.format(
+            self.method, self.path_template, self.status, self.bytes, self.latency)
+
+
+class RequestHooks(object):
+    """
+    Base class for instrumentation hooks. Subclass it, override the methods you care about and pass
+    the instance to a client with hooks=[...] or client.add_hook(). Hooks are called on the thread
+    making the request, so they must be thread-safe and quick.
+    """
+
+    def on_request(self, event):
+        pass
+
+    def on_response(self, event):
+        # called after every attempt, including failed ones; event.exception is set if no response
+        # was received
+        pass
+
+    def on_retry(self, event):
+        # called before the client sleeps event.delay seconds and retries the request
+        pass
+
+
+def dispatch(hooks, name, event):
+    # A broken hook should never break an API call
+    for hook in hooks:
+        try:
+            getattr(hook, name)(event)
+        except Exception as e:
+            logger.warning("Request hook {0}.{1} failed: {2}".format(type(hook).__name__, name, e))
+
+
+# A path segment that contains a digit and is at least 6 characters long (hex IDs, search job IDs, UUIDs)
+# or is purely numeric is treated as an identifier.
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[0-9A-Za-z_\-]{6,}$|^\d+$')
+# segments following these are free-form names rather than identifiers
+_NAME_PARENTS = {'name'}
+
+
+@lru_cache(maxsize=2048)
+def path_template(path):
+    """
+    Collapse the identifiers in an API path so calls can be grouped by endpoint, e.g.
+    /v1/search/jobs/1A2B3C4D5E6F7A8B/messages -> /v1/search/jobs/{id}/messages
+    """
+    segments = path.split('?')[0].split('/')
+    for i in range(1, len(segments)):
+        if segments[i - 1] in _NAME_PARENTS and segments[i]:
+            segments[i] = '{name}'
+        elif _ID_SEGMENT.match(segments[i]):
+            segments[i] = '{id}'
+    return '/'.join(segments)
@@ -0,0 +1,135 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import requests
+from requests.structures import CaseInsensitiveDict
+from logzero import logger
+
+
+# search job results change while the job runs and are never fetched twice, so they are not worth caching
+UNCACHEABLE_PREFIXES = ('/v1/search/jobs',)
+# request headers that change the response, so they are part of the cache key
+VARYING_HEADERS = ('accept', 'isadminmode')
+
+
+class ResponseCache(object):
+    """
+    LRU cache of GET responses that carry an ETag or Last-Modified header. A client with a cache sends
+    If-None-Match/If-Modified-Since for URLs it has seen before and serves a 304 from the cached body, so
+    repeated crawls of collectors, sources, monitors and content only move the bytes that changed.
+
+    Entries live in memory (max_entries, least recently used evicted first) and, if cache_dir is given,
+    on disk as well so the next run starts warm. Entries are keyed by the caller's identity (the access ID)
+    as well as the URL, so one cache can be shared by clients for several orgs without leaking responses.
+    """
+
+    def __init__(self, max_entries=1024, max_entry_bytes=10 * 1024 * 1024, cache_dir=None):
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cacheable(method):
+        return not method.startswith(UNCACHEABLE_PREFIXES)
+
+    @staticmethod
+    def key(identity, url, params=None, headers=None):
+        varying = sorted((k.lower(), str(v)) for k, v in (headers or {}).items() if k.lower() in VARYING_HEADERS)
+        query = sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+        raw = json.dumps([str(identity), url, query, varying])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.cache_dir:
+            try:
+                with open(self._path(key), 'r') as f:
+                    entry = json.load(f)
+                entry['content'] = base64.b64decode(entry['content'])
+                os.utime(self._path(key))
+            except (OSError, ValueError, KeyError):
+                return None
+            self._remember(key, entry)
+            return entry
+        return None
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def store(self, key, response):
+        etag = response.headers.get('etag')
+        last_modified = response.headers.get('last-modified')
+        if response.status_code != 200 or not (etag or last_modified) or len(response.content) > self.max_entry_bytes:
+            return
+        entry = {'url': response.url,
+                 'headers': dict(response.headers),
+                 'encoding': response.encoding,
+                 'content': response.content}
+        self._remember(key, entry)
+        if self.cache_dir:
+            self._write(key, entry)
+
+    def _write(self, key, entry):
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.entry-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({**entry, 'content': base64.b64encode(entry['content']).decode('ascii')}, f)
+            os.replace(temp_path, self._path(key))
+            self._evict_disk()
+        except OSError as e:
+            logger.warning("Could not write response cache entry: {0}".format(e))
+
+    def _evict_disk(self):
+        files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.json')]
+        if len(files) <= self.max_entries:
+            return
+        # entries are touched when read, so the oldest mtime is the least recently used
+        files.sort(key=lambda path: os.stat(path).st_mtime)
+        for path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def validators(entry):
+        headers = CaseInsensitiveDict(entry['headers'])
+        conditional = {}
+        if headers.get('etag'):
+            conditional['If-None-Match'] = headers['etag']
+        if headers.get('last-modified'):
+            conditional['If-Modified-Since'] = headers['last-modified']
+        return conditional
+
+    @staticmethod
+    def to_response(entry, not_modified=None):
+        # rebuild a 200 response from the cache; headers sent with the 304 (e.g. a new Date) take precedence
+        r = requests.Response()
+        r.status_code = 200
+        r.reason = 'OK'
+        r.url = entry['url']
+        r.encoding = entry['encoding']
+        r.headers = CaseInsensitiveDict(entry['headers'])
+        if not_modified is not None:
+            r.headers.update((k, v) for k, v in not_modified.headers.items() if k.lower() != 'content-length')
+        r._content = entry['content']
+        return r
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from logzero import logger
+
+
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest(object):
+    """
+    Durable record of the chunks (category and time window) of a bulk download, in a SQLite file.
+
+    Each chunk is marked running when its download starts and done, with its output path, message count,
+    file size and the sha256 of the file, once the file has been renamed into place; or failed, with the
+    error. Every change is committed straight away, so after a crash the manifest says exactly which chunks
+    finished and a resumed run only downloads the rest. Chunks still marked running were interrupted and
+    count as not done. With verify, a done chunk whose file is missing or has changed size doesn't count as
+    done either; with checksum the whole file is also read back and checked against its sha256, which for
+    a large download takes about as long as reading it all from disk. Safe to share between threads.
+    """
+
+    def __init__(self, path, checksum=False):
+        self.path = path
+        self.checksum = checksum
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._connection:
+            # WAL keeps the per-chunk commits cheap
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS chunks ('
+                                     'category TEXT NOT NULL, '
+                                     'start TEXT NOT NULL, '
+                                     'end TEXT NOT NULL, '
+                                     'status TEXT NOT NULL, '
+                                     'path TEXT, '
+                                     'count INTEGER, '
+                                     'sha256 TEXT, '
+                                     'size INTEGER, '
+                                     'attempts INTEGER NOT NULL DEFAULT 0, '
+                                     'error TEXT, '
+                                     'updated REAL NOT NULL, '
+                                     'PRIMARY KEY (category, start, end))')
+            columns = [row[1] for row in self._connection.execute('PRAGMA table_info(chunks)')]
+            if 'size' not in columns:
+                # manifests written before file sizes were recorded
+                self._connection.execute('ALTER TABLE chunks ADD COLUMN size INTEGER')
+
+    def _execute(self, sql, parameters=()):
+        with self._lock, self._connection:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def start(self, category, start, end):
+        # not an UPSERT, that needs SQLite 3.24 and older Pythons can come with older versions
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR IGNORE INTO chunks (category, start, end, status, updated) '
+                                     'VALUES (?, ?, ?, ?, ?)',
+                                     (category, start, end, STATUS_RUNNING, time.time()))
+            self._connection.execute('UPDATE chunks SET status = ?, attempts = attempts + 1, error = NULL, updated = ? '
+                                     'WHERE category = ? AND start = ? AND end = ?',
+                                     (STATUS_RUNNING, time.time(), category, start, end))
+
+    def complete(self, category, start, end, path, count, sha256):
+        # path and sha256 are None for a window without results, no file is written for those
+        size = os.path.getsize(path) if path is not None else None
+        self._execute('UPDATE chunks SET status = ?, path = ?, count = ?, sha256 = ?, size = ?, error = NULL, '
+                      'updated = ? WHERE category = ? AND start = ? AND end = ?',
+                      (STATUS_DONE, path, count, sha256, size, time.time(), category, start, end))
+
+    def fail(self, category, start, end, error):
+        self._execute('UPDATE chunks SET status = ?, error = ?, updated = ? WHERE category = ? AND start = ? AND end = ?',
+                      (STATUS_FAILED, str(error), time.time(), category, start, end))
+
+    def _file_intact(self, category, start, path, count, sha256, size):
+        # chunks without results have no file
+        if not count:
+            return True
+        if path is None or not os.path.exists(path):
+            logger.warning("{0} from {1}: {2} is missing, downloading it again".format(category, start, path))
+            return False
+        # size is unknown for chunks recorded before it was
+        if size is not None and os.path.getsize(path) != size:
+            logger.warning("{0} from {1}: {2} has changed size, downloading it again".format(category, start, path))
+            return False
+        if self.checksum and file_sha256(path) != sha256:
+            logger.warning("{0} from {1}: {2} doesn't match its checksum, downloading it again".format(
+                category, start, path))
+            return False
+        return True
+
+    def is_done(self, category, start, end, verify=False):
+        rows = self._execute('SELECT status, path, count, sha256, size FROM chunks '
+                             'WHERE category = ? AND start = ? AND end = ?',
+                             (category, start, end))
+        if not rows or rows[0][0] != STATUS_DONE:
+            return False
+        _, path, count, sha256, size = rows[0]
+        return not verify or self._file_intact(category, start, path, count, sha256, size)
+
+    def done_until(self, category, start, verify=False):
+        """
+        Follow the done chunks of category from start, each one starting where the previous one ended, and
+        return where the last one ends (start if there are none). Used to resume adaptive runs, whose
+        windows aren't known in advance.
+        """
+        chunks = {row[0]: row[1:] for row in self._execute('SELECT start, end, path, count, sha256, size FROM chunks '
+                                                           'WHERE category = ? AND status = ?',
+                                                           (category, STATUS_DONE))}
+        while start in chunks:
+            end, path, count, sha256, size = chunks[start]
+            if verify and not self._file_intact(category, start, path, count, sha256, size):
+                break
+            start = end
+        return start
+
+    def stats(self):
+        return dict(self._execute('SELECT status, COUNT(*) FROM chunks GROUP BY status'))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
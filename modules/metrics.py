@@ -0,0 +1,168 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from .hooks import RequestHooks
+
+
+# upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _EndpointStats(object):
+    __slots__ = ('bucket_counts', 'latency_sum', 'count', 'statuses', 'bytes', 'rate_limited', 'retries',
+                 'backoff_seconds', 'transport_errors')
+
+    def __init__(self, buckets):
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.count = 0
+        self.statuses = {}
+        self.bytes = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.transport_errors = 0
+
+
+class MetricsCollector(RequestHooks):
+    """
+    Collects per-endpoint request metrics from a client's hooks: a latency histogram, request counts by
+    status, response bytes, 429s, retries, time spent sleeping in backoff and transport errors. Endpoints
+    are keyed by HTTP method and path template (e.g. GET /v1/search/jobs/{id}/messages).
+
+    One collector can be shared by every client in a run. Call write() at the end of the run to save a
+    Prometheus textfile (for node_exporter's textfile collector) or a JSON summary.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, labels=None):
+        self.buckets = tuple(sorted(buckets))
+        self.labels = dict(labels or {})
+        self.started = time.time()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, event):
+        key = (event.method, event.path_template)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats.setdefault(key, _EndpointStats(self.buckets))
+        return stats
+
+    def on_response(self, event):
+        with self._lock:
+            stats = self._endpoint(event)
+            if event.status is None:
+                stats.transport_errors += 1
+                return
+            stats.count += 1
+            stats.latency_sum += event.latency
+            stats.bucket_counts[bisect_left(self.buckets, event.latency)] += 1
+            stats.statuses[event.status] = stats.statuses.get(event.status, 0) + 1
+            stats.bytes += event.bytes
+            if event.status == 429:
+                stats.rate_limited += 1
+
+    def on_retry(self, event):
+        with self._lock:
+            stats = self._endpoint(event)
+            stats.retries += 1
+            stats.backoff_seconds += event.delay
+
+    def summary(self):
+        with self._lock:
+            endpoints = []
+            for (method, path), stats in sorted(self._stats.items()):
+                endpoints.append({'method': method,
+                                  'path': path,
+                                  'requests': stats.count,
+                                  'statuses': {str(k): v for k, v in sorted(stats.statuses.items())},
+                                  'bytes': stats.bytes,
+                                  'latency_sum': stats.latency_sum,
+                                  'latency_avg': stats.latency_sum / stats.count if stats.count else None,
+                                  'latency_buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'],
+                                                              _cumulative(stats.bucket_counts))),
+                                  'rate_limited': stats.rate_limited,
+                                  'retries': stats.retries,
+                                  'backoff_seconds': stats.backoff_seconds,
+                                  'transport_errors': stats.transport_errors})
+        return {'labels': self.labels,
+                'started': self.started,
+                'duration': time.time() - self.started,
+                'endpoints': endpoints}
+
+    def to_prometheus(self):
+        summary = self.summary()
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append('# HELP {0} {1}'.format(name, help_text))
+            lines.append('# TYPE {0} {1}'.format(name, metric_type))
+            for suffix, labels, value in samples:
+                label_string = _format_labels({**self.labels, **labels})
+                if label_string:
+                    label_string = '{' + label_string + '}'
+                lines.append('{0}{1}{2} {3}'.format(name, suffix, label_string,
+                                                    repr(float(value)) if isinstance(value, float) else value))
+
+        def per_endpoint(field):
+            return [('', {'method': e['method'], 'path': e['path']}, e[field]) for e in summary['endpoints']]
+
+        histogram = []
+        for e in summary['endpoints']:
+            labels = {'method': e['method'], 'path': e['path']}
+            for le, count in e['latency_buckets'].items():
+                histogram.append(('_bucket', {**labels, 'le': le}, count))
+            histogram.append(('_sum', labels, e['latency_sum']))
+            histogram.append(('_count', labels, e['requests']))
+        metric('sumologic_api_request_duration_seconds', 'histogram', 'Latency of Sumo Logic API calls.', histogram)
+        metric('sumologic_api_requests_total', 'counter', 'Sumo Logic API responses by status code.',
+               [('', {'method': e['method'], 'path': e['path'], 'status': status}, count)
+                for e in summary['endpoints'] for status, count in e['statuses'].items()])
+        metric('sumologic_api_response_bytes_total', 'counter', 'Bytes received from the Sumo Logic API.',
+               per_endpoint('bytes'))
+        metric('sumologic_api_rate_limited_total', 'counter', 'Responses with status 429.', per_endpoint('rate_limited'))
+        metric('sumologic_api_retries_total', 'counter', 'Retried API calls.', per_endpoint('retries'))
+        metric('sumologic_api_backoff_seconds_total', 'counter', 'Time spent sleeping before retries.',
+               per_endpoint('backoff_seconds'))
+        metric('sumologic_api_transport_errors_total', 'counter', 'Calls that failed without a response.',
+               per_endpoint('transport_errors'))
+        metric('sumologic_run_duration_seconds', 'gauge', 'Time since the collector was created.',
+               [('', {}, summary['duration'])])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the metrics to path, as JSON if it ends in .json and as a Prometheus textfile otherwise."""
+        path = str(path)
+        if path.endswith('.json'):
+            content = json.dumps(self.summary(), indent=4)
+        else:
+            content = self.to_prometheus()
+        # write to a temp file and rename so a scraper never reads a half written file
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def _cumulative(counts):
+    total = 0
+    result = []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+def _format_labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join('{0}="{1}"'.format(k, escape(v)) for k, v in labels.items())
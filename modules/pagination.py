@@ -0,0 +1,245 @@
+# Generators behind the iter_* methods of the clients. Each one fetches a page only when the previous one
+# has been consumed, so a listing can be processed in constant memory however large it is. The Sumo Logic
+# APIs paginate in three ways:
+#   offset:   ?limit=&offset=, the last page is the first one shorter than limit (collectors, sources, monitors)
+#   has-next: ?limit=&offset=, the response says whether there is another page (Cloud SIEM)
+#   token:    ?limit=&token=, the response carries the token for the next page, None on the last one
+import asyncio
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+_DONE = object()
+
+
+def iter_offset_pages(fetch_page, limit, offset=0, concurrency=1, total=None, ordered=True):
+    # fetch_page(offset) -> list of items. If the total number of items is known (e.g. a finished search
+    # job's messageCount) pass it, and no request is made past the end.
+    if concurrency > 1 or not ordered:
+        yield from iter_offset_pages_parallel(fetch_page, limit, offset=offset, concurrency=concurrency,
+                                              total=total, ordered=ordered)
+        return
+    while total is None or offset < total:
+        page = fetch_page(offset)
+        yield page
+        if total is None and len(page) < limit:
+            return
+        offset = offset + limit
+
+
+def iter_offset_pages_parallel(fetch_page, limit, offset=0, concurrency=4, total=None, ordered=True):
+    """
+    Like iter_offset_pages, but keeps concurrency pages in flight at once. If total isn't given the pages
+    after the current one are fetched speculatively and everything past the first short page is discarded,
+    which costs at most concurrency - 1 wasted requests. With a known total only the pages that exist are
+    fetched, and ordered=False yields each page as soon as it arrives instead of in offset order.
+    fetch_page is called from worker threads, so it has to be thread safe (the clients are). Requests still
+    go through the client's rate limiter, so this only helps while the rate budget has room to spare.
+    When the generator is closed, requests that haven't started are cancelled and the ones already running
+    are waited for, so nothing is still fetching pages once it returns (e.g. before a search job is deleted).
+    """
+    if not ordered and total is None:
+        raise ValueError("Pages can only be delivered out of order when the total is known")
+    executor = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix='paginator')
+    pending = deque()
+
+    def submit():
+        nonlocal offset
+        if total is None or offset < total:
+            pending.append(executor.submit(fetch_page, offset))
+            offset = offset + limit
+
+    try:
+        for _ in range(max(concurrency, 1)):
+            submit()
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+            page = future.result()
+            yield page
+            if total is None and len(page) < limit:
+                return
+            submit()
+    finally:
+        # runs on a short page, an error or the caller abandoning the generator. cancel() only stops pages
+        # that haven't started, shutdown waits for the requests that are already running.
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def iter_has_next_pages(fetch_page, limit, offset=0):
+    # fetch_page(offset) -> (list of items, True if there is another page)
+    while True:
+        page, has_next = fetch_page(offset)
+        yield page
+        if not has_next:
+            return
+        offset = offset + limit
+
+
+def iter_token_pages(fetch_page, token='', prefetch=0):
+    # fetch_page(token) -> (list of items, token for the next page or None)
+    if prefetch > 0:
+        yield from read_ahead(iter_token_pages(fetch_page, token=token), depth=prefetch)
+        return
+    while True:
+        page, token = fetch_page(token)
+        yield page
+        if token is None:
+            return
+
+
+def iter_items(pages):
+    for page in pages:
+        yield from page
+
+
+def read_ahead(iterable, depth=1):
+    """
+    Iterate over iterable on a background thread, staying up to depth items ahead of the caller. Token
+    paginated APIs can't fetch pages in parallel because each page names the next one, but with this the
+    request for page N+1 is on the wire while the caller works on page N. The buffer is bounded, so a slow
+    caller never holds more than depth + 1 pages in memory. Exceptions are re-raised in the caller when it
+    reaches them, and the thread stops if the caller abandons the iterator.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((None, e))
+            return
+        put((_DONE, None))
+
+    worker = threading.Thread(target=produce, name='read-ahead', daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+# asyncio versions, fetch_page is a coroutine function
+
+async def aiter_offset_pages(fetch_page, limit, offset=0, concurrency=1, total=None, ordered=True):
+    if concurrency > 1 or not ordered:
+        async for page in aiter_offset_pages_parallel(fetch_page, limit, offset=offset, concurrency=concurrency,
+                                                      total=total, ordered=ordered):
+            yield page
+        return
+    while total is None or offset < total:
+        page = await fetch_page(offset)
+        yield page
+        if total is None and len(page) < limit:
+            return
+        offset = offset + limit
+
+
+async def aiter_offset_pages_parallel(fetch_page, limit, offset=0, concurrency=4, total=None, ordered=True):
+    if not ordered and total is None:
+        raise ValueError("Pages can only be delivered out of order when the total is known")
+    pending = deque()
+
+    def submit():
+        nonlocal offset
+        if total is None or offset < total:
+            pending.append(asyncio.ensure_future(fetch_page(offset)))
+            offset = offset + limit
+
+    try:
+        for _ in range(max(concurrency, 1)):
+            submit()
+        while pending:
+            if ordered:
+                task = pending.popleft()
+            else:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                task = done.pop()
+                pending.remove(task)
+            page = await task
+            yield page
+            if total is None and len(page) < limit:
+                return
+            submit()
+    finally:
+        for task in pending:
+            task.cancel()
+        # cancellation only takes effect once the tasks run again, wait for that
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def aiter_has_next_pages(fetch_page, limit, offset=0):
+    while True:
+        page, has_next = await fetch_page(offset)
+        yield page
+        if not has_next:
+            return
+        offset = offset + limit
+
+
+async def aiter_token_pages(fetch_page, token='', prefetch=0):
+    if prefetch > 0:
+        async for page in aread_ahead(aiter_token_pages(fetch_page, token=token), depth=prefetch):
+            yield page
+        return
+    while True:
+        page, token = await fetch_page(token)
+        yield page
+        if token is None:
+            return
+
+
+async def aiter_items(pages):
+    async for page in pages:
+        for item in page:
+            yield item
+
+
+async def aread_ahead(aiterable, depth=1):
+    buffer = asyncio.Queue(maxsize=depth)
+
+    async def produce():
+        try:
+            async for item in aiterable:
+                await buffer.put((item, None))
+        except Exception as e:
+            await buffer.put((None, e))
+            return
+        await buffer.put((_DONE, None))
+
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item, error = await buffer.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        task.cancel()
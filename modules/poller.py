@@ -0,0 +1,150 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logzero import logger
+from .polling import PollingStrategy
+
+
+# seconds between the checks, in wait(), that the poller thread is still alive
+LIVENESS_CHECK = 1.0
+
+
+class _Watch(object):
+    __slots__ = ('poll', 'finished', 'delay', 'due', 'status', 'exception', 'done', 'polling')
+
+    def __init__(self, poll, finished):
+        self.poll = poll
+        self.finished = finished
+        self.delay = None
+        self.due = 0.0
+        self.status = None
+        self.exception = None
+        self.done = threading.Event()
+        # True while a status request for the job is in flight
+        self.polling = False
+
+
+class JobPoller(object):
+    """
+    One background thread that schedules the status checks of every job (search jobs, content export/import
+    jobs) the process is waiting for, instead of one polling loop per waiting thread.
+
+    wait(poll, finished) has the same contract as PollingStrategy.wait and blocks the caller until
+    finished(status) is true; the caller's thread sleeps on its own event and is only woken when its job
+    is done, or with an error if the poller can't carry on (e.g. once the interpreter is shutting down).
+    Each job still gets growing, state-aware delays from polling_strategy, but due times are rounded up to
+    a common tick so the status checks for many jobs go out together in one batch. The checks themselves
+    run on a pool of worker threads, so one slow or retrying status request only holds up its own job.
+    """
+
+    def __init__(self, polling_strategy=None, tick=0.25, workers=4):
+        self.polling_strategy = polling_strategy or PollingStrategy()
+        self.tick = tick
+        self._watches = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-poller-worker')
+
+    def _start(self):
+        # called with the condition held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='job-poller', daemon=True)
+            self._thread.start()
+
+    def wait(self, poll, finished):
+        watch = _Watch(poll, finished)
+        # the first status check is made initial_delay after the job was created, like PollingStrategy.wait
+        self._schedule(watch, time.time())
+        with self._condition:
+            self._watches.append(watch)
+            self._start()
+            self._condition.notify()
+        try:
+            # woken up now and then to make sure there is still a poller thread to set done
+            while not watch.done.wait(LIVENESS_CHECK):
+                with self._condition:
+                    if not self._thread.is_alive() and not watch.done.is_set():
+                        raise RuntimeError("The job poller thread has stopped")
+        finally:
+            # normally the poller has already dropped the watch, unless the caller was interrupted
+            with self._condition:
+                if watch in self._watches:
+                    self._watches.remove(watch)
+        if watch.exception is not None:
+            raise watch.exception
+        return watch.status
+
+    def pending(self):
+        with self._condition:
+            return len(self._watches)
+
+    def _schedule(self, watch, now):
+        watch.delay = self.polling_strategy.next_delay(watch.delay, watch.status)
+        watch.due = math.ceil((now + watch.delay) / self.tick) * self.tick
+
+    def _run(self):
+        try:
+            self._loop()
+        except BaseException as e:
+            # e.g. submit raises RuntimeError once the interpreter is shutting down; fail every waiter rather
+            # than leave it blocked on an event nobody will set
+            logger.error("Job poller stopped: %r", e)
+            self._fail_all(RuntimeError("The job poller stopped: {0!r}".format(e)))
+
+    def _fail_all(self, error):
+        with self._condition:
+            watches = list(self._watches)
+            del self._watches[:]
+        for watch in watches:
+            watch.exception = error
+            watch.done.set()
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.time()
+                    idle = [watch for watch in self._watches if not watch.polling]
+                    due = [watch for watch in idle if watch.due <= now]
+                    if due:
+                        break
+                    # woken up early when a job is added or a status request comes back
+                    self._condition.wait(min(watch.due for watch in idle) - now if idle else None)
+                for watch in due:
+                    watch.polling = True
+            for watch in due:
+                self._executor.submit(self._poll, watch)
+            logger.debug("Polling %s jobs, %s waiting", len(due), self.pending())
+
+    def _poll(self, watch):
+        # runs on the worker pool
+        try:
+            watch.status = watch.poll()
+            finished = watch.finished(watch.status)
+        except Exception as e:
+            watch.exception = e
+            finished = True
+        with self._condition:
+            watch.polling = False
+            if not finished:
+                self._schedule(watch, time.time())
+                self._condition.notify()
+                return
+            if watch in self._watches:
+                self._watches.remove(watch)
+        # only now is the waiting thread woken up
+        watch.done.set()
+
+
+_default_poller = None
+_default_poller_lock = threading.Lock()
+
+
+def get_job_poller():
+    # the process-wide poller, created on first use
+    global _default_poller
+    with _default_poller_lock:
+        if _default_poller is None:
+            _default_poller = JobPoller()
+        return _default_poller
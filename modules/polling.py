@@ -0,0 +1,88 @@
+import asyncio
+import time
+from logzero import logger
+
+
+# search job states, see https://help.sumologic.com/docs/api/search-job/
+SEARCH_JOB_DONE = 'DONE GATHERING RESULTS'
+SEARCH_JOB_FORCE_PAUSED = 'FORCE PAUSED'
+SEARCH_JOB_CANCELLED = 'CANCELLED'
+# the job won't change state again after one of these. FORCE PAUSED means a non-aggregate query hit the
+# message limit; it stays paused with its results available until it is deleted.
+SEARCH_JOB_FINISHED_STATES = (SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED, SEARCH_JOB_CANCELLED)
+
+# longest wait between polls in a given state. A queued job usually starts within seconds, while a job
+# that is gathering results takes as long as the data it has to scan.
+DEFAULT_STATE_DELAYS = {'NOT STARTED': 2.0,
+                        'GATHERING RESULTS': 10.0}
+
+
+class PollingStrategy(object):
+    """
+    Decides how long to wait between status checks of a long-running job (search jobs, content jobs).
+
+    The first check is made initial_delay after the job is created, and each wait after that is growth
+    times longer, up to max_delay or the limit for the job's current state in state_delays. Short jobs
+    are noticed quickly and long ones don't spend the rate budget the result downloads need. A status
+    reporting pendingErrors resets the wait to initial_delay, because the job is usually about to be
+    cancelled, and pendingWarnings cap it at warning_delay.
+    """
+
+    def __init__(self,
+                 initial_delay=0.5,
+                 growth=1.5,
+                 max_delay=10.0,
+                 state_delays=None,
+                 warning_delay=2.0):
+        self.initial_delay = initial_delay
+        self.growth = growth
+        self.max_delay = max_delay
+        self.state_delays = dict(DEFAULT_STATE_DELAYS if state_delays is None else state_delays)
+        self.warning_delay = warning_delay
+
+    def next_delay(self, previous_delay, status=None):
+        status = status or {}
+        if status.get('pendingErrors'):
+            return self.initial_delay
+        if previous_delay is None:
+            delay = self.initial_delay
+        else:
+            delay = previous_delay * self.growth
+        # search jobs report 'state', content jobs 'status'
+        state = status.get('state', status.get('status'))
+        delay = min(delay, self.max_delay, self.state_delays.get(state, self.max_delay))
+        if status.get('pendingWarnings'):
+            delay = min(delay, self.warning_delay)
+        return max(delay, self.initial_delay)
+
+    def wait(self, poll, finished):
+        """
+        Call poll() until finished(status) is true, sleeping before each call, and return the last status.
+        """
+        delay = self.next_delay(None)
+        time.sleep(delay)
+        status = poll()
+        while not finished(status):
+            delay = self.next_delay(delay, status)
+            time.sleep(delay)
+            status = poll()
+        return status
+
+    async def async_wait(self, poll, finished):
+        # asyncio version of wait, poll is a coroutine function
+        delay = self.next_delay(None)
+        await asyncio.sleep(delay)
+        status = await poll()
+        while not finished(status):
+            delay = self.next_delay(delay, status)
+            await asyncio.sleep(delay)
+            status = await poll()
+        return status
+
+
+def log_pending(search_job, status):
+    # pendingErrors/pendingWarnings hold what the job reported since the previous status request
+    for error in status.get('pendingErrors') or []:
+        logger.error("Search job {0}: {1}".format(search_job['id'], error))
+    for warning in status.get('pendingWarnings') or []:
+        logger.warning("Search job {0}: {1}".format(search_job['id'], warning))
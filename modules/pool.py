@@ -0,0 +1,55 @@
+import threading
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from logzero import logger
+
+
+# Sumo Logic allows 10 concurrent requests per access key, so there is no point keeping more connections
+# than that open to one endpoint
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+_adapters = {}
+_adapters_lock = threading.Lock()
+
+
+def _pool_key(endpoint):
+    parts = urlsplit(endpoint)
+    return '{0}://{1}/'.format(parts.scheme, parts.netloc)
+
+
+def configure_pool(endpoint, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+    """
+    Set the pool sizes used for endpoint, e.g. to match the max_workers of a ThreadPoolExecutor. Clients
+    created afterwards share the new pool; clients that already exist keep the one they have.
+    """
+    key = _pool_key(endpoint)
+    with _adapters_lock:
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        _adapters[key] = adapter
+        logger.debug("Connection pool for %s: pool_connections=%s pool_maxsize=%s", key, pool_connections, pool_maxsize)
+        return adapter
+
+
+def get_adapter(endpoint, pool_connections=None, pool_maxsize=None):
+    """
+    Return the process-wide HTTPAdapter (and therefore connection pool) for endpoint. Every client for the
+    same scheme and host shares it, so a new client starts with warm, already authenticated TLS connections.
+    The pool is replaced with a larger one if a caller asks for more connections than it has.
+    """
+    key = _pool_key(endpoint)
+    with _adapters_lock:
+        adapter = _adapters.get(key)
+    if adapter is not None and (pool_maxsize is None or pool_maxsize <= adapter._pool_maxsize) \
+            and (pool_connections is None or pool_connections <= adapter._pool_connections):
+        return adapter
+    return configure_pool(endpoint,
+                          max(pool_connections or DEFAULT_POOL_CONNECTIONS, adapter._pool_connections if adapter else 0),
+                          max(pool_maxsize or DEFAULT_POOL_MAXSIZE, adapter._pool_maxsize if adapter else 0))
+
+
+def mount_pool(session, endpoint, pool_connections=None, pool_maxsize=None):
+    # route every request the session makes to endpoint's host through the shared pool
+    adapter = get_adapter(endpoint, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount(_pool_key(endpoint), adapter)
+    return adapter
@@ -0,0 +1,62 @@
+import threading
+import time
+from logzero import logger
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket used to pace API calls before they are sent.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Each call to acquire() takes
+    one token, sleeping first if the bucket is empty. reserve() does the bookkeeping without sleeping
+    and returns how long the caller has to wait, so the same bucket can be used from asyncio code.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else float(rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last = now
+
+    def reserve(self, tokens=1):
+        # Take the tokens now (possibly going negative) and return the number of seconds the caller
+        # has to wait before it may send. Going negative keeps waiting callers in FIFO order.
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            logger.debug("Rate limiter pacing request, sleeping for %.3fs", delay)
+            time.sleep(delay)
+        return delay
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(key, rate, capacity=None):
+    """
+    Return the process-wide TokenBucket for `key` (normally the access ID), creating it on first use.
+    Every client built with the same key shares one bucket, so together they stay under the org limit.
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity)
+            _buckets[key] = bucket
+        return bucket
@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+import email.utils
+from functools import wraps
+import requests
+from logzero import logger
+from .hooks import RequestEvent, dispatch
+
+
+class RetryPolicy(object):
+    """
+    Decides which failed API calls are retried and how long to wait between attempts.
+
+    429s are always retried since the server rejected the request without acting on it. 5xx responses
+    and transport errors (connection failures, timeouts) are only retried for idempotent verbs, except
+    for connect timeouts, where the request never reached the server. Delays honour the Retry-After
+    and X-RateLimit-Reset headers when present and otherwise use decorrelated jitter so that threads
+    throttled at the same moment don't all wake up together.
+    """
+
+    def __init__(self,
+                 max_tries=10,
+                 base_delay=0.5,
+                 max_delay=60,
+                 retry_statuses=(429, 500, 502, 503, 504),
+                 idempotent_methods=('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'),
+                 respect_retry_after=True):
+        self.max_tries = max_tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(m.upper() for m in idempotent_methods)
+        self.respect_retry_after = respect_retry_after
+
+    def is_retryable(self, method, exception):
+        response = getattr(exception, 'response', None)
+        if isinstance(exception, requests.HTTPError) and response is not None:
+            if response.status_code == 429:
+                return True
+            return response.status_code in self.retry_statuses and method.upper() in self.idempotent_methods
+        if isinstance(exception, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(exception, (requests.ConnectionError, requests.Timeout)):
+            return method.upper() in self.idempotent_methods
+        return False
+
+    def next_delay(self, previous_delay, exception=None):
+        response = getattr(exception, 'response', None)
+        if self.respect_retry_after and response is not None:
+            server_delay = self.server_delay(response)
+            if server_delay is not None:
+                # add a little jitter so callers told the same Retry-After don't retry in lockstep
+                return server_delay + random.uniform(0, self.base_delay)
+        previous_delay = max(previous_delay or self.base_delay, self.base_delay)
+        return min(self.max_delay, random.uniform(self.base_delay, previous_delay * 3))
+
+    @staticmethod
+    def server_delay(response):
+        headers = response.headers
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = email.utils.parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        reset = headers.get('X-RateLimit-Reset') or headers.get('RateLimit-Reset')
+        if reset:
+            try:
+                reset = float(reset)
+            except ValueError:
+                return None
+            # some APIs send an epoch timestamp, others the number of seconds until the reset
+            if reset > 1e9:
+                reset = reset - time.time()
+            return max(0.0, reset)
+        return None
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def _notify_retry(client, method, args, kwargs, tries, delay, exception):
+    hooks = getattr(client, 'hooks', None)
+    if hooks:
+        event = RequestEvent(method, args[0] if args else kwargs.get('method', ''), attempt=tries)
+        event.delay = delay
+        event.exception = exception
+        if getattr(exception, 'response', None) is not None:
+            event.status = exception.response.status_code
+        dispatch(hooks, 'on_retry', event)
+
+
+def backoff(func):
+    # Wraps the get/post/put/delete methods of a client. The HTTP verb is taken from the method name
+    # (ignoring leading underscores) and the policy from the client's retry_policy attribute.
+    method = func.__name__.lstrip('_').upper()
+
+    @wraps(func)
+    def limited(self, *args, **kwargs):
+        policy = getattr(self, 'retry_policy', None) or DEFAULT_RETRY_POLICY
+        delay = None
+        tries = 0
+        while True:
+            try:
+                return func(self, *args, **kwargs)
+            except requests.RequestException as e:
+                tries += 1
+                if tries >= policy.max_tries or not policy.is_retryable(method, e):
+                    if tries > 1:
+                        logger.debug("%s still failed after %d attempts.", method, tries)
+                    raise
+                delay = policy.next_delay(delay, e)
+                logger.debug("%s failed (%s), retrying in %.3fs, attempt %d", method, e, delay, tries)
+                _notify_retry(self, method, args, kwargs, tries, delay, e)
+            time.sleep(delay)
+    return limited
+
+
+def async_backoff(func):
+    # asyncio version of backoff, used by the clients in modules.sumologic_async
+    method = func.__name__.lstrip('_').upper()
+
+    @wraps(func)
+    async def limited(self, *args, **kwargs):
+        policy = getattr(self, 'retry_policy', None) or DEFAULT_RETRY_POLICY
+        delay = None
+        tries = 0
+        while True:
+            try:
+                return await func(self, *args, **kwargs)
+            except requests.RequestException as e:
+                tries += 1
+                if tries >= policy.max_tries or not policy.is_retryable(method, e):
+                    if tries > 1:
+                        logger.debug("%s still failed after %d attempts.", method, tries)
+                    raise
+                delay = policy.next_delay(delay, e)
+                logger.debug("%s failed (%s), retrying in %.3fs, attempt %d", method, e, delay, tries)
+                _notify_retry(self, method, args, kwargs, tries, delay, e)
+            await asyncio.sleep(delay)
+    return limited
@@ -0,0 +1,124 @@
+import threading
+from contextlib import contextmanager
+import requests
+from logzero import logger
+
+
+# Sumo Logic allows 200 active search jobs per org. Leave room for dashboards, scheduled searches and people.
+DEFAULT_MAX_ACTIVE_JOBS = 100
+
+
+class SearchJobManager(object):
+    """
+    Caps the number of search jobs a process has running against an org and makes sure every job it
+    starts is deleted. Jobs left behind keep running server side until they time out and count against
+    the org's concurrent job limit, so an interrupted backfill could otherwise lock everyone out.
+
+    job() waits for a free slot (callers queue in the meantime), creates the job and deletes it when the
+    with block ends, whether it finished, failed or was abandoned. shutdown() deletes every job still
+    running and makes queued callers give up, which is what a script should do on Ctrl-C, since worker
+    threads don't see KeyboardInterrupt. stats() reports active and queued jobs for progress logging.
+    """
+
+    def __init__(self, max_active=DEFAULT_MAX_ACTIVE_JOBS):
+        self.max_active = max_active
+        self._condition = threading.Condition()
+        self._slots_in_use = 0
+        self._queued = 0
+        self._active = {}
+        self._closed = False
+        self.created = 0
+        self.deleted = 0
+        self.failed = 0
+
+    def _acquire(self):
+        with self._condition:
+            self._queued += 1
+            try:
+                while self._slots_in_use >= self.max_active and not self._closed:
+                    self._condition.wait()
+            finally:
+                self._queued -= 1
+            if self._closed:
+                raise RuntimeError("The search job manager has been shut down")
+            self._slots_in_use += 1
+
+    def _release(self):
+        with self._condition:
+            self._slots_in_use -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def job(self, sumo, query, fromTime=None, toTime=None, timeZone='UTC', byReceiptTime=False):
+        self._acquire()
+        try:
+            search_job = sumo.search_job(query, fromTime=fromTime, toTime=toTime, timeZone=timeZone,
+                                         byReceiptTime=byReceiptTime)
+            with self._condition:
+                self.created += 1
+                self._active[search_job['id']] = (sumo, search_job)
+            try:
+                yield search_job
+            except GeneratorExit:
+                # the caller closed a generator that was using the job, that isn't a failure
+                raise
+            except BaseException:
+                with self._condition:
+                    self.failed += 1
+                raise
+            finally:
+                self._delete(sumo, search_job)
+        finally:
+            self._release()
+
+    def _delete(self, sumo, search_job):
+        with self._condition:
+            if self._active.pop(search_job['id'], None) is None:
+                # already deleted by shutdown()
+                return
+            self.deleted += 1
+        try:
+            sumo.delete_search_job(search_job)
+        except requests.RequestException as e:
+            logger.warning("Could not delete search job {0}: {1}".format(search_job['id'], e))
+
+    def shutdown(self):
+        """Delete every running job and make anyone waiting for a slot give up. Idempotent."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            active = list(self._active.values())
+            self._active.clear()
+            self.deleted += len(active)
+        for sumo, search_job in active:
+            logger.info("Deleting search job {0}".format(search_job['id']))
+            try:
+                sumo.delete_search_job(search_job)
+            except requests.RequestException as e:
+                logger.warning("Could not delete search job {0}: {1}".format(search_job['id'], e))
+
+    def stats(self):
+        with self._condition:
+            return {'active': len(self._active),
+                    'queued': self._queued,
+                    'max_active': self.max_active,
+                    'created': self.created,
+                    'deleted': self.deleted,
+                    'failed': self.failed}
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_search_job_manager(key, max_active=DEFAULT_MAX_ACTIVE_JOBS):
+    """
+    Return the process-wide SearchJobManager for `key` (normally the access ID), creating it on first use,
+    so that every client for an org shares one cap.
+    """
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = SearchJobManager(max_active)
+            _managers[key] = manager
+        return manager
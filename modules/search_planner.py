@@ -0,0 +1,118 @@
+import datetime
+import threading
+from logzero import logger
+from .polling import SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED
+from .sumologic import SearchJobError
+
+
+# a search job stops gathering messages (FORCE PAUSED) once it has found this many, and the rest are lost
+DEFAULT_MAX_RESULTS = 100000
+
+
+def overflowed(status, max_results=DEFAULT_MAX_RESULTS):
+    # True if the job has lost, or is going to lose, results: it was force paused or its count is past the cap
+    return status['state'] == SEARCH_JOB_FORCE_PAUSED or status['messageCount'] > max_results
+
+
+class SearchPlanner(object):
+    """
+    Splits a long time range into search job windows that are as large as possible without losing results.
+
+    Windows are sized from the message density (messages per second) learned for each key, usually the
+    source category, aiming for fill * max_results messages per job. A job whose count crosses max_results
+    (or that is force paused) is deleted and its window bisected until the window fits or min_window is
+    reached. Quiet stretches grow the window by growth each time, up to max_window, so adjacent quiet
+    windows are merged into one job instead of one job each. The planner is thread safe and is meant to be
+    shared, so everything learned about a key carries over to later windows and runs in the same process.
+    """
+
+    def __init__(self,
+                 sumo,
+                 max_results=DEFAULT_MAX_RESULTS,
+                 fill=0.5,
+                 initial_window=datetime.timedelta(hours=1),
+                 min_window=datetime.timedelta(seconds=1),
+                 max_window=datetime.timedelta(days=1),
+                 growth=2):
+        self.sumo = sumo
+        self.max_results = max_results
+        self.fill = fill
+        self.initial_window = initial_window
+        self.min_window = min_window
+        self.max_window = max_window
+        self.growth = growth
+        self._density = {}
+        self._lock = threading.Lock()
+
+    def density(self, key):
+        # learned messages per second for key, None until a job for it has finished
+        with self._lock:
+            return self._density.get(key)
+
+    def learn(self, key, count, window):
+        seconds = max(window.total_seconds(), 0.001)
+        with self._lock:
+            previous = self._density.get(key)
+            observed = count / seconds
+            # smooth, so that one unusually busy or quiet window doesn't swing the next one too far
+            self._density[key] = observed if previous is None else (previous + observed) / 2
+
+    def next_window(self, key, previous_window=None):
+        density = self.density(key)
+        if density is None:
+            window = self.initial_window
+        elif density > 0:
+            # whole seconds keep the window boundaries (and file names made from them) readable
+            window = datetime.timedelta(seconds=int(self.fill * self.max_results / density))
+        else:
+            window = self.max_window
+        if previous_window is not None:
+            # grow step by step, so a quiet stretch followed by a busy one doesn't overshoot too far
+            window = min(window, previous_window * self.growth)
+        return min(max(window, self.min_window), self.max_window)
+
+    def overflowed(self, status):
+        return overflowed(status, self.max_results)
+
+    def iter_windows(self, query, start, end, key=None, time_zone='UTC', by_receipt_time=False):
+        """
+        Yield (window_start, window_end, search_job, status) for consecutive windows covering start to end,
+        each with a finished search job whose results fit. Download the results (e.g. with
+        sumo.iter_search_job_message_pages(search_job, status['messageCount'])) before asking for the next
+        window: the job is deleted when the generator resumes or is closed. Jobs are started through
+        sumo.managed_search_job, so they count against the client's search job cap. key defaults to the query.
+        """
+        key = query if key is None else key
+        current = start
+        window = None
+        while current < end:
+            window_end = min(current + self.next_window(key, window), end)
+            while True:
+                span = window_end - current
+                # the job is deleted when the with block is left, also when the window is split
+                with self.sumo.managed_search_job(query, fromTime=current.isoformat(), toTime=window_end.isoformat(),
+                                                  timeZone=time_zone, byReceiptTime=by_receipt_time) as search_job:
+                    # stop waiting as soon as the count crosses the limit, the window is going to be split anyway
+                    status = self._wait(search_job, until=self.overflowed)
+                    fits = not self.overflowed(status)
+                    if not fits and span / 2 < self.min_window:
+                        logger.warning("{0}: {1} to {2} has more than {3} results even at the minimum window, "
+                                       "some will be missing".format(key, current, window_end, self.max_results))
+                        status = self._wait(search_job)
+                        fits = True
+                    if fits:
+                        self.learn(key, status['messageCount'], span)
+                        yield current, window_end, search_job, status
+                        break
+                # the job was stopped early, so its count is only a lower bound for the window
+                self.learn(key, max(status['messageCount'], self.max_results), span)
+                window_end = current + (datetime.timedelta(seconds=span.total_seconds() // 2) or span / 2)
+                logger.info("{0}: too many results, splitting into {1} to {2}".format(key, current, window_end))
+            window = window_end - current
+            current = window_end
+
+    def _wait(self, search_job, until=None):
+        status = self.sumo.wait_for_search_job(search_job, until=until)
+        if status['state'] not in (SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED) and not self.overflowed(status):
+            raise SearchJobError(search_job, status)
+        return status
@@ -0,0 +1,57 @@
+import threading
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'exception')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces identical concurrent calls. While do(key, fn) is running for a key, other threads calling
+    do() with the same key wait for it and receive the same result (or exception) instead of running fn
+    themselves. Once the call finishes the key is forgotten, so nothing is cached beyond the in-flight call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+        if not leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def request_key(identity, url, params=None, headers=None):
+    # hashable key for a GET request; None values are dropped like requests does
+    return (str(identity),
+            url,
+            tuple(sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)),
+            tuple(sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())))
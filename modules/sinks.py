@@ -0,0 +1,297 @@
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+FORMATS = ('raw', 'ndjson')
+EXTENSIONS = {'raw': '.log', 'ndjson': '.ndjson', 'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+# plain files are written through a buffer this big, so a page goes to disk in a few large writes
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+# a file is written under its name plus this and renamed into place once it is complete
+PART_SUFFIX = '.part'
+
+_CLOSE = object()
+
+
+def encode_page(page, format='raw'):
+    """One page of search job messages as bytes: the _raw lines, or each message's whole map as a JSON line."""
+    if format == 'ndjson':
+        text = ''.join(json.dumps(message['map']) + '\n' for message in page)
+    else:
+        text = ''.join(message['map']['_raw'] + '\n' for message in page)
+    return text.encode('utf-8')
+
+
+class _HashingFile(object):
+    # file wrapper that keeps a sha256 of everything written to the file, i.e. after compression
+    def __init__(self, file):
+        self._file = file
+        self.hash = hashlib.sha256()
+
+    def write(self, data):
+        self.hash.update(data)
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+class FileSink(object):
+    """
+    Writes pages of search job messages to one file, optionally compressed. The file is only created once
+    there is something to write, so a window without results leaves no empty file behind. It is written
+    as path + '.part' and only renamed to path by close(), so a file under its final name is always
+    complete; leaving the with block with an exception deletes the partial file instead. count is the
+    number of messages written and sha256 the checksum of the file, once it is closed.
+    """
+
+    def __init__(self, path, compression='none', format='raw', level=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.path = path
+        self.compression = compression
+        self.format = format
+        self.level = DEFAULT_LEVELS.get(compression) if level is None else level
+        self.buffer_size = buffer_size
+        self.count = 0
+        self.sha256 = None
+        self._raw_file = None
+        self._file = None
+
+    @property
+    def part_path(self):
+        return self.path + PART_SUFFIX
+
+    def _open(self):
+        self._raw_file = _HashingFile(open(self.part_path, 'wb', buffering=self.buffer_size))
+        if self.compression == 'gzip':
+            self._file = gzip.GzipFile(fileobj=self._raw_file, mode='wb', compresslevel=self.level)
+        elif self.compression == 'zstd':
+            self._file = zstandard.ZstdCompressor(level=self.level).stream_writer(self._raw_file)
+        else:
+            self._file = self._raw_file
+
+    def write_page(self, page):
+        if not page:
+            return
+        if self._file is None:
+            self._open()
+        self._file.write(encode_page(page, self.format))
+        self.count = self.count + len(page)
+
+    def _close_file(self):
+        try:
+            self._file.close()
+        finally:
+            # GzipFile leaves a file object it was given open
+            if not self._raw_file.closed:
+                self._raw_file.close()
+            self._file = None
+
+    def close(self):
+        if self._file is None:
+            return
+        self._close_file()
+        self.sha256 = self._raw_file.hash.hexdigest()
+        os.replace(self.part_path, self.path)
+
+    def abort(self):
+        # stop writing and remove the partial file
+        if self._file is None:
+            return
+        try:
+            self._close_file()
+        finally:
+            os.remove(self.part_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ThreadedSink(object):
+    """
+    Hands pages to another sink on a writer thread, so encoding, compression and disk writes overlap with
+    the download of the next page. The queue holds at most depth pages; a download that gets ahead of the
+    writer waits for it. An error on the writer thread is raised by the next write_page or by close.
+    """
+
+    def __init__(self, sink, depth=4):
+        self.sink = sink
+        self._queue = queue.Queue(maxsize=depth)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='sink-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self):
+        return self.sink.path
+
+    @property
+    def count(self):
+        return self.sink.count
+
+    @property
+    def sha256(self):
+        return self.sink.sha256
+
+    def _run(self):
+        while True:
+            page = self._queue.get()
+            if page is _CLOSE:
+                return
+            # after an error keep taking pages, so that the downloading thread never blocks on a full queue
+            if self._error is None:
+                try:
+                    self.sink.write_page(page)
+                except Exception as e:
+                    self._error = e
+
+    def write_page(self, page):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(page)
+
+    def _stop(self):
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+
+    def close(self):
+        self._stop()
+        if self._error is not None:
+            self.sink.abort()
+            raise self._error
+        self.sink.close()
+
+    def abort(self):
+        self._stop()
+        self.sink.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class RoutingSink(object):
+    """
+    Splits pages of messages between several sinks, e.g. one file per source category from a search job
+    that covers many. route(message) returns the keys of the sinks a message belongs in, an empty list to
+    drop it, and open_sink(key) opens the sink for a key the first time it is needed. count is the number
+    of messages written, counting a message once for every sink it went to. sinks maps each key to its
+    sink, for their counts and checksums once closed. Wrap it in a ThreadedSink to route and write all of
+    the files on one writer thread.
+    """
+
+    def __init__(self, route, open_sink):
+        self.route = route
+        self.open_sink = open_sink
+        self.sinks = {}
+        self.dropped = 0
+
+    @property
+    def count(self):
+        return sum(sink.count for sink in self.sinks.values())
+
+    def write_page(self, page):
+        routed = {}
+        for message in page:
+            keys = self.route(message)
+            if not keys:
+                self.dropped = self.dropped + 1
+            for key in keys:
+                routed.setdefault(key, []).append(message)
+        for key, messages in routed.items():
+            sink = self.sinks.get(key)
+            if sink is None:
+                sink = self.sinks[key] = self.open_sink(key)
+            sink.write_page(messages)
+
+    def close(self):
+        # close every sink even if one fails, then raise the first error
+        error = None
+        for sink in self.sinks.values():
+            try:
+                sink.close()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def abort(self):
+        for sink in self.sinks.values():
+            sink.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SinkFactory(object):
+    """
+    Output settings for a run: compression ('none', 'gzip' or 'zstd', which needs the zstandard package),
+    format ('raw' for the _raw lines, 'ndjson' for each message's whole map) and whether pages are written
+    on a separate thread. open(path) returns a sink to use as a context manager; extension is the file
+    extension that goes with the settings, e.g. .log.gz. open_file and wrap are the two halves of open, for
+    sinks that are put together differently (see RoutingSink).
+    """
+
+    def __init__(self, compression='none', format='raw', level=None, threaded=True, depth=4,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        if compression not in COMPRESSIONS:
+            raise ValueError("Unknown compression: {0}".format(compression))
+        if format not in FORMATS:
+            raise ValueError("Unknown output format: {0}".format(format))
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package (pip install zstandard)")
+        self.compression = compression
+        self.format = format
+        self.level = level
+        self.threaded = threaded
+        self.depth = depth
+        self.buffer_size = buffer_size
+
+    @property
+    def extension(self):
+        return EXTENSIONS[self.format] + EXTENSIONS[self.compression]
+
+    def open_file(self, path):
+        return FileSink(path, compression=self.compression, format=self.format, level=self.level,
+                        buffer_size=self.buffer_size)
+
+    def wrap(self, sink):
+        if self.threaded:
+            return ThreadedSink(sink, depth=self.depth)
+        return sink
+
+    def open(self, path):
+        return self.wrap(self.open_file(path))
@@ -1,17 +1,30 @@
 import json
+import logging
 import requests
 import urllib
 import time
 import os
 import sys
 import warnings
+import threading
+from types import MappingProxyType
 from logzero import logger
 import logzero
-from functools import wraps
 try:
     import cookielib
 except ImportError:
     import http.cookiejar as cookielib
+from .ratelimit import get_rate_limiter
+from .retry import RetryPolicy, backoff
+from .hooks import RequestEvent, dispatch
+from .pool import mount_pool
+from .endpoints import get_endpoint_resolver, probe_endpoint
+from .httpcache import ResponseCache
+from .singleflight import SingleFlight, request_key
+from .polling import PollingStrategy, log_pending
+from .polling import SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED, SEARCH_JOB_FINISHED_STATES
+from .search_jobs import get_search_job_manager
+from .pagination import iter_offset_pages, iter_has_next_pages, iter_token_pages, iter_items
 
 
 # API RATE Limit constants
@@ -21,32 +34,28 @@ NUMBER_OF_CALLS = 4
 PERIOD = 1  # in seconds
 
 
-def backoff(func):
-    @wraps(func)
-    def limited(*args, **kwargs):
-        delay = PERIOD / NUMBER_OF_CALLS *2
-        tries = 0
-        while tries < MAX_TRIES:
-            try:
-                return func(*args, **kwargs)
-            except Exception as e:
-                if e.response.status_code == 429:  # rate limited
-                    lastException = e
-                    tries += 1
-                    logger.debug("Rate limited, sleeping for {0}s".format(delay))
-                else:
-                    raise
-            logger.debug(f"delay: {delay} attempts: {tries}")
-            time.sleep(delay)
-            delay = delay * 2
-        logger.debug("Rate limited function still failed after {0} retries.".format(MAX_TRIES))
-        raise lastException
-    return limited
+# Default headers are read-only so that a client shared between threads can't have them changed underneath
+# a request. Pass headers to get/post/put/delete to add or override headers for a single call.
+DEFAULT_HEADERS = MappingProxyType({'content-type': 'application/json', 'accept': 'application/json'})
+
+
+class SearchJobError(Exception):
+    """Raised when a search job ends without results to download, e.g. because it was cancelled."""
+
+    def __init__(self, search_job, status):
+        super().__init__("Search job {0} ended in state {1}".format(search_job['id'], status.get('state')))
+        self.search_job = search_job
+        self.status = status
 
 
 class SumoLogic(object):
-    def __init__(self, access_id, access_key, endpoint=None, log_level='info', log_file=None, caBundle=None, cookieFile='cookies.txt', use_session=True):
-        self.session = requests.Session()
+    """
+    A SumoLogic instance is safe to share between threads, e.g. by every worker of a ThreadPoolExecutor.
+    Each thread gets its own requests.Session (all drawing on the shared connection pool from modules.pool),
+    the default headers are immutable and the cookie jar, rate limiter and metrics are internally locked.
+    """
+
+    def __init__(self, access_id, access_key, endpoint=None, log_level='info', log_file=None, caBundle=None, cookieFile='cookies.txt', use_session=True, rate_limiter=None, retry_policy=None, hooks=None, metrics=None, pool_connections=None, pool_maxsize=None, endpoint_resolver=None, cache=None, coalesce=True, polling_strategy=None, search_job_manager=None, job_poller=None):
         self.log_level = log_level
         self.set_log_level(self.log_level)
         if log_file:
@@ -56,13 +65,46 @@ class SumoLogic(object):
         self.endpoint = endpoint
         self.use_session = use_session
         self.auth = (access_id, access_key)
-        self.session.auth = self.auth
-        self.headers = {'content-type': 'application/json', 'accept': 'application/json'}
-        self.session.headers = self.headers
-        if caBundle is not None:
-            self.session.verify = caBundle
-        cj = cookielib.FileCookieJar(cookieFile)
-        self.session.cookies = cj
+        # Calls are paced by a token bucket shared by every client using this access ID. Pass
+        # rate_limiter=False to disable pacing and rely on backoff alone.
+        if rate_limiter is None:
+            self.rate_limiter = get_rate_limiter(('sumologic', access_id), NUMBER_OF_CALLS / PERIOD, NUMBER_OF_CALLS)
+        else:
+            self.rate_limiter = rate_limiter
+        # 429s, 5xx responses and transport errors are retried according to this policy
+        if retry_policy is None:
+            self.retry_policy = RetryPolicy(max_tries=MAX_TRIES, base_delay=PERIOD / NUMBER_OF_CALLS * 2)
+        else:
+            self.retry_policy = retry_policy
+        # how often search job status is polled while waiting for a job, see modules.polling
+        self.polling_strategy = polling_strategy or PollingStrategy()
+        # optional modules.poller.JobPoller: job status is then polled from one shared thread for all jobs
+        self.job_poller = job_poller
+        # caps the search jobs running against the org and deletes them when done, see modules.search_jobs
+        self.search_jobs = search_job_manager or get_search_job_manager(('sumologic', access_id))
+        # instrumentation hooks, see modules.hooks.RequestHooks
+        self.hooks = list(hooks or [])
+        # optional modules.metrics.MetricsCollector, usually shared by all the clients in a run
+        self.metrics = metrics
+        if metrics is not None:
+            self.hooks.append(metrics)
+        self.headers = DEFAULT_HEADERS
+        self.caBundle = caBundle
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        # http.cookiejar jars lock internally, so one jar is shared by all the per-thread sessions
+        self.cookies = cookielib.FileCookieJar(cookieFile)
+        self._local = threading.local()
+        # optional modules.httpcache.ResponseCache for conditional GETs, pass cache=True for an in-memory one
+        self.cache = ResponseCache() if cache is True else cache
+        # Identical GETs made at the same time by different threads share one request and its response.
+        # Pass a modules.singleflight.SingleFlight to coalesce across clients, or coalesce=False to disable.
+        if coalesce is True:
+            self.inflight = SingleFlight()
+        else:
+            self.inflight = coalesce or None
+        # used when no endpoint is given, see _get_endpoint
+        self.endpoint_resolver = endpoint_resolver or get_endpoint_resolver()
         if endpoint is None:
             self.endpoint = self._get_endpoint()
         else:
@@ -71,11 +113,34 @@ class SumoLogic(object):
             self.endpoint = self.endpoint[:-4]
             warnings.warn('Endpoint should no longer end in "/v1/", it has been removed from your endpoint string.',
                           DeprecationWarning)
-        if endpoint[-1:] == "/":
+        if self.endpoint[-1:] == "/":
             self.endpoint = self.endpoint[:-1]
             warnings.warn(
                 "Endpoint should not end with a slash character, it has been removed from your endpoint string.")
 
+    @property
+    def session(self):
+        # one requests.Session per thread, created on first use
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._new_session()
+            self._local.session = session
+        return session
+
+    def _new_session(self):
+        session = requests.Session()
+        session.auth = self.auth
+        session.headers.update(self.headers)
+        if self.caBundle is not None:
+            session.verify = self.caBundle
+        session.cookies = self.cookies
+        # connections to the endpoint come from a process-wide pool, so sessions and clients created per
+        # thread or per task reuse warm connections instead of repeating the TCP and TLS handshakes.
+        # See modules.pool.configure_pool.
+        if self.endpoint is not None:
+            mount_pool(session, self.endpoint, pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        return session
+
     def set_log_level(self, log_level):
         if log_level == 'info':
             self.log_level = log_level
@@ -104,105 +169,93 @@ class SumoLogic(object):
         responds with a 401 and causes the SumoLogic class instantiation to fail and this very
         unhelpful message is shown 'Full authentication is required to access this resource'
 
-        This method makes a request to the default REST endpoint and resolves the 401 to learn
-        the right endpoint
+        The right endpoint is learned by making a request to the default REST endpoint and following
+        its redirect. The answer is cached on disk per access ID (see modules.endpoints.EndpointResolver),
+        so only the first client for an access ID pays for the round trip.
         """
 
-        self.endpoint = 'https://api.sumologic.com/api'
-        self.response = self.session.get('https://api.sumologic.com/api/v1/collectors')  # Dummy call to get endpoint
-        endpoint = self.response.url.replace('/v1/collectors', '')  # dirty hack to sanitise URI and retain domain
+        endpoint = self.endpoint_resolver.resolve(
+            self.access_id,
+            lambda: probe_endpoint(self.access_id, self.access_key,
+                                   verify=self.caBundle if self.caBundle is not None else True))
         logger.info("SDK Endpoint {}".format(str(endpoint)))
         return endpoint
 
     def get_versioned_endpoint(self, version):
         return self.endpoint+'/%s' % version
 
-    @backoff
-    def delete(self, method, params=None, headers=None, data=None):
-        logger.debug("DELETE: " + self.endpoint + method)
-        logger.debug("Headers:")
-        logger.debug(headers)
-        logger.debug("Params:")
-        logger.debug(params)
-        logger.debug("Body:")
-        logger.debug(data)
-        if self.use_session:
-            r = self.session.delete(self.endpoint + method, params=params, headers=headers, data=data)
-        else:
-            r = requests.delete(self.endpoint + method, params=params, headers=headers, data=data, auth=self.auth)
-        logger.debug("Response:")
-        logger.debug(r)
-        logger.debug("Response Body:")
-        logger.debug(r.text)
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def _send(self, http_method, method, params=None, headers=None, data=None):
+        url = self.endpoint + method
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("%s: %s\nHeaders: %s\nParams: %s\nBody: %s", http_method, url, headers, params, data)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        event = None
+        if self.hooks:
+            event = RequestEvent(http_method, method)
+            dispatch(self.hooks, 'on_request', event)
+        start = time.perf_counter()
+        try:
+            if self.use_session:
+                r = self.session.request(http_method, url, params=params, headers=headers, data=data)
+            else:
+                r = requests.request(http_method, url, params=params, headers={**self.headers, **(headers or {})},
+                                     data=data, auth=self.auth)
+        except requests.RequestException as e:
+            if event is not None:
+                event.latency = time.perf_counter() - start
+                event.exception = e
+                dispatch(self.hooks, 'on_response', event)
+            raise
+        if debug:
+            logger.debug("Response: %s\nResponse Body: %s", r, r.text)
         if r.status_code != 200:
             r.reason = r.text
+        if event is not None:
+            event.latency = time.perf_counter() - start
+            event.status = r.status_code
+            event.bytes = len(r.content)
+            dispatch(self.hooks, 'on_response', event)
         r.raise_for_status()
         return r
 
     @backoff
+    def delete(self, method, params=None, headers=None, data=None):
+        return self._send('DELETE', method, params=params, headers=headers, data=data)
+
     def get(self, method, params=None, headers=None):
-        logger.debug("GET: " + self.endpoint + method)
-        logger.debug("Headers:")
-        logger.debug(headers)
-        logger.debug("Params:")
-        logger.debug(params)
-        if self.use_session:
-            r = self.session.get(self.endpoint + method, params=params, headers=headers)
-        else:
-            r = requests.get(self.endpoint + method, params=params, headers=headers, auth=self.auth)
+        if self.inflight is None:
+            return self._get(method, params=params, headers=headers)
+        key = request_key(self.access_id, self.endpoint + method, params, headers)
+        return self.inflight.do(key, lambda: self._get(method, params=params, headers=headers))
 
-        logger.debug("Response:")
-        logger.debug(r)
-        logger.debug("Response Body:")
-        logger.debug(r.text)
-        if r.status_code != 200:
-            r.reason = r.text
-        r.raise_for_status()
+    @backoff
+    def _get(self, method, params=None, headers=None):
+        if self.cache is None or not self.cache.cacheable(method):
+            return self._send('GET', method, params=params, headers=headers)
+        # conditional GET: revalidate a cached copy with its ETag/Last-Modified and reuse it on a 304
+        key = self.cache.key(self.access_id, self.endpoint + method, params, headers)
+        entry = self.cache.get(key)
+        if entry is not None:
+            headers = {**self.cache.validators(entry), **(headers or {})}
+        r = self._send('GET', method, params=params, headers=headers)
+        if r.status_code == 304 and entry is not None:
+            logger.debug("%s not modified, using cached response", method)
+            return self.cache.to_response(entry, r)
+        self.cache.store(key, r)
         return r
 
     @backoff
-    def post(self, method, data, headers={}, params=None):
-        logger.debug("POST: " + self.endpoint + method)
-        logger.debug("Headers:")
-        logger.debug(headers)
-        logger.debug("Params:")
-        logger.debug(params)
-        logger.debug("Body:")
-        logger.debug(data)
-        if self.use_session:
-            r = self.session.post(self.endpoint + method, data=json.dumps(data), headers=headers, params=params)
-        else:
-            r = requests.post(self.endpoint + method, data=json.dumps(data), headers={**self.headers, **headers}, params=params, auth=self.auth)
-        logger.debug("Response:")
-        logger.debug(r)
-        logger.debug("Response Body:")
-        logger.debug(r.text)
-        if r.status_code != 200:
-            r.reason = r.text
-        r.raise_for_status()
-        return r
+    def post(self, method, data, headers=None, params=None):
+        return self._send('POST', method, params=params, headers=headers, data=json.dumps(data))
 
     @backoff
     def put(self, method, data, headers=None, params=None):
-        logger.debug("PUT: " + self.endpoint + method)
-        logger.debug("Headers:")
-        logger.debug(headers)
-        logger.debug("Params:")
-        logger.debug(params)
-        logger.debug("Body:")
-        logger.debug(data)
-        if self.use_session:
-            r = self.session.put(self.endpoint + method, data=json.dumps(data), headers=headers, params=params)
-        else:
-            r = requests.put(self.endpoint + method, data=json.dumps(data), headers=headers, params=params, auth=self.auth)
-        logger.debug("Response:")
-        logger.debug(r)
-        logger.debug("Response Body:")
-        logger.debug(r.text)
-        if r.status_code != 200:
-            r.reason = r.text
-        r.raise_for_status()
-        return r
+        return self._send('PUT', method, params=params, headers=headers, data=json.dumps(data))
 
     def post_file(self, method, params, headers=None):
         """
@@ -235,53 +288,158 @@ class SumoLogic(object):
         r = self.post('/v1/search/jobs', data)
         return r.json()
 
+    def managed_search_job(self, query, fromTime=None, toTime=None, timeZone='UTC', byReceiptTime=False):
+        """
+        Context manager that starts a search job once self.search_jobs has a free slot and deletes it at the
+        end of the with block, however the block ends:
+
+            with sumo.managed_search_job(query, fromTime=start, toTime=end) as search_job:
+                status = sumo.wait_for_search_job(search_job)
+        """
+        return self.search_jobs.job(self, query, fromTime=fromTime, toTime=toTime, timeZone=timeZone,
+                                    byReceiptTime=byReceiptTime)
+
     def search_job_status(self, search_job):
         r = self.get('/v1/search/jobs/' + str(search_job['id']))
         return r.json()
 
-    def search_job_records_sync(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False):
-        searchjob = self.search_job(query, fromTime=fromTime, toTime=toTime, timeZone=timeZone, byReceiptTime=byReceiptTime)
-        status = self.search_job_status(searchjob)
-        numrecords = status['recordCount']
-        while status['state'] != 'DONE GATHERING RESULTS':
-            if status['state'] == 'CANCELLED':
-                break
-            status = self.search_job_status(searchjob)
-            numrecords = status['recordCount']
-        if status['state'] == 'DONE GATHERING RESULTS':
-            jobrecords=[]
-            iterations = numrecords // 10000 + 1
-
-            for iteration in range(1, iterations + 1):
-                records = self.search_job_records(searchjob, limit=10000,
-                                                  offset=((iteration - 1) * 10000))
-                for record in records['records']:
-                    jobrecords.append(record)
-            return jobrecords   #returns a list
-        else:
+    def wait_for_search_job(self, search_job, on_status=None, until=None):
+        """
+        Poll the job's status until it is done, force paused or cancelled, and return the last status. Waits
+        between polls come from self.polling_strategy (or self.job_poller). on_status, if given, is called with every status,
+        e.g. to report progress, and until(status) can end the wait early. Errors and warnings the job
+        reports along the way are logged.
+        """
+        def poll():
+            status = self.search_job_status(search_job)
+            log_pending(search_job, status)
+            if on_status is not None:
+                on_status(status)
             return status
+        def finished(status):
+            return status['state'] in SEARCH_JOB_FINISHED_STATES or (until is not None and until(status))
+        return self._wait_for_job(poll, finished)
 
-    def search_job_messages_sync(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False):
-        searchjob = self.search_job(query, fromTime=fromTime, toTime=toTime, timeZone=timeZone, byReceiptTime=byReceiptTime)
-        status = self.search_job_status(searchjob)
-        nummessages = status['messageCount']
-        while status['state'] != 'DONE GATHERING RESULTS':
-            if status['state'] == 'CANCELLED':
-                break
-            status = self.search_job_status(searchjob)
-            nummessages = status['messageCount']
-        if status['state'] == 'DONE GATHERING RESULTS':
-            jobmessages=[]
-            iterations = nummessages // 10000 + 1
-
-            for iteration in range(1, iterations + 1):
-                messages = self.search_job_messages(searchjob, limit=10000,
-                                                  offset=((iteration - 1) * 10000))
-                for message in messages['messages']:
-                    jobmessages.append(message)
-            return jobmessages   #returns a list
-        else:
-            return status
+    def _wait_for_job(self, poll, finished):
+        # on the shared poller thread if the client has one, otherwise with a polling loop in this thread
+        if self.job_poller is not None:
+            return self.job_poller.wait(poll, finished)
+        return self.polling_strategy.wait(poll, finished)
+
+    def _wait_for_content_job(self, poll):
+        return self._wait_for_job(poll, lambda status: status['status'] != 'InProgress')
+
+    def search_job_records_sync(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False):
+        try:
+            return list(self.iter_search_records(query, fromTime=fromTime, toTime=toTime, timeZone=timeZone,
+                                                 byReceiptTime=byReceiptTime))   #returns a list
+        except SearchJobError as e:
+            return e.status
+
+    def search_job_messages_sync(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False,
+                                 incremental=False):
+        try:
+            return list(self.iter_search_messages(query, fromTime=fromTime, toTime=toTime, timeZone=timeZone,
+                                                  byReceiptTime=byReceiptTime,
+                                                  incremental=incremental))   #returns a list
+        except SearchJobError as e:
+            return e.status
+
+    def iter_search_messages(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False,
+                             limit=10000, pages=False, concurrency=1, ordered=True, incremental=False):
+        """
+        Run a search job and yield its messages as each page of results is downloaded, so only one page (or
+        concurrency pages, see iter_search_job_message_pages) is held in memory however many results there
+        are. Pass pages=True to get each page as a list instead. The job is deleted when the iterator is
+        exhausted, closed or garbage collected. Raises SearchJobError if the job is cancelled.
+        With incremental=True pages are downloaded as soon as the job has gathered them rather than once it is
+        done, so the first results arrive sooner and the download overlaps with the search.
+        """
+        return self._iter_search_results('messages', query, fromTime, toTime, timeZone, byReceiptTime, limit, pages,
+                                         concurrency, ordered, incremental)
+
+    def iter_search_records(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False,
+                            limit=10000, pages=False, concurrency=1, ordered=True):
+        # records (aggregate results) version of iter_search_messages
+        return self._iter_search_results('records', query, fromTime, toTime, timeZone, byReceiptTime, limit, pages,
+                                         concurrency, ordered, False)
+
+    def iter_search_job_message_pages(self, search_job, total, limit=10000, concurrency=1, ordered=True, offset=0):
+        """
+        Download the messages of a search job that has finished gathering results, a page (list) at a time.
+        total is the messageCount from the job's status. With concurrency > 1 that many pages are downloaded
+        at once and reassembled in offset order, or handed over as they arrive if ordered is False.
+        """
+        def fetch_page(offset):
+            return self.search_job_messages(search_job, limit=limit, offset=offset)['messages']
+        return iter_offset_pages(fetch_page, limit, offset=offset, total=total, concurrency=concurrency,
+                                  ordered=ordered)
+
+    def iter_search_job_record_pages(self, search_job, total, limit=10000, concurrency=1, ordered=True):
+        # records version of iter_search_job_message_pages, total is the job's recordCount
+        def fetch_page(offset):
+            return self.search_job_records(search_job, limit=limit, offset=offset)['records']
+        return iter_offset_pages(fetch_page, limit, total=total, concurrency=concurrency, ordered=ordered)
+
+    def _iter_search_results(self, kind, query, fromTime, toTime, timeZone, byReceiptTime, limit, pages,
+                             concurrency, ordered, incremental):
+        with self.managed_search_job(query, fromTime=fromTime, toTime=toTime, timeZone=timeZone,
+                                     byReceiptTime=byReceiptTime) as searchjob:
+            if incremental:
+                # messages are downloaded while the job is still gathering them
+                results = self._harvest_search_messages(searchjob, limit, concurrency, ordered)
+            else:
+                status = self.wait_for_search_job(searchjob)
+                if status['state'] not in (SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED):
+                    raise SearchJobError(searchjob, status)
+                if kind == 'messages':
+                    results = self.iter_search_job_message_pages(searchjob, status['messageCount'], limit=limit,
+                                                                 concurrency=concurrency, ordered=ordered)
+                else:
+                    results = self.iter_search_job_record_pages(searchjob, status['recordCount'], limit=limit,
+                                                                concurrency=concurrency, ordered=ordered)
+            try:
+                for page in results:
+                    if pages:
+                        yield page
+                    else:
+                        yield from page
+            finally:
+                # stop any page downloads still in flight before the job goes away
+                results.close()
+
+    def _harvest_search_messages(self, search_job, limit, concurrency, ordered):
+        """
+        Yield pages of messages while the job is still gathering them. Each status poll tells how many
+        messages have been gathered so far, and every full page among them is downloaded straight away.
+        Once the job is done the rest (including the last, partial page) is downloaded like in
+        iter_search_job_message_pages. This relies on the job only appending to the messages it has gathered,
+        so a page that has been downloaded stays valid.
+        """
+        offset = 0
+        # a job that was just created has nothing to report yet, see PollingStrategy
+        delay = self.polling_strategy.next_delay(None)
+        while True:
+            time.sleep(delay)
+            status = self.search_job_status(search_job)
+            log_pending(search_job, status)
+            finished = status['state'] in SEARCH_JOB_FINISHED_STATES
+            if finished and status['state'] not in (SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED):
+                raise SearchJobError(search_job, status)
+            if finished:
+                yield from self.iter_search_job_message_pages(search_job, status['messageCount'], limit=limit,
+                                                              concurrency=concurrency, ordered=ordered, offset=offset)
+                return
+            harvested = False
+            while offset + limit <= status['messageCount']:
+                page = self.search_job_messages(search_job, limit=limit, offset=offset)['messages']
+                if not page:
+                    break
+                yield page
+                offset = offset + len(page)
+                harvested = True
+            # the job is producing results quickly if a page was ready, so check again soon
+            delay = self.polling_strategy.next_delay(None if harvested else delay, status)
 
     def search_job_messages(self, search_job, limit=None, offset=0):
         params = {'limit': limit, 'offset': offset}
@@ -310,17 +468,13 @@ class SumoLogic(object):
         r = self.get('/v1/collectors', params)
         return r.json()['collectors']
 
-    def get_collectors_sync(self, limit=1000, filter_type=None):
-        offset = 0
-        results = []
-        r = self.get_collectors(limit=limit, offset=offset, filter_type=filter_type)
-        offset = offset + limit
-        results = results + r
-        while not (len(r) < limit):
-            r = self.get_collectors(limit=limit, offset=offset, filter_type=filter_type)
-            offset = offset + limit
-            results = results + r
-        return results
+    def iter_collectors(self, limit=1000, filter_type=None, concurrency=1):
+        pages = iter_offset_pages(lambda offset: self.get_collectors(limit=limit, offset=offset, filter_type=filter_type),
+                                  limit, concurrency=concurrency)
+        return iter_items(pages)
+
+    def get_collectors_sync(self, limit=1000, filter_type=None, concurrency=1):
+        return list(self.iter_collectors(limit=limit, filter_type=filter_type, concurrency=concurrency))
 
     def get_collector_by_id(self, collector_id):
         r = self.get('/v1/collectors/' + str(collector_id))
@@ -363,17 +517,13 @@ class SumoLogic(object):
         r = self.get('/v1/collectors/' + str(collector_id) + '/sources', params)
         return json.loads(r.text)['sources']
 
-    def get_sources_sync(self, collector_id, limit=1000):
-        offset = 0
-        results = []
-        r = self.get_sources(collector_id, limit=limit, offset=offset)
-        offset = offset + limit
-        results = results + r
-        while not (len(r) < limit):
-            r = self.get_sources(collector_id, limit=limit, offset=offset)
-            offset = offset + limit
-            results = results + r
-        return results
+    def iter_sources(self, collector_id, limit=1000, concurrency=1):
+        pages = iter_offset_pages(lambda offset: self.get_sources(collector_id, limit=limit, offset=offset), limit,
+                                  concurrency=concurrency)
+        return iter_items(pages)
+
+    def get_sources_sync(self, collector_id, limit=1000, concurrency=1):
+        return list(self.iter_sources(collector_id, limit=limit, concurrency=concurrency))
 
     # for backward compatibility with old community API
     def sources(self, collector_id, limit=None, offset=None):
@@ -512,9 +662,7 @@ class SumoLogic(object):
     def get_global_folder_sync(self, adminmode=False):
         r = self.get_global_folder(adminmode=adminmode)
         job_id = str(r['id'])
-        status = self.get_global_folder_job_status(job_id)
-        while status['status'] == 'InProgress':
-            status = self.get_global_folder_job_status(job_id)
+        status = self._wait_for_content_job(lambda: self.get_global_folder_job_status(job_id))
         if status['status'] == 'Success':
             r = self.get_global_folder_job_result(job_id)
             return r
@@ -538,9 +686,7 @@ class SumoLogic(object):
     def get_admin_folder_sync(self, adminmode=True):
         r = self.get_admin_folder(adminmode=adminmode)
         job_id = str(r['id'])
-        status = self.get_admin_folder_job_status(job_id)
-        while status['status'] == 'InProgress':
-            status = self.get_admin_folder_job_status(job_id)
+        status = self._wait_for_content_job(lambda: self.get_admin_folder_job_status(job_id))
         if status['status'] == 'Success':
             r = self.get_admin_folder_job_result(job_id)
             return r
@@ -595,9 +741,8 @@ class SumoLogic(object):
     def delete_content_job_sync(self, item_id, adminmode=False):
         r = self.delete_content_job(str(item_id), adminmode=adminmode)
         job_id = str(r['id'])
-        status = self.get_delete_content_job_status(str(item_id), str(job_id), adminmode=adminmode)
-        while status['status'] == 'InProgress':
-            status = self.get_delete_content_job_status(str(item_id), str(job_id), adminmode=adminmode)
+        status = self._wait_for_content_job(lambda: self.get_delete_content_job_status(str(item_id), str(job_id),
+                                                                                       adminmode=adminmode))
         return status
 
         # for backward compatibility with old community API
@@ -634,9 +779,8 @@ class SumoLogic(object):
     def export_content_job_sync(self, item_id, adminmode=False):
         r = self.export_content_job(str(item_id), adminmode=adminmode)
         job_id = str(r['id'])
-        status = self.get_export_content_job_status(item_id, job_id, adminmode=adminmode)
-        while status['status'] == 'InProgress':
-            status = self.get_export_content_job_status(item_id, job_id, adminmode=adminmode)
+        status = self._wait_for_content_job(lambda: self.get_export_content_job_status(item_id, job_id,
+                                                                                       adminmode=adminmode))
         if status['status'] == 'Success':
             r = self.get_export_content_job_result(item_id, job_id, adminmode=adminmode)
             return r
@@ -657,10 +801,8 @@ class SumoLogic(object):
     def import_content_job_sync(self, folder_id, content, adminmode=False, overwrite=False):
         r = self.import_content_job(str(folder_id), content, adminmode=adminmode, overwrite=overwrite)
         job_id = str(r['id'])
-        status = self.get_import_content_job_status(str(folder_id), str(job_id), adminmode=adminmode)
-        while status['status'] == 'InProgress':
-            time.sleep(1)
-            status = self.get_import_content_job_status(str(folder_id), str(job_id), adminmode=adminmode)
+        status = self._wait_for_content_job(lambda: self.get_import_content_job_status(str(folder_id), str(job_id),
+                                                                                       adminmode=adminmode))
         return status
 
     # Role API
@@ -673,16 +815,14 @@ class SumoLogic(object):
         r = self.get('/v1/roles', params=params)
         return r.json()
 
-    def get_roles_sync(self, limit=1000, sort_by='name', name=''):
-        token = ''
-        results = []
-        while True:
+    def iter_roles(self, limit=1000, sort_by='name', name='', prefetch=0):
+        def fetch_page(token):
             r = self.get_roles(limit=limit, token=token, sort_by=sort_by, name=name)
-            token = r['next']
-            results = results + r['data']
-            if token is None:
-                break
-        return results
+            return r['data'], r['next']
+        return iter_items(iter_token_pages(fetch_page, token='', prefetch=prefetch))
+
+    def get_roles_sync(self, limit=1000, sort_by='name', name='', prefetch=0):
+        return list(self.iter_roles(limit=limit, sort_by=sort_by, name=name, prefetch=prefetch))
 
     def create_role(self, body):
         r = self.post('/v1/roles', body)
@@ -718,16 +858,14 @@ class SumoLogic(object):
         r = self.get('/v1/users', params=params)
         return r.json()
 
-    def get_users_sync(self, limit=1000, sort_by='lastName', email=''):
-        token = ''
-        results = []
-        while True:
+    def iter_users(self, limit=1000, sort_by='lastName', email='', prefetch=0):
+        def fetch_page(token):
             r = self.get_users(limit=limit, token=token, sort_by=sort_by, email=email)
-            token = r['next']
-            results = results + r['data']
-            if token is None:
-                break
-        return results
+            return r['data'], r['next']
+        return iter_items(iter_token_pages(fetch_page, token='', prefetch=prefetch))
+
+    def get_users_sync(self, limit=1000, sort_by='lastName', email='', prefetch=0):
+        return list(self.iter_users(limit=limit, sort_by=sort_by, email=email, prefetch=prefetch))
 
     def get_user(self, user_id):
         r = self.get('/v1/users/' + str(user_id))
@@ -794,16 +932,14 @@ class SumoLogic(object):
         r = self.get('/v1/connections', params=params)
         return r.json()
 
-    def get_connections_sync(self, limit=1000):
-        token = None
-        results = []
-        while True:
+    def iter_connections(self, limit=1000, prefetch=0):
+        def fetch_page(token):
             r = self.get_connections(limit=limit, token=token)
-            token = r['next']
-            results = results + r['data']
-            if token is None:
-                break
-        return results
+            return r['data'], r['next']
+        return iter_items(iter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    def get_connections_sync(self, limit=1000, prefetch=0):
+        return list(self.iter_connections(limit=limit, prefetch=prefetch))
 
     def create_connection(self, connection):
         r = self.post('/v1/connections', connection)
@@ -834,16 +970,14 @@ class SumoLogic(object):
         r = self.get('/v1/extractionRules', params=params)
         return r.json()
 
-    def get_fers_sync(self, limit=1000):
-        token = None
-        results = []
-        while True:
+    def iter_fers(self, limit=1000, prefetch=0):
+        def fetch_page(token):
             r = self.get_fers(limit=limit, token=token)
-            token = r['next']
-            results = results + r['data']
-            if token is None:
-                break
-        return results
+            return r['data'], r['next']
+        return iter_items(iter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    def get_fers_sync(self, limit=1000, prefetch=0):
+        return list(self.iter_fers(limit=limit, prefetch=prefetch))
 
     def create_fer(self, fer):
         r = self.post('/v1/extractionRules', fer)
@@ -875,16 +1009,14 @@ class SumoLogic(object):
         r = self.get('/v1/scheduledViews', params=params)
         return r.json()
 
-    def get_scheduled_views_sync(self, limit=1000):
-        token = None
-        results = []
-        while True:
+    def iter_scheduled_views(self, limit=1000, prefetch=0):
+        def fetch_page(token):
             r = self.get_scheduled_views(limit=limit, token=token)
-            token = r['next']
-            results = results + r['data']
-            if token is None:
-                break
-        return results
+            return r['data'], r['next']
+        return iter_items(iter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    def get_scheduled_views_sync(self, limit=1000, prefetch=0):
+        return list(self.iter_scheduled_views(limit=limit, prefetch=prefetch))
 
     #start time must be in RFC3339 format
     # https://tools.ietf.org/html/rfc3339
@@ -919,16 +1051,14 @@ class SumoLogic(object):
         r = self.get('/v1/partitions', params=params)
         return r.json()
 
-    def get_partitions_sync(self, limit=1000):
-        token = None
-        results = []
-        while True:
+    def iter_partitions(self, limit=1000, prefetch=0):
+        def fetch_page(token):
             r = self.get_partitions(limit=limit, token=token)
-            token = r['next']
-            results = results + r['data']
-            if token is None:
-                break
-        return results
+            return r['data'], r['next']
+        return iter_items(iter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    def get_partitions_sync(self, limit=1000, prefetch=0):
+        return list(self.iter_partitions(limit=limit, prefetch=prefetch))
 
     def create_partition(self, item):
         r = self.post('/v1/partitions', item)
@@ -1014,17 +1144,13 @@ class SumoLogic(object):
         r = self.get('/v1/monitors/search', params=params)
         return r.json()
 
-    def search_monitors_sync(self, query, limit=100):
-        offset = 0
-        results = []
-        r = self.search_monitors(query, limit=limit, offset=offset)
-        offset = offset + limit
-        results = results + r
-        while not (len(r) < limit):
-            r = self.search_monitors(query, limit=limit, offset=offset)
-            offset = offset + limit
-            results = results + r
-        return results
+    def iter_monitors(self, query, limit=100, concurrency=1):
+        pages = iter_offset_pages(lambda offset: self.search_monitors(query, limit=limit, offset=offset), limit,
+                                  concurrency=concurrency)
+        return iter_items(pages)
+
+    def search_monitors_sync(self, query, limit=100, concurrency=1):
+        return list(self.iter_monitors(query, limit=limit, concurrency=concurrency))
 
     def get_monitor(self, item_id):
         r = self.get('/v1/monitors/' + str(item_id))
@@ -1163,16 +1289,14 @@ class SumoLogic(object):
         r = self.get('/sec/v1/rules', params=params)
         return r.json()
 
-    def get_rules_sync(self, query, limit=50, expand=[]):
-        offset = 0
-        results = []
-        while True:
+    def iter_rules(self, query, limit=50, expand=[]):
+        def fetch_page(offset):
             r = self.get_rules(query, limit=limit, offset=offset, expand=expand)
-            offset = offset + limit
-            results = results + r['data']['objects']
-            if not r['data']['hasNextPage']:
-                break
-        return results
+            return r['data']['objects'], r['data']['hasNextPage']
+        return iter_items(iter_has_next_pages(fetch_page, limit))
+
+    def get_rules_sync(self, query, limit=50, expand=[]):
+        return list(self.iter_rules(query, limit=limit, expand=expand))
 
     def get_rule(self, item_id, expand=[]):
         params = {'expand': expand}
@@ -1210,16 +1334,14 @@ class SumoLogic(object):
         r = self.get('/sec/v1/custom-insights', params=params)
         return r.json()
 
-    def get_custom_insights_sync(self, limit=50):
-        offset = 0
-        results = []
-        while True:
+    def iter_custom_insights(self, limit=50):
+        def fetch_page(offset):
             r = self.get_custom_insights(limit=limit, offset=offset)
-            offset = offset + limit
-            results = results + r['data']['objects']
-            if not r['data']['hasNextPage']:
-                break
-        return results
+            return r['data']['objects'], r['data']['hasNextPage']
+        return iter_items(iter_has_next_pages(fetch_page, limit))
+
+    def get_custom_insights_sync(self, limit=50):
+        return list(self.iter_custom_insights(limit=limit))
 
     def get_custom_insight(self, item_id):
         custom_insights = self.get_custom_insights_sync()
@@ -1255,28 +1377,17 @@ class SumoLogic(object):
         r = self.get('/sec/v1/log-mappings', params=params)
         return r.json()
 
-    def get_log_mappings_sync(self, query, limit=50):
-        offset = 0
-        results = []
-        while True:
+    def iter_log_mappings(self, query, limit=50):
+        def fetch_page(offset):
             r = self.get_log_mappings(query, limit=limit, offset=offset)
-            offset = offset + limit
-            results = results + r['data']['objects']
-            if not r['data']['hasNextPage']:
-                break
-        return results
+            return r['data']['objects'], r['data']['hasNextPage']
+        return iter_items(iter_has_next_pages(fetch_page, limit))
+
+    def get_log_mappings_sync(self, query, limit=50):
+        return list(self.iter_log_mappings(query, limit=limit))
 
     def get_custom_log_mappings_sync(self, limit=50):
-        query = 'isCustom:True'
-        offset = 0
-        results = []
-        while True:
-            r = self.get_log_mappings(query, limit=limit, offset=offset)
-            offset = offset + limit
-            results = results + r['data']['objects']
-            if not r['data']['hasNextPage']:
-                break
-        return results
+        return list(self.iter_log_mappings('isCustom:True', limit=limit))
 
     def get_log_mapping(self, item_id):
         r = self.get('/sec/v1/log-mappings/' + str(item_id))
@@ -1300,16 +1411,14 @@ class SumoLogic(object):
         r = self.get('/v1/accessKeys', params=params)
         return r.json()
 
-    def get_access_keys_sync(self, limit=100):
-        token = None
-        results = []
-        while True:
+    def iter_access_keys(self, limit=100, prefetch=0):
+        def fetch_page(token):
             r = self.get_access_keys(limit=limit, token=token)
-            token = r['next']
-            results = results + r['data']
-            if token is None:
-                break
-        return results
+            return r['data'], r['next']
+        return iter_items(iter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    def get_access_keys_sync(self, limit=100, prefetch=0):
+        return list(self.iter_access_keys(limit=limit, prefetch=prefetch))
 
     def create_access_key(self, label, cors_headers=None):
         data = {'label': str(label)}
@@ -0,0 +1,1508 @@
+import asyncio
+import json
+import os
+import logging
+import ssl
+import time
+import urllib.parse
+import warnings
+import requests
+from requests.structures import CaseInsensitiveDict
+from logzero import logger
+import logzero
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+from . import sumologic, sumologic_cse
+from .sumologic import SearchJobError
+from .ratelimit import get_rate_limiter
+from .retry import RetryPolicy, async_backoff
+from .hooks import RequestEvent, dispatch
+from .endpoints import DEFAULT_ENDPOINT, get_endpoint_resolver, endpoint_from_probe
+from .polling import PollingStrategy, log_pending
+from .polling import SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED, SEARCH_JOB_FINISHED_STATES
+from .pagination import aiter_offset_pages, aiter_has_next_pages, aiter_token_pages, aiter_items
+
+
+# The asyncio clients in this module mirror SumoLogic and SumoLogicCSE method for method, with every API call
+# (including the *_sync pagination and job helpers) turned into a coroutine. They need aiohttp, which is an
+# optional dependency: pip install aiohttp
+#
+#     async with AsyncSumoLogic(access_id, access_key, endpoint) as sumo:
+#         collectors = await sumo.get_collectors_sync()
+#
+# Responses are read fully before they are returned, so r.json(), r.text and r.headers work as they do with
+# requests, and failures raise the same requests.HTTPError/ConnectionError/Timeout exceptions as the
+# blocking clients. Rate limiting, retries and hooks behave the same as well, and share their state with
+# blocking clients using the same credentials.
+
+# Sumo Logic allows 10 concurrent requests per access key
+MAX_CONNECTIONS = 10
+
+
+class AsyncResponse(object):
+    """The parts of requests.Response that the API methods use, built from a fully read aiohttp response."""
+
+    def __init__(self, status_code, headers, url, content, encoding=None, reason=None):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.url = url
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.reason = reason
+
+    def __repr__(self):
+        return '<AsyncResponse [{0}]>'.format(self.status_code)
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            kind = 'Client' if self.status_code < 500 else 'Server'
+            raise requests.HTTPError('{0} {1} Error: {2} for url: {3}'.format(self.status_code, kind, self.reason,
+                                                                              self.url), response=self)
+
+
+def _query_params(params):
+    # requests drops None values and repeats the key for list values; aiohttp does neither
+    if not params:
+        return None
+    query = []
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            query.extend((key, str(v)) for v in value)
+        else:
+            query.append((key, str(value)))
+    return query
+
+
+class _AsyncClient(object):
+    # transport shared by AsyncSumoLogic and AsyncSumoLogicCSE
+
+    def __init__(self, endpoint, headers, auth, log_level, log_file, caBundle, rate_limiter, retry_policy,
+                 hooks, max_connections, timeout):
+        if aiohttp is None:
+            raise ImportError('The asyncio Sumo Logic clients require aiohttp. Install it with "pip install aiohttp".')
+        self.session = None
+        self.log_level = log_level
+        self.set_log_level(self.log_level)
+        if log_file:
+            logzero.logfile(str(log_file))
+        self.headers = headers
+        self.auth = auth
+        self.caBundle = caBundle
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.hooks = list(hooks or [])
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.endpoint = endpoint
+        if self.endpoint is not None:
+            self.endpoint = self._normalize_endpoint(self.endpoint)
+
+    @staticmethod
+    def _normalize_endpoint(endpoint):
+        if endpoint[-4:] == "/v1":
+            endpoint = endpoint[:-4]
+            warnings.warn('Endpoint should no longer end in "/v1/", it has been removed from your endpoint string.',
+                          DeprecationWarning)
+        if endpoint[-1:] == "/":
+            endpoint = endpoint[:-1]
+            warnings.warn(
+                "Endpoint should not end with a slash character, it has been removed from your endpoint string.")
+        return endpoint
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        # The aiohttp session has to be created inside a running event loop, so it is set up here rather
+        # than in __init__. Called automatically by the first request if you don't use "async with".
+        if self.session is None:
+            ssl_context = ssl.create_default_context(cafile=self.caBundle) if self.caBundle else None
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ssl=ssl_context)
+            self.session = aiohttp.ClientSession(headers=self.headers,
+                                                 auth=self.auth,
+                                                 connector=connector,
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+        if self.endpoint is None:
+            try:
+                self.endpoint = await self._get_endpoint()
+            except Exception:
+                # "async with" doesn't call __aexit__ when opening fails
+                await self.close()
+                raise
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _get_endpoint(self):
+        raise ValueError('An endpoint is required')
+
+    def set_log_level(self, log_level):
+        if log_level == 'info':
+            self.log_level = log_level
+            logzero.loglevel(level=20)
+            return True
+        elif log_level == 'debug':
+            self.log_level = log_level
+            logzero.loglevel(level=10)
+            logger.debug("[Sumologic SDK] Setting logging level to 'debug'")
+            return True
+        else:
+            raise Exception("Bad Logging Level")
+
+    def get_log_level(self):
+        return self.log_level
+
+    def get_versioned_endpoint(self, version):
+        return self.endpoint+'/%s' % version
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    async def _fetch(self, http_method, url, params=None, headers=None, data=None):
+        try:
+            async with self.session.request(http_method, url, params=_query_params(params), headers=headers,
+                                            data=data) as resp:
+                content = await resp.read()
+                return AsyncResponse(resp.status, resp.headers, str(resp.url), content, resp.charset, resp.reason)
+        except asyncio.TimeoutError as e:
+            raise requests.Timeout('{0} {1} timed out'.format(http_method, url)) from e
+        except aiohttp.ClientConnectorError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except aiohttp.ClientError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    async def _send(self, http_method, method, params=None, headers=None, data=None):
+        if self.session is None or self.endpoint is None:
+            await self.open()
+        url = self.endpoint + method
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("%s: %s\nHeaders: %s\nParams: %s\nBody: %s", http_method, url, headers, params, data)
+        if self.rate_limiter:
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        event = None
+        if self.hooks:
+            event = RequestEvent(http_method, method)
+            dispatch(self.hooks, 'on_request', event)
+        start = time.perf_counter()
+        try:
+            r = await self._fetch(http_method, url, params=params, headers=headers, data=data)
+        except requests.RequestException as e:
+            if event is not None:
+                event.latency = time.perf_counter() - start
+                event.exception = e
+                dispatch(self.hooks, 'on_response', event)
+            raise
+        if debug:
+            logger.debug("Response: %s\nResponse Body: %s", r, r.text)
+        if r.status_code != 200:
+            r.reason = r.text
+        if event is not None:
+            event.latency = time.perf_counter() - start
+            event.status = r.status_code
+            event.bytes = len(r.content)
+            dispatch(self.hooks, 'on_response', event)
+        r.raise_for_status()
+        return r
+
+    @async_backoff
+    async def delete(self, method, params=None, headers=None, data=None):
+        return await self._send('DELETE', method, params=params, headers=headers, data=data)
+
+    @async_backoff
+    async def get(self, method, params=None, headers=None):
+        return await self._send('GET', method, params=params, headers=headers)
+
+    @async_backoff
+    async def post(self, method, data, headers=None, params=None):
+        return await self._send('POST', method, params=params, headers=headers, data=json.dumps(data))
+
+    @async_backoff
+    async def put(self, method, data, headers=None, params=None):
+        return await self._send('PUT', method, params=params, headers=headers, data=json.dumps(data))
+
+    async def post_file(self, method, params, headers=None):
+        # aiohttp sets the multipart boundary itself, so the session's content-type is dropped for this call
+        post_params = {'merge': params['merge']}
+        with open(params['full_file_path'], 'rb') as f:
+            file_data = f.read()
+        form = aiohttp.FormData()
+        form.add_field('file', file_data, filename=params['file_name'])
+        headers = {**self.headers, **(headers or {})}
+        headers.pop('content-type', None)
+        async with aiohttp.ClientSession(auth=self.auth, headers=headers) as upload_session:
+            async with upload_session.post(self.endpoint + method, data=form, params=_query_params(post_params)) as resp:
+                content = await resp.read()
+                r = AsyncResponse(resp.status, resp.headers, str(resp.url), content, resp.charset, resp.reason)
+        if 400 <= r.status_code < 600:
+            r.reason = r.text
+        r.raise_for_status()
+        return r
+
+
+class AsyncSumoLogic(_AsyncClient):
+    def __init__(self, access_id, access_key, endpoint=None, log_level='info', log_file=None, caBundle=None,
+                 rate_limiter=None, retry_policy=None, hooks=None, metrics=None, max_connections=MAX_CONNECTIONS,
+                 timeout=300, polling_strategy=None):
+        self.access_key = access_key
+        self.polling_strategy = polling_strategy or PollingStrategy()
+        self.access_id = access_id
+        if rate_limiter is None:
+            rate_limiter = get_rate_limiter(('sumologic', access_id), sumologic.NUMBER_OF_CALLS / sumologic.PERIOD,
+                                            sumologic.NUMBER_OF_CALLS)
+        if retry_policy is None:
+            retry_policy = RetryPolicy(max_tries=sumologic.MAX_TRIES,
+                                       base_delay=sumologic.PERIOD / sumologic.NUMBER_OF_CALLS * 2)
+        hooks = list(hooks or [])
+        self.metrics = metrics
+        if metrics is not None:
+            hooks.append(metrics)
+        super().__init__(endpoint,
+                         {'content-type': 'application/json', 'accept': 'application/json'},
+                         aiohttp.BasicAuth(access_id, access_key) if aiohttp else None,
+                         log_level, log_file, caBundle, rate_limiter, retry_policy, hooks, max_connections, timeout)
+
+    async def _get_endpoint(self):
+        # see SumoLogic._get_endpoint, the default endpoint redirects to the one for the org's deployment and
+        # the answer is cached on disk per access ID
+        resolver = get_endpoint_resolver()
+        endpoint = resolver.get(self.access_id)
+        if endpoint is None:
+            async with self.session.get(DEFAULT_ENDPOINT + '/v1/collectors') as resp:
+                # a failed probe must not be cached as the endpoint, see endpoint_from_probe
+                response = AsyncResponse(resp.status, resp.headers, str(resp.url), b'', reason=resp.reason)
+                endpoint = endpoint_from_probe(response, DEFAULT_ENDPOINT)
+            resolver.set(self.access_id, endpoint)
+        logger.info("SDK Endpoint {}".format(str(endpoint)))
+        return endpoint
+
+    # Search API
+
+    async def search_job(self, query, fromTime=None, toTime=None, timeZone='UTC', byReceiptTime=False):
+        data = {'query': str(query), 'from': str(fromTime), 'to': str(toTime), 'timeZone': str(timeZone), 'byReceiptTime': str(byReceiptTime).lower()}
+        r = await self.post('/v1/search/jobs', data)
+        return r.json()
+
+    async def search_job_status(self, search_job):
+        r = await self.get('/v1/search/jobs/' + str(search_job['id']))
+        return r.json()
+
+    async def wait_for_search_job(self, search_job, on_status=None, until=None):
+        # see SumoLogic.wait_for_search_job
+        async def poll():
+            status = await self.search_job_status(search_job)
+            log_pending(search_job, status)
+            if on_status is not None:
+                on_status(status)
+            return status
+        def finished(status):
+            return status['state'] in SEARCH_JOB_FINISHED_STATES or (until is not None and until(status))
+        return await self.polling_strategy.async_wait(poll, finished)
+
+    async def _wait_for_content_job(self, poll):
+        return await self.polling_strategy.async_wait(poll, lambda status: status['status'] != 'InProgress')
+
+    async def search_job_records_sync(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False):
+        try:
+            return [record async for record in self.iter_search_records(query, fromTime=fromTime, toTime=toTime,
+                                                                        timeZone=timeZone,
+                                                                        byReceiptTime=byReceiptTime)]
+        except SearchJobError as e:
+            return e.status
+
+    async def search_job_messages_sync(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False,
+                                       incremental=False):
+        try:
+            return [message async for message in self.iter_search_messages(query, fromTime=fromTime, toTime=toTime,
+                                                                           timeZone=timeZone,
+                                                                           byReceiptTime=byReceiptTime,
+                                                                           incremental=incremental)]
+        except SearchJobError as e:
+            return e.status
+
+    def iter_search_messages(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False,
+                             limit=10000, pages=False, concurrency=1, ordered=True, incremental=False):
+        # see SumoLogic.iter_search_messages, use with async for
+        return self._iter_search_results('messages', query, fromTime, toTime, timeZone, byReceiptTime, limit, pages,
+                                         concurrency, ordered, incremental)
+
+    def iter_search_records(self, query, fromTime=None, toTime=None, timeZone=None, byReceiptTime=False,
+                            limit=10000, pages=False, concurrency=1, ordered=True):
+        return self._iter_search_results('records', query, fromTime, toTime, timeZone, byReceiptTime, limit, pages,
+                                         concurrency, ordered, False)
+
+    def iter_search_job_message_pages(self, search_job, total, limit=10000, concurrency=1, ordered=True, offset=0):
+        # see SumoLogic.iter_search_job_message_pages, use with async for
+        async def fetch_page(offset):
+            return (await self.search_job_messages(search_job, limit=limit, offset=offset))['messages']
+        return aiter_offset_pages(fetch_page, limit, offset=offset, total=total, concurrency=concurrency,
+                                   ordered=ordered)
+
+    def iter_search_job_record_pages(self, search_job, total, limit=10000, concurrency=1, ordered=True):
+        async def fetch_page(offset):
+            return (await self.search_job_records(search_job, limit=limit, offset=offset))['records']
+        return aiter_offset_pages(fetch_page, limit, total=total, concurrency=concurrency, ordered=ordered)
+
+    async def _iter_search_results(self, kind, query, fromTime, toTime, timeZone, byReceiptTime, limit, pages,
+                                   concurrency, ordered, incremental):
+        searchjob = await self.search_job(query, fromTime=fromTime, toTime=toTime, timeZone=timeZone,
+                                          byReceiptTime=byReceiptTime)
+        results = None
+        try:
+            if incremental:
+                # messages are downloaded while the job is still gathering them
+                results = self._harvest_search_messages(searchjob, limit, concurrency, ordered)
+            else:
+                status = await self.wait_for_search_job(searchjob)
+                if status['state'] not in (SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED):
+                    raise SearchJobError(searchjob, status)
+                if kind == 'messages':
+                    results = self.iter_search_job_message_pages(searchjob, status['messageCount'], limit=limit,
+                                                                 concurrency=concurrency, ordered=ordered)
+                else:
+                    results = self.iter_search_job_record_pages(searchjob, status['recordCount'], limit=limit,
+                                                                concurrency=concurrency, ordered=ordered)
+            async for page in results:
+                if pages:
+                    yield page
+                else:
+                    for item in page:
+                        yield item
+        finally:
+            if results is not None:
+                await results.aclose()
+            await self._discard_search_job(searchjob)
+
+    async def _harvest_search_messages(self, search_job, limit, concurrency, ordered):
+        # see SumoLogic._harvest_search_messages
+        offset = 0
+        delay = self.polling_strategy.next_delay(None)
+        while True:
+            await asyncio.sleep(delay)
+            status = await self.search_job_status(search_job)
+            log_pending(search_job, status)
+            finished = status['state'] in SEARCH_JOB_FINISHED_STATES
+            if finished and status['state'] not in (SEARCH_JOB_DONE, SEARCH_JOB_FORCE_PAUSED):
+                raise SearchJobError(search_job, status)
+            if finished:
+                async for page in self.iter_search_job_message_pages(search_job, status['messageCount'], limit=limit,
+                                                                     concurrency=concurrency, ordered=ordered,
+                                                                     offset=offset):
+                    yield page
+                return
+            harvested = False
+            while offset + limit <= status['messageCount']:
+                page = (await self.search_job_messages(search_job, limit=limit, offset=offset))['messages']
+                if not page:
+                    break
+                yield page
+                offset = offset + len(page)
+                harvested = True
+            delay = self.polling_strategy.next_delay(None if harvested else delay, status)
+
+    async def _discard_search_job(self, search_job):
+        try:
+            await self.delete_search_job(search_job)
+        except requests.RequestException as e:
+            logger.warning("Could not delete search job {0}: {1}".format(search_job['id'], e))
+
+    async def search_job_messages(self, search_job, limit=None, offset=0):
+        params = {'limit': limit, 'offset': offset}
+        r = await self.get('/v1/search/jobs/' + str(search_job['id']) + '/messages', params)
+        return r.json()
+
+    async def search_job_records(self, search_job, limit=None, offset=0):
+        params = {'limit': limit, 'offset': offset}
+        r = await self.get('/v1/search/jobs/' + str(search_job['id']) + '/records', params)
+        return r.json()
+
+    async def delete_search_job(self, search_job):
+        r = await self.delete('/v1/search/jobs/' + str(search_job['id']))
+        return r.json()
+
+    # Collectors API
+
+    # included for backwards compatibility with older community SDK
+    async def collectors(self, limit=None, offset=None, filter_type=None):
+        return await self.get_collectors(limit=limit, offset=offset)
+
+    async def get_collectors(self, limit=1000, offset=None, filter_type=None):
+        params = {'limit': limit, 'offset': offset}
+        if filter_type:
+            params['filter'] = filter_type
+        r = await self.get('/v1/collectors', params)
+        return r.json()['collectors']
+
+    def iter_collectors(self, limit=1000, filter_type=None, concurrency=1):
+        pages = aiter_offset_pages(lambda offset: self.get_collectors(limit=limit, offset=offset, filter_type=filter_type),
+                                   limit, concurrency=concurrency)
+        return aiter_items(pages)
+
+    async def get_collectors_sync(self, limit=1000, filter_type=None, concurrency=1):
+        return [item async for item in
+                self.iter_collectors(limit=limit, filter_type=filter_type, concurrency=concurrency)]
+
+    async def get_collector_by_id(self, collector_id):
+        r = await self.get('/v1/collectors/' + str(collector_id))
+        return r.json()['collector'], r.headers['etag']
+
+    # The following calls the Sumo "get collector by name" method which does not support special characters like ; / % \
+    async def get_collector_by_name(self, name):
+        encoded_name = urllib.parse.quote(str(name))
+        r = await self.get('/v1/collectors/name/' + encoded_name)
+        return r.json()['collector'], r.headers['etag']
+
+    # this version makes multiple calls but should work with special characters in the collector name
+    async def get_collector_by_name_alternate(self, name):
+        sumocollectors = await self.get_collectors_sync()
+        for sumocollector in sumocollectors:
+            if sumocollector['name'] == str(name):
+                collector, _ = await self.get_collector_by_id(sumocollector['id'])
+                return collector
+
+    # for backward compatibility with old community API
+    async def collector(self, collector_id):
+        r = await self.get('/collectors/' + str(collector_id))
+        return r.json(), r.headers['etag']
+
+    async def create_collector(self, collector, headers=None):
+        r = await self.post('/v1/collectors', collector, headers)
+        return r.json()
+
+    async def update_collector(self, collector, etag):
+        headers = {'If-Match': etag}
+        r = await self.put('/v1/collectors/' + str(collector['collector']['id']), collector, headers)
+        return r.json()
+
+    async def delete_collector(self, collector_id):
+        r = await self.delete('/v1/collectors/' + str(collector_id))
+        return r
+
+    async def get_sources(self, collector_id, limit=None, offset=None):
+        params = {'limit': limit, 'offset': offset}
+        r = await self.get('/v1/collectors/' + str(collector_id) + '/sources', params)
+        return json.loads(r.text)['sources']
+
+    def iter_sources(self, collector_id, limit=1000, concurrency=1):
+        pages = aiter_offset_pages(lambda offset: self.get_sources(collector_id, limit=limit, offset=offset), limit,
+                                   concurrency=concurrency)
+        return aiter_items(pages)
+
+    async def get_sources_sync(self, collector_id, limit=1000, concurrency=1):
+        return [item async for item in self.iter_sources(collector_id, limit=limit, concurrency=concurrency)]
+
+    # for backward compatibility with old community API
+    async def sources(self, collector_id, limit=None, offset=None):
+        return await self.get_sources(collector_id, limit=limit, offset=offset)
+
+    async def get_source(self, collector_id, source_id):
+        r = await self.get('/v1/collectors/' + str(collector_id) + '/sources/' + str(source_id))
+        return r.json()
+
+    async def get_source_with_etag(self, collector_id, source_id):
+        r = await self.get('/v1/collectors/' + str(collector_id) + '/sources/' + str(source_id))
+        return r.headers.get('etag'), r.json()
+
+    # for backward compatibility with old community API
+    async def source(self, collector_id, source_id):
+        return await self.get_source(collector_id, source_id)
+
+    async def create_source(self, collector_id, source):
+        r = await self.post('/v1/collectors/' + str(collector_id) + '/sources', source)
+        return r.json()
+
+    async def update_source(self, collector_id, source, etag):
+        headers = {'If-Match': etag}
+        r = await self.put('/v1/collectors/' + str(collector_id) + '/sources/' + str(source['source']['id']), source, headers)
+        return r.json()
+
+    async def delete_source(self, collector_id, source_id):
+        r = await self.delete('/v1/collectors/' + str(collector_id) + '/sources/' + str(source_id))
+        return r
+
+    async def get_available_builds(self):
+        r = await self.get('/v1/collectors/upgrades/targets')
+        return r.json()['targets']
+
+    # Permissions API
+
+    async def get_permissions(self, id, explicit_only=False, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        params = {'explicitOnly': bool(explicit_only)}
+        r = await self.get('/v2/content/' + str(id) + '/permissions', headers=headers, params=params)
+        return r.json()
+
+    async def add_permissions(self, id, body, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.put('/v2/content/' + str(id) + '/permissions/add', body, headers=headers)
+        return r.json()
+
+    async def remove_permissions(self, id, body, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.put('/v2/content/' + str(id) + '/permissions/remove', body, headers=headers)
+        return r.json()
+
+        # Folder API
+
+    async def create_folder(self, folder_name, parent_id, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        data = {'name': str(folder_name), 'parentId': str(parent_id)}
+        r = await self.post('/v2/content/folders', data, headers=headers)
+        return r.json()
+
+    async def get_folder(self, folder_id, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.get('/v2/content/folders/' + str(folder_id), headers=headers)
+        return r.json()
+
+    async def update_folder(self, id, name, description='', adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        data = {'name': str(name), 'description': str(description)}
+        r = await self.put('/v2/content/folders/' + str(id), data, headers=headers)
+        return r.json()
+
+    async def get_personal_folder(self):
+        r = await self.get('/v2/content/folders/personal')
+        return r.json()
+
+    async def get_global_folder_job_status(self, job_id):
+        r = await self.get('/v2/content/folders/global/' + str(job_id) + '/status')
+        return r.json()
+
+    async def get_global_folder(self, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.get('/v2/content/folders/global', headers=headers)
+        return r.json()
+
+    async def get_global_folder_job_result(self, job_id):
+        r = await self.get('/v2/content/folders/global/' + str(job_id) + '/result')
+        return r.json()
+
+    async def get_global_folder_sync(self, adminmode=False):
+        r = await self.get_global_folder(adminmode=adminmode)
+        job_id = str(r['id'])
+        status = await self._wait_for_content_job(lambda: self.get_global_folder_job_status(job_id))
+        if status['status'] == 'Success':
+            r = await self.get_global_folder_job_result(job_id)
+            return r
+        else:
+            return status
+
+    async def get_admin_folder_job_status(self, job_id):
+
+        r = await self.get('/v2/content/folders/adminRecommended/' + str(job_id) + '/status')
+        return r.json()
+
+    async def get_admin_folder(self, adminmode=True):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.get('/v2/content/folders/adminRecommended', headers=headers)
+        return r.json()
+
+    async def get_admin_folder_job_result(self, job_id):
+        r = await self.get('/v2/content/folders/adminRecommended/' + str(job_id) + '/result')
+        return r.json()
+
+    async def get_admin_folder_sync(self, adminmode=True):
+        r = await self.get_admin_folder(adminmode=adminmode)
+        job_id = str(r['id'])
+        status = await self._wait_for_content_job(lambda: self.get_admin_folder_job_status(job_id))
+        if status['status'] == 'Success':
+            r = await self.get_admin_folder_job_result(job_id)
+            return r
+        else:
+            return status
+
+    # Application API
+
+    async def install_app(self, app_id, content):
+        return await self.post('/apps/%s/install' % (app_id), params=content)
+
+    async def check_app_install_status(self, job_id):
+        return await self.get('/apps/install/%s/status' % job_id)
+
+        # Content API
+
+        # for backward compatibility with old community API
+
+    async def get_content(self, path):
+        return await self.get_content_by_path(path)
+
+    async def get_content_by_path(self, item_path, adminmode=False):
+        # item_path should start with /Library and use the user's email address if referencing a user home dir
+        # firstname + :space: + lastname will not work here, even though that's how it's displayed in the UI
+        # YES: "/Library/Users/user@demo.com/someItemOrFolder" could be a valid path
+        # NO: "/Library/Users/Demo User/someItemOrFolder" is not a valid path because user first/last names are not
+        # unique identifiers
+        headers = {'isAdminMode': str(adminmode).lower()}
+        params = {'path': str(item_path)}
+        r = await self.get('/v2/content/path', params=params, headers=headers)
+        return r.json()
+
+    async def get_item_path(self, item_id):
+        r = await self.get('/v2/content/' + str(item_id) + '/path')
+        return r.json()
+
+    async def delete_content_job(self, item_id, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.delete('/v2/content/' + str(item_id) + '/delete', headers=headers)
+        return r.json()
+
+        # for backward compatibility with old community API
+
+    async def check_delete_status(self, item_id, job_id, adminmode=False):
+        return await self.get_delete_content_job_status(item_id, job_id, adminmode=adminmode)
+
+    async def get_delete_content_job_status(self, item_id, job_id, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.get('/v2/content/' + str(item_id) + '/delete/' + str(job_id) + '/status', headers=headers)
+        return r.json()
+
+    async def delete_content_job_sync(self, item_id, adminmode=False):
+        r = await self.delete_content_job(str(item_id), adminmode=adminmode)
+        job_id = str(r['id'])
+        status = await self._wait_for_content_job(lambda: self.get_delete_content_job_status(str(item_id), str(job_id),
+                                                                                             adminmode=adminmode))
+        return status
+
+        # for backward compatibility with old community API
+
+    async def export_content(self, item_id, adminmode=False):
+        return await self.export_content_job(item_id, adminmode=adminmode)
+
+    async def export_content_job(self, item_id, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        data = {}
+        r = await self.post('/v2/content/' + str(item_id) + '/export', data, headers=headers)
+        return r.json()
+
+        # for backward compatibility with old community API
+
+    async def check_export_status(self, item_id, job_id, adminmode=False):
+        return await self.get_export_content_job_status(item_id, job_id, adminmode=adminmode)
+
+    async def get_export_content_job_status(self, item_id, job_id, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.get('/v2/content/' + str(item_id) + '/export/' + str(job_id) + '/status', headers=headers)
+        return r.json()
+
+        # for backward compatibility with old community API
+
+    async def get_export_content_result(self, item_id, job_id, adminmode=False):
+        return await self.get_export_content_job_result(item_id, job_id, adminmode=adminmode)
+
+    async def get_export_content_job_result(self, item_id, job_id, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.get('/v2/content/' + str(item_id) + '/export/' + str(job_id) + '/result', headers=headers)
+        return r.json()
+
+    async def export_content_job_sync(self, item_id, adminmode=False):
+        r = await self.export_content_job(str(item_id), adminmode=adminmode)
+        job_id = str(r['id'])
+        status = await self._wait_for_content_job(lambda: self.get_export_content_job_status(item_id, job_id,
+                                                                                             adminmode=adminmode))
+        if status['status'] == 'Success':
+            r = await self.get_export_content_job_result(item_id, job_id, adminmode=adminmode)
+            return r
+        else:
+            return status
+
+    async def import_content_job(self, folder_id, content, adminmode=False, overwrite=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        params = {'overwrite': str(overwrite).lower()}
+        r = await self.post('/v2/content/folders/' + str(folder_id) + '/import', content, headers=headers, params=params)
+        return r.json()
+
+    async def get_import_content_job_status(self, folder_id, job_id, adminmode=False):
+        headers = {'isAdminMode': str(adminmode).lower()}
+        r = await self.get('/v2/content/folders/' + str(folder_id) + '/import/' + str(job_id) + '/status', headers=headers)
+        return r.json()
+
+    async def import_content_job_sync(self, folder_id, content, adminmode=False, overwrite=False):
+        r = await self.import_content_job(str(folder_id), content, adminmode=adminmode, overwrite=overwrite)
+        job_id = str(r['id'])
+        status = await self._wait_for_content_job(lambda: self.get_import_content_job_status(str(folder_id), str(job_id),
+                                                                                             adminmode=adminmode))
+        return status
+
+    # Role API
+
+    async def get_roles(self, limit=1000, token='', sort_by='name', name=''):
+        if name != '':
+            params = {'limit': int(limit), 'token': str(token), 'sortBy': str(sort_by), 'name': str(name)}
+        else:
+            params = {'limit': int(limit), 'token': str(token), 'sortBy': str(sort_by)}
+        r = await self.get('/v1/roles', params=params)
+        return r.json()
+
+    def iter_roles(self, limit=1000, sort_by='name', name='', prefetch=0):
+        async def fetch_page(token):
+            r = await self.get_roles(limit=limit, token=token, sort_by=sort_by, name=name)
+            return r['data'], r['next']
+        return aiter_items(aiter_token_pages(fetch_page, token='', prefetch=prefetch))
+
+    async def get_roles_sync(self, limit=1000, sort_by='name', name='', prefetch=0):
+        return [item async for item in self.iter_roles(limit=limit, sort_by=sort_by, name=name, prefetch=prefetch)]
+
+    async def create_role(self, body):
+        r = await self.post('/v1/roles', body)
+        return r.json()
+
+    async def get_role(self, id):
+        r = await self.get('/v1/roles/' + str(id))
+        return r.json()
+
+    async def update_role(self, id, body):
+        r = await self.put('/v1/roles/' + str(id), body)
+        return r.json()
+
+    async def delete_role(self, id):
+        r = await self.delete('/v1/roles/' + str(id))
+        return r
+
+    async def assign_role_to_user(self, role_id, user_id):
+        r = await self.put('/v1/roles/' + str(role_id) + '/users/' + str(user_id))
+        return r.json()
+
+    async def remove_role_from_user(self, role_id, user_id):
+        r = await self.delete('/v1/roles/' + str(role_id) + '/users/' + str(user_id))
+        return r.json()
+
+    # User API
+
+    async def get_users(self, limit=1000, token='', sort_by='lastName', email=''):
+        if email != '':
+            params = {'limit': int(limit), 'token': str(token), 'sortBy': str(sort_by), 'email': str(email)}
+        else:
+            params = {'limit': int(limit), 'token': str(token), 'sortBy': str(sort_by)}
+        r = await self.get('/v1/users', params=params)
+        return r.json()
+
+    def iter_users(self, limit=1000, sort_by='lastName', email='', prefetch=0):
+        async def fetch_page(token):
+            r = await self.get_users(limit=limit, token=token, sort_by=sort_by, email=email)
+            return r['data'], r['next']
+        return aiter_items(aiter_token_pages(fetch_page, token='', prefetch=prefetch))
+
+    async def get_users_sync(self, limit=1000, sort_by='lastName', email='', prefetch=0):
+        return [item async for item in self.iter_users(limit=limit, sort_by=sort_by, email=email, prefetch=prefetch)]
+
+    async def get_user(self, user_id):
+        r = await self.get('/v1/users/' + str(user_id))
+        return r.json() # ['data']
+
+    # This call gets the user and then all roles the user belongs to. This is useful for exporting or copying a user
+    # to a new org.
+    async def get_user_and_roles(self, user_id):
+        user = await self.get_user(str(user_id))
+        user['roles'] = []
+        for role_id in user['roleIds']:
+            role = await self.get_role(str(role_id))
+            user['roles'].append(role)
+        return user
+
+    async def create_user(self, data):
+        r = await self.post('/v1/users', data)
+        return r.json()
+
+    async def create_user_by_field(self, first_name, last_name, email, roleIDs):
+        data = {'firstName': str(first_name), 'lastName': str(last_name), 'email': str(email), 'roleIds': roleIDs}
+        r = await self.create_user(data)
+        return r
+
+    async def update_user(self, user_id, data):
+        r = await self.put('/v1/users/' + str(user_id), data)
+        return r.json()
+
+    async def update_user_by_field(self, user_id, first_name, last_name, is_active, role_ids):
+        data = {'firstName': str(first_name), 'lastName': str(last_name), 'isActive': is_active,  'roleIds': role_ids}
+        r = await self.update_user(user_id, data)
+        return r
+
+    async def delete_user(self, user_id, transferTo=None):
+        if transferTo:
+            params = {'transferTo': str(transferTo)}
+        else:
+            params = None
+        r = await self.delete('/v1/users/' + str(user_id), params=params)
+        return r
+
+    async def change_user_email(self, id, email):
+        data = {'email': str(email)}
+        r = await self.post('/v1/users' + str(id) + '/email/requestChange', data)
+        return r.json()
+
+    async def reset_user_password(self, id):
+        r = await self.post('/v1/users' + str(id) + '/password/reset')
+        return r.json()
+
+    async def unlock_user(self, id):
+        r = await self.post('/v1/users' + str(id) + '/unlock')
+        return r.json()
+
+    async def disable_user_MFA(self, id, email, password):
+        data = {'email': str(email), 'password': str(password)}
+        r = await self.put('/v1/users/' + str(id) + 'mfa/disable', data)
+        return r.json()
+
+    # Connections API
+
+    async def get_connections(self, limit=1000, token=''):
+        params = {'limit': limit, 'token': token}
+        r = await self.get('/v1/connections', params=params)
+        return r.json()
+
+    def iter_connections(self, limit=1000, prefetch=0):
+        async def fetch_page(token):
+            r = await self.get_connections(limit=limit, token=token)
+            return r['data'], r['next']
+        return aiter_items(aiter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    async def get_connections_sync(self, limit=1000, prefetch=0):
+        return [item async for item in self.iter_connections(limit=limit, prefetch=prefetch)]
+
+    async def create_connection(self, connection):
+        r = await self.post('/v1/connections', connection)
+        return r.json()
+
+    async def test_connection(self, connection):
+        r = await self.post('/v1/connections/test', connection)
+        return r.json()
+
+    async def get_connection(self, item_id, type):
+        params = {'type': str(type)}
+        r = await self.get('/v1/connections/' + str(item_id), params=params)
+        return r.json()
+
+    async def update_connection(self, item_id, connection):
+        r = await self.put('/v1/connections/' + str(item_id), connection)
+        return r.json()
+
+    async def delete_connection(self, item_id, item_type):
+        params = {'type': str(item_type)}
+        r = await self.delete('/v1/connections/' + str(item_id), params=params)
+        return r
+
+    # Field Extraction Rules API
+
+    async def get_fers(self, limit=1000, token=''):
+        params = {'limit': limit, 'token': token}
+        r = await self.get('/v1/extractionRules', params=params)
+        return r.json()
+
+    def iter_fers(self, limit=1000, prefetch=0):
+        async def fetch_page(token):
+            r = await self.get_fers(limit=limit, token=token)
+            return r['data'], r['next']
+        return aiter_items(aiter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    async def get_fers_sync(self, limit=1000, prefetch=0):
+        return [item async for item in self.iter_fers(limit=limit, prefetch=prefetch)]
+
+    async def create_fer(self, fer):
+        r = await self.post('/v1/extractionRules', fer)
+        return r.json()
+
+    async def create_fer_by_fields(self, name, scope, parse_expression, enabled=False):
+        data = {'name': name, 'scope': scope, 'parseExpression': parse_expression, 'enabled': str(enabled).lower()}
+        r = await self.create_fer(data)
+        return r
+
+    async def get_fer(self, item_id):
+        r = await self.get('/v1/extractionRules/' + str(item_id))
+        return r.json()
+
+    async def update_fer(self, item_id, name, scope, parse_expression, enabled=False):
+        data = {'name': name, 'scope': scope, 'parseExpression': parse_expression, 'enabled': str(enabled).lower()}
+        r = await self.put('/v1/extractionRules/' + str(item_id), data)
+        return r.json()
+
+    async def delete_fer(self, item_id):
+        r = await self.delete('/v1/extractionRules/' + str(item_id))
+        return r
+
+    # Scheduled View API
+
+    async def get_scheduled_views(self, limit=1000, token=''):
+        params = {'limit': limit, 'token': token}
+        r = await self.get('/v1/scheduledViews', params=params)
+        return r.json()
+
+    def iter_scheduled_views(self, limit=1000, prefetch=0):
+        async def fetch_page(token):
+            r = await self.get_scheduled_views(limit=limit, token=token)
+            return r['data'], r['next']
+        return aiter_items(aiter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    async def get_scheduled_views_sync(self, limit=1000, prefetch=0):
+        return [item async for item in self.iter_scheduled_views(limit=limit, prefetch=prefetch)]
+
+    #start time must be in RFC3339 format
+    # https://tools.ietf.org/html/rfc3339
+    # https://medium.com/easyread/understanding-about-rfc-3339-for-datetime-formatting-in-software-engineering-940aa5d5f68a
+    async def create_scheduled_view(self, item):
+        r = await self.post('/v1/scheduledViews', item)
+        return r.json()
+
+    async def create_scheduled_view_by_field(self, index_name, query, start_time, retention_period=-1, data_forwarding_id=None):
+        data = {'indexName': str(index_name), 'query': str(query), 'startTime': str(start_time), 'retentionPeriod': int(retention_period), "dataForwardingId": str(data_forwarding_id) }
+        r = await self.post('/v1/scheduledViews', data)
+        return r.json()
+
+    async def get_scheduled_view(self, item_id):
+        r = await self.get('/v1/scheduledViews/' + str(item_id))
+        return r.json()
+
+    async def update_scheduled_view(self, item_id, data_forwarding_id=None, retention_period=-1, reduce_retention_period_immediately=False):
+        data = {'retentionPeriod': retention_period, "dataForwardingId": data_forwarding_id, "reduceRetentionPeriodImmediately" : str(reduce_retention_period_immediately).lower()}
+        r = await self.put('/v1/scheduledViews/' + str(item_id),data)
+        return r.json()
+
+    async def disable_scheduled_view(self, item_id):
+        r = await self.delete('/v1/scheduledViews/' + str(item_id) + '/disable')
+        return r
+
+    # Partitions API
+
+    async def get_partitions(self, limit=1000, token=''):
+        params = {'limit': limit, 'token': token}
+        r = await self.get('/v1/partitions', params=params)
+        return r.json()
+
+    def iter_partitions(self, limit=1000, prefetch=0):
+        async def fetch_page(token):
+            r = await self.get_partitions(limit=limit, token=token)
+            return r['data'], r['next']
+        return aiter_items(aiter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    async def get_partitions_sync(self, limit=1000, prefetch=0):
+        return [item async for item in self.iter_partitions(limit=limit, prefetch=prefetch)]
+
+    async def create_partition(self, item):
+        r = await self.post('/v1/partitions', item)
+        return r.json()
+
+    async def create_partition_by_field(self, name, routing_expression, analytics_tier="enhanced", retention_period=-1, data_forwarding_id=None, is_compliant=False):
+        data = {'name': str(name),
+                'routingExpression': str(routing_expression),
+                'analyticsTier': str(analytics_tier),
+                'retentionPeriod': int(retention_period),
+                'dataForwardingId': str(data_forwarding_id),
+                'isCompliant': str(is_compliant).lower()}
+
+        r = await self.post('/v1/partitions', data)
+        return r.json()
+
+    async def get_partition(self, item_id):
+        r = await self.get('/v1/partitions/' + str(item_id))
+        return r.json()
+
+    async def update_partition(self, item_id,  data_forwarding_id=None, retention_period=-1, reduce_retention_period_immediately=False, is_compliant=False):
+        data = {'retentionPeriod': retention_period,
+                "dataForwardingId": data_forwarding_id,
+                "reduceRetentionPeriodImmediately" : str(reduce_retention_period_immediately).lower(),
+                "isCompliant": str(is_compliant).lower()}
+        r = await self.put('/v1/partitions/' + str(item_id),data)
+        return r.json()
+
+    async def decommission_partition(self, item_id):
+        data ={}
+        r = await self.post('/v1/partitions/' + str(item_id) + '/decommission', data)
+        return r
+
+    # Monitors API
+
+    async def get_usage_info(self):
+        r = await self.get('/v1/monitors/usageInfo')
+        return r.json()
+
+    async def bulk_get_monitors(self, item_ids):
+        item_ids_string = ''
+        for item_id in item_ids:
+            item_ids_string = item_ids_string + str(item_id) + ','
+        item_ids_string = item_ids_string[:-1]
+        params = {'ids': item_ids_string}
+        r = await self.get('/v1/monitors', params=params)
+        return r.json()
+
+    async def create_monitor(self, parent_id, monitor):
+        params = { 'parentId': str(parent_id)}
+        r = await self.post('/v1/monitors', monitor, params=params)
+        return r.json()
+
+    async def create_monitor_folder(self, parent_id, name, description=''):
+        data = {'name': str(name),
+                'description': str(description),
+                'type': 'MonitorsLibraryFolder'}
+        r = await self.create_monitor(parent_id, data)
+        return r
+
+    async def bulk_delete_monitors(self, item_ids):
+        item_ids_string = ''
+        for item_id in item_ids:
+            item_ids_string = item_ids_string + str(item_id) + ','
+        item_ids_string = item_ids_string[:-1]
+        params = {'ids': item_ids_string}
+        r = await self.delete('/v1/monitors', params=params)
+        return r
+
+    async def get_monitor_folder_root(self):
+        r = await self.get('/v1/monitors/root')
+        return r.json()
+
+    async def get_monitor_by_path(self, path):
+        params = {'path': str(path)}
+        r = await self.get('/v1/monitors/path', params=params)
+        return r.json()
+
+    async def search_monitors(self, query, limit=100, offset=0):
+        params = {'query': str(query),
+                  'limit': int(limit),
+                  'offset': int(offset)}
+        r = await self.get('/v1/monitors/search', params=params)
+        return r.json()
+
+    def iter_monitors(self, query, limit=100, concurrency=1):
+        pages = aiter_offset_pages(lambda offset: self.search_monitors(query, limit=limit, offset=offset), limit,
+                                   concurrency=concurrency)
+        return aiter_items(pages)
+
+    async def search_monitors_sync(self, query, limit=100, concurrency=1):
+        return [item async for item in self.iter_monitors(query, limit=limit, concurrency=concurrency)]
+
+    async def get_monitor(self, item_id):
+        r = await self.get('/v1/monitors/' + str(item_id))
+        return r.json()
+
+    async def update_monitor(self, item_id, monitor):
+        r = await self.put('/v1/monitors/' + str(item_id), monitor)
+        return r.json()
+
+    async def delete_monitor(self, item_id):
+        r = await self.delete('/v1/monitors/' + str(item_id))
+        return r
+
+    async def get_monitor_path(self, item_id):
+        r = await self.get('/v1/monitors/' + str(item_id) + '/path')
+        return r.json()
+
+    async def move_monitor(self, item_id, parent_id):
+        params = { 'parentId': str(parent_id)}
+        r = await self.post('/v1/monitors/' + str(item_id) + '/move', params=params)
+        return r.json()
+
+    async def copy_monitor(self, item_id, parent_id, name=None, description=''):
+        data = {'parentId': str(parent_id),
+                'description': str(description)}
+        if name:
+            data['name'] = str(name)
+        r = await self.post('/v1/monitors/' + str(item_id) + '/copy')
+        return r.json()
+
+    async def export_monitor(self, item_id):
+        r = await self.get('/v1/monitors/' + str(item_id) + '/export')
+        return r.json()
+
+    async def import_monitor(self, parent_id, monitor):
+        r = await self.post('/v1/monitors/' + str(parent_id) + '/import', monitor)
+        return r.json()
+
+    # SAML Config API
+
+    async def get_saml_configs(self):
+        r = await self.get('/v1/saml/identityProviders')
+        return r.json()
+
+    async def get_saml_config_by_name(self, name):
+        configs = await self.get_saml_configs()
+        for config in configs:
+            if config['name'] == str(name):
+                return config
+        return False
+
+    async def get_saml_config_by_id(self, item_id):
+        configs = await self.get_saml_configs()
+        for config in configs:
+            if config['id'] == str(item_id):
+                return config
+        return False
+
+    async def create_saml_config(self, saml_config):
+        r = await self.post('/v1/saml/identityProviders', saml_config)
+        return r.json()
+
+    async def update_saml_config(self, item_id, saml_config):
+        r = await self.put('/v1/saml/identityProviders/' + str(item_id), saml_config)
+        return r.json()
+
+    async def delete_saml_config(self, item_id):
+        r = await self.delete('/v1/saml/identityProviders/' + str(item_id))
+        return r
+
+    async def get_whitelisted_users(self):
+        r = await self.get('/v1/saml/whitelistedUsers')
+        return r.json()
+
+    async def set_whitelisted_user(self, user_id):
+        r = await self.post('/v1/saml/whitelistedUsers' + str(user_id))
+        return r.json()
+
+    async def remove_whitelisted_user(self, user_id):
+        r = await self.delete('/v1/saml/whitelistedUsers/' + str(user_id))
+        return r.json()
+
+    async def enable_saml_lockdown(self):
+        r = await self.post('/v1/saml/lockdown/enable')
+        return r.json()
+
+    async def disable_saml_lockdown(self):
+        r = await self.post('/v1/saml/lockdown/disable')
+        return r.json()
+
+    # Lookup table API
+    async def create_lookup_table(self, content):
+        r = await self.post('/v1/lookupTables', params=content)
+        return r.json()
+
+    async def get_lookup_table(self, table_id):
+        r = await self.get('/v1/lookupTables/%s' % table_id)
+        return r.json()
+    
+    async def edit_lookup_table(self, table_id, content):
+        r = await self.put('/v1/lookupTables/%s' % table_id, params=content)
+        return r.json()
+
+    async def delete_lookup_table(self, table_id):
+        r = await self.delete('/v1/lookupTables/%s' % table_id)
+        return r.json()
+
+    async def upload_csv_lookup_table(self, table_id, file_path, file_name, merge='false'):
+        params={'file_name': file_name,
+                'full_file_path': os.path.join(file_path, file_name),
+                'merge': merge
+                }
+        r = await self.post_file('/v1/lookupTables/%s/upload' % table_id, params)
+        return r.json()
+
+    async def check_lookup_status(self, table_id):
+        r = await self.get('/v1/lookupTables/jobs/%s/status' % table_id)
+        return r.json()
+
+    async def empty_lookup_table(self, table_id):
+        r = await self.post('/v1/lookupTables/%s/truncate'% table_id, params=None)
+        return r.json()
+    
+    async def update_lookup_table(self, table_id, content):
+        r = await self.put('/v1/lookupTables/%s/row' % table_id, params=content)
+        return r.json()
+
+    # Cloud SIEM Rules
+
+    async def get_rules(self, query, limit=50, offset=0, expand=[]):
+        params = {'q': str(query),
+                  'limit': int(limit),
+                  'offset': int(offset),
+                  'expand': expand}
+        r = await self.get('/sec/v1/rules', params=params)
+        return r.json()
+
+    def iter_rules(self, query, limit=50, expand=[]):
+        async def fetch_page(offset):
+            r = await self.get_rules(query, limit=limit, offset=offset, expand=expand)
+            return r['data']['objects'], r['data']['hasNextPage']
+        return aiter_items(aiter_has_next_pages(fetch_page, limit))
+
+    async def get_rules_sync(self, query, limit=50, expand=[]):
+        return [item async for item in self.iter_rules(query, limit=limit, expand=expand)]
+
+    async def get_rule(self, item_id, expand=[]):
+        params = {'expand': expand}
+        r = await self.get('/sec/v1/rules/' + str(item_id), params=params)
+        return r.json()['data']
+
+    async def delete_rule(self, item_id):
+        r = await self.delete('/sec/v1/rules/' + str(item_id))
+        return r
+
+    async def create_aggregation_rule(self, item):
+        r = await self.post('/sec/v1/rules/aggregation', item)
+        return r.json()
+
+    async def create_chain_rule(self, item):
+        r = await self.post('/sec/v1/rules/chain', item)
+        return r.json()
+
+    async def create_match_rule(self, item):
+        r = await self.post('/sec/v1/rules/match', item)
+        return r.json()
+
+    async def create_templated_match_rule(self, item):
+        r = await self.post('/sec/v1/rules/templated', item)
+        return r.json()
+
+    async def create_threshold_rule(self, item):
+        r = await self.post('/sec/v1/rules/threshold', item)
+        return r.json()
+
+    # Cloud SIEM Custom Insights
+    async def get_custom_insights(self, limit=50, offset=0):
+        params = {'limit': int(limit),
+                  'offset': int(offset)}
+        r = await self.get('/sec/v1/custom-insights', params=params)
+        return r.json()
+
+    def iter_custom_insights(self, limit=50):
+        async def fetch_page(offset):
+            r = await self.get_custom_insights(limit=limit, offset=offset)
+            return r['data']['objects'], r['data']['hasNextPage']
+        return aiter_items(aiter_has_next_pages(fetch_page, limit))
+
+    async def get_custom_insights_sync(self, limit=50):
+        return [item async for item in self.iter_custom_insights(limit=limit)]
+
+    async def get_custom_insight(self, item_id):
+        custom_insights = await self.get_custom_insights_sync()
+        for custom_insight in custom_insights:
+            if custom_insight['id'] == str(item_id):
+                return custom_insight
+        return False
+
+    async def create_custom_insight(self, payload):
+        r = await self.post('/sec/v1/custom-insights', payload)
+        return r.json()
+
+    async def delete_custom_insight(self, item_id):
+        r = await self.delete('/sec/v1/custom-insights/' + str(item_id))
+        return r
+
+    async def update_custom_insight(self, item_id, payload):
+        r = await self.put('/sec/v1/custom-insights/' + str(item_id), payload)
+        return r.json()
+
+    # Cloud SIEM User API test
+
+    async def get_current_user(self):
+        r = await self.get('/sec/v1/users/current')
+        return r.json()
+
+    # Cloud SIEM Mappings
+
+    async def get_log_mappings(self, query, offset=0, limit=50):
+        params = {'q': str(query),
+                  'limit': int(limit),
+                  'offset': int(offset)}
+        r = await self.get('/sec/v1/log-mappings', params=params)
+        return r.json()
+
+    def iter_log_mappings(self, query, limit=50):
+        async def fetch_page(offset):
+            r = await self.get_log_mappings(query, limit=limit, offset=offset)
+            return r['data']['objects'], r['data']['hasNextPage']
+        return aiter_items(aiter_has_next_pages(fetch_page, limit))
+
+    async def get_log_mappings_sync(self, query, limit=50):
+        return [item async for item in self.iter_log_mappings(query, limit=limit)]
+
+    async def get_custom_log_mappings_sync(self, limit=50):
+        return [item async for item in self.iter_log_mappings('isCustom:True', limit=limit)]
+
+    async def get_log_mapping(self, item_id):
+        r = await self.get('/sec/v1/log-mappings/' + str(item_id))
+        return r.json()
+
+    async def create_log_mapping(self, item):
+        r = await self.post('/sec/v1/log-mappings', data=item)
+        return r.json()
+
+    async def update_log_mapping(self, item_id, item):
+        r = await self.put('/sec/v1/log-mappings/' + str(item_id), item)
+        return r.json()
+
+    async def delete_log_mapping(self, item_id):
+        r = await self.delete('/sec/v1/log-mappings/' + str(item_id))
+        return r
+
+    #  access key management APIs
+    async def get_access_keys(self, limit=100, token=''):
+        params = {'limit': limit, 'token': token}
+        r = await self.get('/v1/accessKeys', params=params)
+        return r.json()
+
+    def iter_access_keys(self, limit=100, prefetch=0):
+        async def fetch_page(token):
+            r = await self.get_access_keys(limit=limit, token=token)
+            return r['data'], r['next']
+        return aiter_items(aiter_token_pages(fetch_page, token=None, prefetch=prefetch))
+
+    async def get_access_keys_sync(self, limit=100, prefetch=0):
+        return [item async for item in self.iter_access_keys(limit=limit, prefetch=prefetch)]
+
+    async def create_access_key(self, label, cors_headers=None):
+        data = {'label': str(label)}
+        if cors_headers:
+            data['corsHeaders'] = cors_headers
+        r = await self.post('/v1/accessKeys', data=data)
+        return r.json()
+
+    async def get_personal_access_keys(self):
+        r = await self.get('/v1/accessKeys/personal')
+        return r.json()['data']
+
+    async def update_access_key(self, item_id, data):
+        r = await self.put('/v1/accessKeys/' + str(item_id), data=data)
+        return r.json()
+
+    async def delete_access_key(self, item_id):
+        r = await self.delete('/v1/accessKeys/' + str(item_id))
+        return r
+
+    #  Account API
+
+    async def get_account_owner(self):
+        r = await self.get('/v1/account/accountOwner')
+        return r.json()
+
+    async def get_account_status(self):
+        r = await self.get('/v1/account/status')
+        return r.json()
+
+    async def get_account_subdomain(self):
+        r = await self.get('/v1/account/subdomain')
+        return r.json()
+
+    async def update_account_subdomain(self, subdomain):
+        data = {'subdomain': str(subdomain)}
+        r = await self.put('/v1/account/subdomain', data=data)
+        return r.json()
+
+    async def create_account_subdomain(self, subdomain):
+        data = {'subdomain': str(subdomain)}
+        r = await self.post('/v1/account/subdomain', data=data)
+        return r.json()
+
+    async def delete_account_subdomain(self):
+        r = await self.post('/v1/account/subdomain')
+        return r
+
+    async def recover_account_subdomain(self, email):
+        params = {'email': str(email)}
+        r = await self.post('/v1/account/subdomain', params=params)
+        return r.json()
+
+    # convenience functions, these do not map to directly to the API but I find them useful
+
+    async def whoami(self):
+        api_keys = await self.get_personal_access_keys()
+        user_id = api_keys[0]['createdBy']
+        users = await self.get_users_sync()
+        for user in users:
+            if user['id'] == user_id:
+                return user
+        return False
+
+
+class AsyncSumoLogicCSE(_AsyncClient):
+    def __init__(self, api_key, endpoint, log_level='info', log_file=None, caBundle=None, rate_limiter=None,
+                 retry_policy=None, hooks=None, max_connections=MAX_CONNECTIONS, timeout=300):
+        if rate_limiter is None:
+            rate_limiter = get_rate_limiter(('cse', api_key), sumologic_cse.NUMBER_OF_CALLS / sumologic_cse.PERIOD,
+                                            sumologic_cse.NUMBER_OF_CALLS)
+        if retry_policy is None:
+            retry_policy = RetryPolicy(max_tries=sumologic_cse.MAX_TRIES,
+                                       base_delay=sumologic_cse.PERIOD / sumologic_cse.NUMBER_OF_CALLS * 2)
+        super().__init__(endpoint,
+                         {'content-type': 'application/json', 'X-API-Key': api_key},
+                         None,
+                         log_level, log_file, caBundle, rate_limiter, retry_policy, hooks, max_connections, timeout)
+
+    async def get_rules(self, query, limit=50, offset=0, expand=[]):
+        params = {'q': str(query),
+                  'limit': int(limit),
+                  'offset': int(offset),
+                  'expand': expand}
+        r = await self.get('/rules', params=params)
+        return r.json()
+
+    def iter_rules(self, query, limit=50, expand=[]):
+        async def fetch_page(offset):
+            r = await self.get_rules(query, limit=limit, offset=offset, expand=expand)
+            return r['data']['objects'], r['data']['hasNextPage']
+        return aiter_items(aiter_has_next_pages(fetch_page, limit))
+
+    async def get_rules_sync(self, query, limit=50, expand=[]):
+        return [item async for item in self.iter_rules(query, limit=limit, expand=expand)]
+
+    async def get_rule(self, item_id: str, expand=[]):
+        params = {'expand': expand}
+        r = await self.get('/rules/' + str(item_id), params=params)
+        return r.json()['data']
+
+    async def delete_rule(self, item_id):
+        r = await self.delete('/rules/' + str(item_id))
+        return r
+
+    async def create_aggregation_rule(self, item):
+        r = await self.post('/rules/aggregation', item)
+        return r.json()
+
+    async def create_chain_rule(self, item):
+        r = await self.post('/rules/chain', item)
+        return r.json()
+
+    async def create_match_rule(self, item):
+        r = await self.post('/rules/match', item)
+        return r.json()
+
+    async def create_templated_match_rule(self, item):
+        r = await self.post('/rules/templated', item)
+        return r.json()
+
+    async def create_threshold_rule(self, item):
+        r = await self.post('/rules/threshold', item)
+        return r.json()
+
+    async def get_threat_intel_indicators(self):
+        r = await self.get('/threat-intel-indicators')
+        return r.json()
+
+    async def get_threat_intel_indicator(self, item_id):
+        r = await self.get('/threat-intel-indicators/' + str(item_id))
+        return r.json()
+
+    async def update_threat_intel_indicator(self, item_id, item):
+        r = await self.put('/threat-intel-indicators/' + str(item_id), item)
+        return r.json()
+
+    async def get_threat_intel_sources(self):
+        r = await self.get('/threat-intel-sources')
+        return r.json()
+
+    async def get_threat_intel_source(self, item_id):
+        r = await self.get('/threat-intel-sources' + str(item_id))
+        return r.json()
+
+    async def create_threat_intel_source(self, item):
+        r = await self.post('/threat-intel-sources', item)
+        return r.json()
+
+    async def add_threat_indicators_to_source(self, source_id, threat_indicators):
+        r = await self.post('/threat-intel-sources/' + str(source_id) + '/items', threat_indicators)
+        return r.json()
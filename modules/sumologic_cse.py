@@ -1,14 +1,21 @@
 import json
+import logging
 import requests
 import time
 import warnings
+import threading
+from types import MappingProxyType
 from logzero import logger
 import logzero
-from functools import wraps
 try:
     import cookielib
 except ImportError:
     import http.cookiejar as cookielib
+from .ratelimit import get_rate_limiter
+from .retry import RetryPolicy, backoff
+from .hooks import RequestEvent, dispatch
+from .pool import mount_pool
+from .pagination import iter_has_next_pages, iter_items
 
 
 # API RATE Limit constants
@@ -18,49 +25,64 @@ NUMBER_OF_CALLS = 1000
 PERIOD = 60  # in seconds
 
 
-def backoff(func):
-    @wraps(func)
-    def limited(*args, **kwargs):
-        delay = PERIOD / NUMBER_OF_CALLS *2
-        tries = 0
-        while tries < MAX_TRIES:
-            try:
-                return func(*args, **kwargs)
-            except Exception as e:
-                if e.response.status_code == 429:  # rate limited
-                    lastException = e
-                    tries += 1
-                    logger.debug("Rate limited, sleeping for {0}s".format(delay))
-                else:
-                    raise
-            logger.debug(f"delay: {delay} attempts: {tries}")
-            time.sleep(delay)
-            delay = delay * 2
-        logger.debug("Rate limited function still failed after {0} retries.".format(MAX_TRIES))
-        raise lastException
-    return limited
-
-
 class SumoLogicCSE(object):
-    def __init__(self, api_key, endpoint, log_level='info', log_file=None, caBundle=None, cookieFile='cookies.txt', use_session=True):
-        self.session = requests.Session()
+    """
+    A SumoLogicCSE instance is safe to share between threads. Each thread gets its own requests.Session (all
+    drawing on the shared connection pool from modules.pool) and the default headers are immutable.
+    """
+
+    def __init__(self, api_key, endpoint, log_level='info', log_file=None, caBundle=None, cookieFile='cookies.txt', use_session=True, rate_limiter=None, retry_policy=None, hooks=None, pool_connections=None, pool_maxsize=None):
         self.log_level = log_level
         self.set_log_level(self.log_level)
         if log_file:
             logzero.logfile(str(log_file))
         self.endpoint = endpoint
         self.use_session = use_session
-        self.headers = {'content-type': 'application/json', 'X-API-Key': api_key}
-        self.session.headers = self.headers
-        if caBundle is not None:
-            self.session.verify = caBundle
-        cj = cookielib.FileCookieJar(cookieFile)
-        self.session.cookies = cj
+        self.auth = None
+        self.headers = MappingProxyType({'content-type': 'application/json', 'X-API-Key': api_key})
+        # Calls are paced by a token bucket shared by every client using this API key. Pass
+        # rate_limiter=False to disable pacing and rely on backoff alone.
+        if rate_limiter is None:
+            self.rate_limiter = get_rate_limiter(('cse', api_key), NUMBER_OF_CALLS / PERIOD, NUMBER_OF_CALLS)
+        else:
+            self.rate_limiter = rate_limiter
+        # 429s, 5xx responses and transport errors are retried according to this policy
+        if retry_policy is None:
+            self.retry_policy = RetryPolicy(max_tries=MAX_TRIES, base_delay=PERIOD / NUMBER_OF_CALLS * 2)
+        else:
+            self.retry_policy = retry_policy
+        # instrumentation hooks, see modules.hooks.RequestHooks
+        self.hooks = list(hooks or [])
+        self.caBundle = caBundle
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        # http.cookiejar jars lock internally, so one jar is shared by all the per-thread sessions
+        self.cookies = cookielib.FileCookieJar(cookieFile)
+        self._local = threading.local()
         if endpoint[-1:] == "/":
             self.endpoint = self.endpoint[:-1]
             warnings.warn(
                 "Endpoint should not end with a slash character, it has been removed from your endpoint string.")
 
+    @property
+    def session(self):
+        # one requests.Session per thread, created on first use
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._new_session()
+            self._local.session = session
+        return session
+
+    def _new_session(self):
+        session = requests.Session()
+        session.headers.update(self.headers)
+        if self.caBundle is not None:
+            session.verify = self.caBundle
+        session.cookies = self.cookies
+        # connections to the endpoint come from a process-wide pool shared by every client, see modules.pool
+        mount_pool(session, self.endpoint, pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        return session
+
     def set_log_level(self, log_level):
         if log_level == 'info':
             self.log_level = log_level
@@ -83,92 +105,60 @@ class SumoLogicCSE(object):
     def get_versioned_endpoint(self, version):
         return self.endpoint+'/%s' % version
 
-    @backoff
-    def delete(self, method, params=None, headers=None, data=None):
-        logger.debug("DELETE: " + self.endpoint + method)
-        logger.debug("Headers:")
-        logger.debug(headers)
-        logger.debug("Params:")
-        logger.debug(params)
-        logger.debug("Body:")
-        logger.debug(data)
-        if self.use_session:
-            r = self.session.delete(self.endpoint + method, params=params, headers=headers, data=data)
-        else:
-            r = requests.delete(self.endpoint + method, params=params, headers=headers, data=data, auth=self.auth)
-        logger.debug("Response:")
-        logger.debug(r)
-        logger.debug("Response Body:")
-        logger.debug(r.text)
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def _send(self, http_method, method, params=None, headers=None, data=None):
+        url = self.endpoint + method
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("%s: %s\nHeaders: %s\nParams: %s\nBody: %s", http_method, url, headers, params, data)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        event = None
+        if self.hooks:
+            event = RequestEvent(http_method, method)
+            dispatch(self.hooks, 'on_request', event)
+        start = time.perf_counter()
+        try:
+            if self.use_session:
+                r = self.session.request(http_method, url, params=params, headers=headers, data=data)
+            else:
+                r = requests.request(http_method, url, params=params, headers={**self.headers, **(headers or {})},
+                                     data=data, auth=self.auth)
+        except requests.RequestException as e:
+            if event is not None:
+                event.latency = time.perf_counter() - start
+                event.exception = e
+                dispatch(self.hooks, 'on_response', event)
+            raise
+        if debug:
+            logger.debug("Response: %s\nResponse Body: %s", r, r.text)
         if r.status_code != 200:
             r.reason = r.text
+        if event is not None:
+            event.latency = time.perf_counter() - start
+            event.status = r.status_code
+            event.bytes = len(r.content)
+            dispatch(self.hooks, 'on_response', event)
         r.raise_for_status()
         return r
 
     @backoff
-    def get(self, method, params=None, headers=None):
-        logger.debug("GET: " + self.endpoint + method)
-        logger.debug("Headers:")
-        logger.debug(headers)
-        logger.debug("Params:")
-        logger.debug(params)
-        if self.use_session:
-            r = self.session.get(self.endpoint + method, params=params, headers=headers)
-        else:
-            r = requests.get(self.endpoint + method, params=params, headers=headers, auth=self.auth)
+    def delete(self, method, params=None, headers=None, data=None):
+        return self._send('DELETE', method, params=params, headers=headers, data=data)
 
-        logger.debug("Response:")
-        logger.debug(r)
-        logger.debug("Response Body:")
-        logger.debug(r.text)
-        if r.status_code != 200:
-            r.reason = r.text
-        r.raise_for_status()
-        return r
+    @backoff
+    def get(self, method, params=None, headers=None):
+        return self._send('GET', method, params=params, headers=headers)
 
     @backoff
     def post(self, method, data, headers=None, params=None):
-        logger.debug("POST: " + self.endpoint + method)
-        logger.debug("Headers:")
-        logger.debug(headers)
-        logger.debug("Params:")
-        logger.debug(params)
-        logger.debug("Body:")
-        logger.debug(data)
-        if self.use_session:
-            r = self.session.post(self.endpoint + method, data=json.dumps(data), headers=headers, params=params)
-        else:
-            r = requests.post(self.endpoint + method, data=json.dumps(data), headers={**self.headers, **headers}, params=params, auth=self.auth)
-        logger.debug("Response:")
-        logger.debug(r)
-        logger.debug("Response Body:")
-        logger.debug(r.text)
-        if r.status_code != 200:
-            r.reason = r.text
-        r.raise_for_status()
-        return r
+        return self._send('POST', method, params=params, headers=headers, data=json.dumps(data))
 
     @backoff
     def put(self, method, data, headers=None, params=None):
-        logger.debug("PUT: " + self.endpoint + method)
-        logger.debug("Headers:")
-        logger.debug(headers)
-        logger.debug("Params:")
-        logger.debug(params)
-        logger.debug("Body:")
-        logger.debug(data)
-        if self.use_session:
-            r = self.session.put(self.endpoint + method, data=json.dumps(data), headers=headers, params=params)
-        else:
-            r = requests.put(self.endpoint + method, data=json.dumps(data), headers=headers, params=params, auth=self.auth)
-        logger.debug("Response:")
-        logger.debug(r)
-        logger.debug("Response Body:")
-        logger.debug(r.text)
-        if r.status_code != 200:
-            r.reason = r.text
-        r.raise_for_status()
-        return r
+        return self._send('PUT', method, params=params, headers=headers, data=json.dumps(data))
 
     def post_file(self, method, params, headers=None):
         """
@@ -202,16 +192,14 @@ class SumoLogicCSE(object):
         r = self.get('/rules', params=params)
         return r.json()
 
-    def get_rules_sync(self, query, limit=50, expand=[]):
-        offset = 0
-        results = []
-        while True:
+    def iter_rules(self, query, limit=50, expand=[]):
+        def fetch_page(offset):
             r = self.get_rules(query, limit=limit, offset=offset, expand=expand)
-            offset = offset + limit
-            results = results + r['data']['objects']
-            if not r['data']['hasNextPage']:
-                break
-        return results
+            return r['data']['objects'], r['data']['hasNextPage']
+        return iter_items(iter_has_next_pages(fetch_page, limit))
+
+    def get_rules_sync(self, query, limit=50, expand=[]):
+        return list(self.iter_rules(query, limit=limit, expand=expand))
 
     def get_rule(self, item_id: str, expand=[]):
         params = {'expand': expand}
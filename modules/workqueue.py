@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+_DONE = object()
+
+
+def run_bounded(fn, tasks, max_workers, max_pending=None):
+    """
+    Call fn(*args) for every args tuple in tasks on max_workers threads and yield the results in the order
+    they complete. Unlike submitting everything to an executor up front, tasks is only read as far as
+    needed to keep max_pending calls (default twice max_workers) queued or running. A generator of tasks is
+    therefore never held in memory, however many there are, and the order it produces them in is the
+    order they start (e.g. newest windows first). An exception from fn is raised here. If the caller stops
+    early, e.g. on Ctrl-C, the calls that haven't started are cancelled.
+    """
+    max_pending = max(max_pending or 2 * max_workers, 1)
+    tasks = iter(tasks)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='worker')
+    pending = set()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                args = next(tasks, _DONE)
+                if args is _DONE:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(fn, *args))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        # running calls finish on their own, the caller isn't kept waiting for them
+        executor.shutdown(wait=False)
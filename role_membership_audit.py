@@ -25,6 +25,7 @@ import csv
 import sys
 import pathlib
 from modules.sumologic import SumoLogic
+from modules.endpoints import endpoint_lookup as endpoint
 from logzero import logger
 from typing import Union
 from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, as_completed
@@ -33,28 +34,6 @@ import argparse
 from urllib.parse import quote
 
 
-def endpoint(deployment):
-    # there are duplicates here because most deployments have 2 names
-    endpoints = {'prod': 'https://api.sumologic.com/api',
-                 'us1': 'https://api.sumologic.com/api',
-                 'us2': 'https://api.us2.sumologic.com/api',
-                 'eu': 'https://api.eu.sumologic.com/api',
-                 'dub': 'https://api.eu.sumologic.com/api',
-                 'ca': 'https://api.ca.sumologic.com/api',
-                 'mon': 'https://api.ca.sumologic.com/api',
-                 'de': 'https://api.de.sumologic.com/api',
-                 'fra': 'https://api.de.sumologic.com/api',
-                 'au': 'https://api.au.sumologic.com/api',
-                 'syd': 'https://api.au.sumologic.com/api',
-                 'jp': 'https://api.jp.sumologic.com/api',
-                 'tky': 'https://api.jp.sumologic.com/api',
-                 'in': 'https://api.in.sumologic.com/api',
-                 'mum': 'https://api.in.sumologic.com/api',
-                 'fed': 'https://api.fed.sumologic.com/api',
-                 }
-    return endpoints[str(deployment).lower()]
-
-
 def export_content(key: str,
                    secret: str,
                    endpoint: str,
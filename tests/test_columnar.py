@@ -0,0 +1,34 @@
+import pytest
+from modules.columnar import RecordColumns
+
+# numpy and pyarrow are optional dependencies
+np = pytest.importorskip('numpy')
+
+
+def records(*rows):
+    return [{'map': row} for row in rows]
+
+
+def test_boolean_column_with_missing_values():
+    columns = RecordColumns([{'name': 'ok', 'fieldType': 'boolean'}])
+    columns.add_page(records({'ok': 'true'}, {'ok': ''}, {'ok': 'False'}))
+    assert columns.kinds['ok'] == 'bool'
+    assert list(columns.to_numpy()['ok']) == [True, None, False]
+
+
+def test_boolean_column_to_arrow_has_nulls():
+    pytest.importorskip('pyarrow')
+    columns = RecordColumns([{'name': 'ok', 'fieldType': 'boolean'}])
+    columns.add_page(records({'ok': 'true'}, {}))
+    table = columns.to_arrow()
+    assert table.column('ok').to_pylist() == [True, None]
+
+
+def test_int_column_falls_back_to_string_with_original_text():
+    columns = RecordColumns([{'name': 'code', 'fieldType': 'string'}])
+    columns.add_page(records({'code': '10'}, {'code': '007'}))
+    assert columns.kinds['code'] == 'int'
+    columns.add_page(records({'code': 'abc'}))
+    assert columns.kinds['code'] == 'string'
+    assert list(columns.to_numpy()['code']) == ['10', '007', 'abc']
+    assert columns.to_numpy().dtype['code'] == np.dtype(object)
@@ -0,0 +1,66 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+import requests
+from modules import endpoints
+
+
+def serve(handle):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            handle(self)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:%d/api' % server.server_port
+
+
+def reply(status, headers=None):
+    def handle(request):
+        request.send_response(status)
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.send_header('Content-Length', '0')
+        request.end_headers()
+    return handle
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(handle):
+        server, url = serve(handle)
+        started.append(server)
+        return url
+
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+def test_probe_follows_redirect_to_another_host(servers, monkeypatch):
+    authorized = []
+
+    def regional(request):
+        # requests drops the credentials on a redirect to another host
+        authorized.append(request.headers.get('Authorization'))
+        reply(401)(request)
+
+    regional_endpoint = servers(regional)
+    default_endpoint = servers(reply(301, {'Location': regional_endpoint + '/v1/collectors'}))
+    monkeypatch.setattr(endpoints, 'DEFAULT_ENDPOINT', default_endpoint)
+    assert endpoints.probe_endpoint('id', 'key') == regional_endpoint
+    assert authorized == [None]
+
+
+def test_probe_failing_at_default_endpoint_raises(servers, monkeypatch):
+    monkeypatch.setattr(endpoints, 'DEFAULT_ENDPOINT', servers(reply(401)))
+    resolver = endpoints.EndpointResolver(cache_file=False)
+    with pytest.raises(requests.HTTPError):
+        resolver.resolve('id', lambda: endpoints.probe_endpoint('id', 'key'))
+    assert resolver.get('id') is None
@@ -0,0 +1,56 @@
+import sqlite3
+from modules.manifest import Manifest, file_sha256
+
+START, END = '2021-01-01T00:00:00', '2021-01-01T01:00:00'
+
+
+def finished_chunk(manifest, path, content=b'one\ntwo\n'):
+    path.write_bytes(content)
+    manifest.start('a', START, END)
+    manifest.complete('a', START, END, str(path), 2, file_sha256(str(path)))
+
+
+def test_verify_checks_file_is_there_with_its_size(tmp_path):
+    manifest = Manifest(str(tmp_path / 'm.sqlite'))
+    path = tmp_path / 'a.log'
+    finished_chunk(manifest, path)
+    assert manifest.is_done('a', START, END, verify=True)
+    path.write_bytes(b'one\n')
+    assert not manifest.is_done('a', START, END, verify=True)
+    assert manifest.is_done('a', START, END)
+    path.unlink()
+    assert not manifest.is_done('a', START, END, verify=True)
+
+
+def test_checksum_reads_the_file_back(tmp_path):
+    path = tmp_path / 'a.log'
+    finished_chunk(Manifest(str(tmp_path / 'm.sqlite')), path)
+    # same size, different content
+    path.write_bytes(b'one\nTWO\n')
+    assert Manifest(str(tmp_path / 'm.sqlite')).is_done('a', START, END, verify=True)
+    assert not Manifest(str(tmp_path / 'm.sqlite'), checksum=True).is_done('a', START, END, verify=True)
+
+
+def test_start_again_counts_attempts(tmp_path):
+    manifest = Manifest(str(tmp_path / 'm.sqlite'))
+    manifest.start('a', START, END)
+    manifest.fail('a', START, END, 'boom')
+    manifest.start('a', START, END)
+    assert manifest._execute('SELECT status, attempts, error FROM chunks') == [('running', 2, None)]
+
+
+def test_manifest_without_sizes_is_upgraded(tmp_path):
+    path = tmp_path / 'm.sqlite'
+    connection = sqlite3.connect(str(path))
+    connection.execute('CREATE TABLE chunks (category TEXT NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL, '
+                       'status TEXT NOT NULL, path TEXT, count INTEGER, sha256 TEXT, '
+                       'attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated REAL NOT NULL, '
+                       'PRIMARY KEY (category, start, end))')
+    log = tmp_path / 'a.log'
+    log.write_bytes(b'one\ntwo\n')
+    connection.execute("INSERT INTO chunks VALUES ('a', ?, ?, 'done', ?, 2, ?, 1, NULL, 0)",
+                       (START, END, str(log), file_sha256(str(log))))
+    connection.commit()
+    connection.close()
+    # chunks recorded without a size are only checked for their file
+    assert Manifest(str(path)).is_done('a', START, END, verify=True)
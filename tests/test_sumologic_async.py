@@ -0,0 +1,68 @@
+import asyncio
+from aiohttp import web
+from modules import sumologic_async
+from modules.endpoints import EndpointResolver
+from modules.sumologic_async import AsyncSumoLogic
+
+
+def test_upload_csv_lookup_table(tmp_path):
+    (tmp_path / 'table.csv').write_text('host,owner\nweb1,ops\n')
+    uploads = []
+
+    async def upload(request):
+        form = await request.post()
+        uploads.append((request.match_info['table_id'], request.query['merge'], form['file'].filename,
+                        form['file'].file.read()))
+        return web.json_response({'id': 'job1'})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post('/api/v1/lookupTables/{table_id}/upload', upload)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            async with AsyncSumoLogic('id', 'key', endpoint='http://127.0.0.1:%d/api' % port) as sumo:
+                return await sumo.upload_csv_lookup_table('t1', str(tmp_path), 'table.csv', merge='true')
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == {'id': 'job1'}
+    assert uploads == [('t1', 'true', 'table.csv', b'host,owner\nweb1,ops\n')]
+
+
+def test_endpoint_probe_follows_redirect_to_another_host(monkeypatch):
+    async def regional(request):
+        # the org's deployment answers a probe whose credentials were dropped on the redirect
+        return web.Response(status=401)
+
+    async def start(handler, host):
+        app = web.Application()
+        app.router.add_get('/api/v1/collectors', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        return runner, 'http://%s:%d/api' % (host, runner.addresses[0][1])
+
+    async def run():
+        regional_runner, regional_endpoint = await start(regional, 'localhost')
+
+        async def default(request):
+            raise web.HTTPMovedPermanently(regional_endpoint + '/v1/collectors')
+
+        default_runner, default_endpoint = await start(default, '127.0.0.1')
+        monkeypatch.setattr(sumologic_async, 'DEFAULT_ENDPOINT', default_endpoint)
+        try:
+            async with AsyncSumoLogic('id', 'key') as sumo:
+                return sumo.endpoint, regional_endpoint
+        finally:
+            await default_runner.cleanup()
+            await regional_runner.cleanup()
+
+    resolver = EndpointResolver(cache_file=False)
+    monkeypatch.setattr(sumologic_async, 'get_endpoint_resolver', lambda: resolver)
+    endpoint, regional_endpoint = asyncio.run(run())
+    assert endpoint == regional_endpoint
+    assert resolver.get('id') == regional_endpoint
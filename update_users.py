@@ -21,31 +21,10 @@
 # SOFTWARE.
 
 from modules.sumologic import SumoLogic
+from modules.endpoints import endpoint_lookup as endpoint
 import argparse
 
 
-def endpoint(deployment):
-    # there are duplicates here because most deployments have 2 names
-    endpoints = {'prod': 'https://api.sumologic.com/api',
-                 'us1': 'https://api.sumologic.com/api',
-                 'us2': 'https://api.us2.sumologic.com/api',
-                 'eu': 'https://api.eu.sumologic.com/api',
-                 'dub': 'https://api.eu.sumologic.com/api',
-                 'ca': 'https://api.ca.sumologic.com/api',
-                 'mon': 'https://api.ca.sumologic.com/api',
-                 'de': 'https://api.de.sumologic.com/api',
-                 'fra': 'https://api.de.sumologic.com/api',
-                 'au': 'https://api.au.sumologic.com/api',
-                 'syd': 'https://api.au.sumologic.com/api',
-                 'jp': 'https://api.jp.sumologic.com/api',
-                 'tky': 'https://api.jp.sumologic.com/api',
-                 'in': 'https://api.in.sumologic.com/api',
-                 'mum': 'https://api.in.sumologic.com/api',
-                 'fed': 'https://api.fed.sumologic.com/api',
-                 }
-    return endpoints[str(deployment).lower()]
-
-
 def process_arguments():
     parser = argparse.ArgumentParser(description="Populate a user's last name field with their email if it is empty.")
     parser.add_argument('-key', required=True, help='API key ID')
@@ -58,8 +37,9 @@ def main():
     arguments = process_arguments()
     sumo = SumoLogic(arguments.key, arguments.sec, endpoint=endpoint(arguments.dep))
 
-    users = sumo.get_users_sync()
-    for user in users:
+    # stream the users and read the next page ahead while this one is updated. Sorted by email because
+    # lastName is the field being changed, and sorting by it would move users between pages mid-listing.
+    for user in sumo.iter_users(sort_by='email', prefetch=1):
         user_id = user['id']
         first_name = user['firstName']
         last_name = user['lastName']
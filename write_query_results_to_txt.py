@@ -24,28 +24,10 @@ import time
 import datetime
 import os
 from modules.sumologic import SumoLogic
+from modules.endpoints import endpoint_lookup
 
-# lookup the API endpoint URL using the Sumo deployment name
-def endpoint_lookup(deployment):
-    # there are duplicates here because most deployments have 2 names
-    endpoints = {'prod': 'https://api.sumologic.com/api',
-                 'us1': 'https://api.sumologic.com/api',
-                 'us2': 'https://api.us2.sumologic.com/api',
-                 'eu': 'https://api.eu.sumologic.com/api',
-                 'dub': 'https://api.eu.sumologic.com/api',
-                 'ca': 'https://api.ca.sumologic.com/api',
-                 'mon': 'https://api.ca.sumologic.com/api',
-                 'de': 'https://api.de.sumologic.com/api',
-                 'fra': 'https://api.de.sumologic.com/api',
-                 'au': 'https://api.au.sumologic.com/api',
-                 'syd': 'https://api.au.sumologic.com/api',
-                 'jp': 'https://api.jp.sumologic.com/api',
-                 'tky': 'https://api.jp.sumologic.com/api',
-                 'in': 'https://api.in.sumologic.com/api',
-                 'mum': 'https://api.in.sumologic.com/api',
-                 'fed': 'https://api.fed.sumologic.com/api',
-                 }
-    return endpoints[str(deployment).lower()]
+# result pages downloaded at once. Requests still go through the SDK's rate limiter.
+PAGE_CONCURRENCY = 4
 
 
 def download_and_write(start_time: datetime.datetime,
@@ -61,36 +43,29 @@ def download_and_write(start_time: datetime.datetime,
     end_time_ISO = end_time.isoformat()
 
     try:
-        sumo = SumoLogic(access_id, access_key, endpoint=api_endpoint)
         job_start_time = time.perf_counter()
-        searchjob = sumo.search_job(query, fromTime=start_time_ISO, toTime=end_time_ISO)
-        status = sumo.search_job_status(searchjob)
-        nummessages = status['messageCount']
-        while status['state'] != 'DONE GATHERING RESULTS':
-            if status['state'] == 'CANCELLED':
-                break
-            status = sumo.search_job_status(searchjob)
+        # the job is deleted when the with block ends, even if the download fails or is interrupted
+        with sumo.managed_search_job(query, fromTime=start_time_ISO, toTime=end_time_ISO) as searchjob:
+            status = sumo.wait_for_search_job(searchjob, on_status=lambda status: print(
+                f"Search job running. Current result count is {status['messageCount']}"))
             nummessages = status['messageCount']
-            print(f"Search job running. Current result count is {nummessages}")
-            time.sleep(2)
-        if status['state'] == 'DONE GATHERING RESULTS':
-            job_finish_time = time.perf_counter()
-            iterations = nummessages // 10000 + 1
+            if status['state'] in ('DONE GATHERING RESULTS', 'FORCE PAUSED'):
+                job_finish_time = time.perf_counter()
+                iterations = (nummessages + 9999) // 10000
 
-            with open(filename, 'a') as f:
-                for iteration in range(1, iterations + 1):
-                    print(f"Downloading and writing result block {iteration}/{iterations}")
-                    messages = sumo.search_job_messages(searchjob, limit=10000,
-                                                    offset=((iteration - 1) * 10000))
-                    for message in messages['messages']:
-                        f.write(message['map']['_raw'])
-                        f.write('\n')
-            download_finish_time = time.perf_counter()
-            print(f"Search job took {job_finish_time - job_start_time:0.4f} seconds to complete.")
-            print(f"Data download took {download_finish_time - job_finish_time:0.4f} seconds.")
+                # the message count is final now, so the result pages can be downloaded in parallel
+                with open(filename, 'a') as f:
+                    pages = sumo.iter_search_job_message_pages(searchjob, nummessages, limit=10000,
+                                                               concurrency=PAGE_CONCURRENCY)
+                    for iteration, messages in enumerate(pages, start=1):
+                        print(f"Writing result block {iteration}/{iterations}")
+                        f.writelines(message['map']['_raw'] + '\n' for message in messages)
+                download_finish_time = time.perf_counter()
+                print(f"Search job took {job_finish_time - job_start_time:0.4f} seconds to complete.")
+                print(f"Data download took {download_finish_time - job_finish_time:0.4f} seconds.")
             
-        else:
-            print(f"looks like something went wrong:{status['state']}")
+            else:
+                print(f"looks like something went wrong:{status['state']}")
     except Exception as e:
         print(str(e))
 